@@ -7,29 +7,39 @@
 import os
 import sys
 import json
+import argparse
 from datetime import datetime
 from typing import Dict, Any, List
-from document_analyzer import DocumentAnalyzer
+from document_analyzer import analyze_file
+from document_analysis_manifest import DocumentAnalysisManifest, DOCUMENT_ANALYSIS_WORKERS
 
-def analyze_docx_files(documents_dir: str) -> List[Dict[str, Any]]:
-    """Анализирует DOCX файлы"""
-    analyzer = DocumentAnalyzer()
+def analyze_docx_files(documents_dir: str, full: bool = False,
+                       workers: int = DOCUMENT_ANALYSIS_WORKERS) -> List[Dict[str, Any]]:
+    """
+    Анализирует DOCX файлы
+    Заново разбираются только новые и измененные файлы (манифест анализа),
+    разбор выполняется параллельно в нескольких процессах
+    """
     results = []
     
     print("📄 Анализируем DOCX файлы...")
     
+    file_paths = []
     for root, dirs, files in os.walk(documents_dir):
-        for filename in files:
+        for filename in sorted(files):
             if filename.endswith(('.docx', '.doc')):
-                file_path = os.path.join(root, filename)
-                print(f"  🔍 {filename}")
-                
-                analysis = analyzer.analyze_document_structure(file_path)
-                if analysis:
-                    # Добавляем информацию о типе документа
-                    analysis['document_type'] = determine_document_type(filename, root)
-                    analysis['file_path'] = file_path
-                    results.append(analysis)
+                file_paths.append(os.path.join(root, filename))
+    
+    analyses, _ = DocumentAnalysisManifest().analyze(file_paths, analyze_file, workers, full)
+    
+    for file_path, analysis in zip(file_paths, analyses):
+        if analysis:
+            # Добавляем информацию о типе документа
+            analysis = dict(analysis)
+            analysis['document_type'] = determine_document_type(os.path.basename(file_path),
+                                                                os.path.dirname(file_path))
+            analysis['file_path'] = file_path
+            results.append(analysis)
     
     return results
 
@@ -129,6 +139,12 @@ def print_analysis_summary(results: List[Dict[str, Any]]):
             print(f"    - Заголовки: {len(structure.get('headings', []))}")
 
 def main():
+    parser = argparse.ArgumentParser(description='Анализ документов для обучения AI')
+    parser.add_argument('--full', action='store_true', help='Проанализировать все документы заново')
+    parser.add_argument('--workers', type=int, default=DOCUMENT_ANALYSIS_WORKERS,
+                        help='Число процессов для разбора документов')
+    args = parser.parse_args()
+    
     print("🚀 ЗАПУСК ПОЛНОГО АНАЛИЗА ДОКУМЕНТОВ ДЛЯ ОБУЧЕНИЯ AI")
     print("=" * 60)
     
@@ -142,7 +158,7 @@ def main():
     all_results = []
     
     # Анализируем DOCX файлы
-    docx_results = analyze_docx_files(documents_dir)
+    docx_results = analyze_docx_files(documents_dir, args.full, args.workers)
     all_results.extend(docx_results)
     
     # Анализируем PDF файлы
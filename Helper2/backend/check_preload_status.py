@@ -10,7 +10,7 @@ def check_status():
     """Проверяет статус загрузки"""
     try:
         # Пробуем импортировать и проверить, загружена ли модель
-        from pdf_ai_processor import _processor_instance, PADDLEOCR_AVAILABLE
+        from pdf_ai_processor import _processor_pool, PADDLEOCR_AVAILABLE
         
         print("=" * 60)
         print("  СТАТУС PADDLEOCR-VL")
@@ -23,7 +23,7 @@ def check_status():
         
         print("✅ Библиотека установлена")
         
-        if _processor_instance is not None:
+        if _processor_pool is not None and _processor_pool.loaded:
             print("✅ Модель загружена и готова к использованию!")
             print("")
             print("🎉 Можно использовать API для быстрой обработки PDF")
@@ -0,0 +1,103 @@
+"""
+Уведомления агентов о новых командах
+Агент держит long-poll запрос к /api/commands/wait и получает id новых команд
+сразу после их создания, вместо опроса базы каждые несколько секунд.
+"""
+
+import os
+import uuid
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Сколько последних событий хранить для догоняющих агентов
+COMMAND_NOTIFY_HISTORY = int(os.getenv('COMMAND_NOTIFY_HISTORY', '1000'))
+# Максимальное время удержания long-poll запроса (секунды)
+COMMAND_WAIT_MAX_TIMEOUT = float(os.getenv('COMMAND_WAIT_MAX_TIMEOUT', '30'))
+
+
+class CommandNotifier:
+    """
+    In-memory канал уведомлений о командах
+
+    Каждое событие получает возрастающий номер (seq). Агент передает номер
+    последнего увиденного события и ждет следующих. epoch меняется при
+    перезапуске сервера - в этом случае агент должен перечитать очередь целиком.
+    """
+
+    def __init__(self, history_size: int = COMMAND_NOTIFY_HISTORY):
+        self.epoch = uuid.uuid4().hex
+        self._seq = 0
+        self._events = deque(maxlen=history_size)  # (seq, command_id)
+        self._condition: Optional[asyncio.Condition] = None
+
+    def _get_condition(self) -> asyncio.Condition:
+        # Создаем лениво, внутри работающего event loop
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def publish(self, command_id: str):
+        """Сообщить ожидающим агентам о новой (или возвращенной в очередь) команде"""
+        condition = self._get_condition()
+        async with condition:
+            self._seq += 1
+            self._events.append((self._seq, command_id))
+            condition.notify_all()
+        logger.info(f"Agents notified about command {command_id} (seq={self._seq})")
+
+    def _snapshot(self, since: int) -> Dict[str, Any]:
+        """События после since (reset=True, если часть событий уже вытеснена из истории)"""
+        commands = [command_id for seq, command_id in self._events if seq > since]
+        oldest = self._events[0][0] if self._events else self._seq + 1
+        return {
+            'epoch': self.epoch,
+            'seq': self._seq,
+            'commands': commands,
+            'reset': oldest > since + 1 and self._seq > since
+        }
+
+    async def wait(self, since: Optional[int], epoch: Optional[str], timeout: float) -> Dict[str, Any]:
+        """
+        Дождаться событий после since
+
+        Args:
+            since: Номер последнего события, которое видел агент (None - первое подключение)
+            epoch: epoch сервера, полученный агентом ранее
+            timeout: Сколько ждать новых событий (секунды)
+
+        Returns:
+            {'epoch', 'seq', 'commands': [id...], 'reset': bool}
+        """
+        # Первое подключение или перезапуск сервера - агент перечитывает очередь
+        if since is None or epoch != self.epoch or since > self._seq:
+            return {'epoch': self.epoch, 'seq': self._seq, 'commands': [], 'reset': True}
+
+        timeout = max(0.0, min(timeout, COMMAND_WAIT_MAX_TIMEOUT))
+        condition = self._get_condition()
+        async with condition:
+            if self._seq <= since:
+                try:
+                    await asyncio.wait_for(condition.wait_for(lambda: self._seq > since), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            return self._snapshot(since)
+
+    def stats(self) -> Dict[str, Any]:
+        """Состояние канала"""
+        return {'epoch': self.epoch, 'seq': self._seq}
+
+
+# Глобальный экземпляр
+_notifier_instance: Optional[CommandNotifier] = None
+
+
+def get_command_notifier() -> CommandNotifier:
+    """Получить глобальный канал уведомлений о командах"""
+    global _notifier_instance
+    if _notifier_instance is None:
+        _notifier_instance = CommandNotifier()
+    return _notifier_instance
@@ -0,0 +1,163 @@
+"""
+Индексированное in-memory хранилище команд для simple_main.py
+Поиск по ID за O(1), очередь pending по дате создания, счетчики статусов
+и ограничение хранения завершенных команд
+"""
+
+import os
+import bisect
+import threading
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Any, List, Optional, Iterator
+
+logger = logging.getLogger(__name__)
+
+# Статусы, после которых команда считается завершенной
+FINISHED_STATUSES = {"done", "failed"}
+
+# Настройки хранения завершенных команд (можно переопределить в .env)
+DEFAULT_MAX_FINISHED = int(os.getenv('COMMANDS_MAX_FINISHED', '10000'))
+DEFAULT_FINISHED_TTL_HOURS = float(os.getenv('COMMANDS_FINISHED_TTL_HOURS', '24'))
+
+
+class CommandStore:
+    """
+    Хранилище команд с индексами
+
+    Команды хранятся как обычные словари (тот же формат, что и раньше в commands_storage).
+    Статус нужно менять только через set_status(), чтобы индексы оставались согласованными.
+    """
+
+    def __init__(self, max_finished: int = DEFAULT_MAX_FINISHED,
+                 finished_ttl_hours: float = DEFAULT_FINISHED_TTL_HOURS):
+        """
+        Args:
+            max_finished: Максимум завершенных команд в памяти (0 - без ограничения)
+            finished_ttl_hours: Сколько часов хранить завершенные команды (0 - без ограничения)
+        """
+        self.max_finished = max_finished
+        self.finished_ttl = timedelta(hours=finished_ttl_hours) if finished_ttl_hours > 0 else None
+
+        # id -> команда (порядок вставки совпадает с порядком создания)
+        self._commands: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Отсортированный список (created_at, id) для pending команд
+        self._pending: List[tuple] = []
+        # id завершенных команд в порядке завершения (для вытеснения)
+        self._finished: "OrderedDict[str, datetime]" = OrderedDict()
+        # Счетчики по статусам
+        self._status_counts: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    def __contains__(self, command_id: str) -> bool:
+        return command_id in self._commands
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        with self._lock:
+            return iter(list(self._commands.values()))
+
+    def add(self, command: Dict[str, Any]) -> Dict[str, Any]:
+        """Добавить новую команду"""
+        with self._lock:
+            command_id = command['id']
+            if command_id in self._commands:
+                raise ValueError(f"Команда уже существует: {command_id}")
+
+            self._commands[command_id] = command
+            self._index_status(command, command['status'])
+            self.evict_finished()
+            return command
+
+    def get(self, command_id: str) -> Optional[Dict[str, Any]]:
+        """Получить команду по ID"""
+        return self._commands.get(command_id)
+
+    def set_status(self, command: Dict[str, Any], status: str) -> Dict[str, Any]:
+        """
+        Изменить статус команды с обновлением индексов
+
+        Args:
+            command: Команда, полученная из хранилища
+            status: Новый статус
+        """
+        with self._lock:
+            old_status = command['status']
+            if old_status == status:
+                return command
+
+            self._unindex_status(command, old_status)
+            command['status'] = status
+            self._index_status(command, status)
+
+            if status in FINISHED_STATUSES:
+                self.evict_finished()
+            return command
+
+    def pending(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Pending команды в порядке создания (старые сначала)"""
+        with self._lock:
+            return [self._commands[command_id] for _, command_id in self._pending[:max(limit, 0)]]
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Последние команды (новые сначала)"""
+        result = []
+        with self._lock:
+            for command_id in reversed(self._commands):
+                if len(result) >= limit:
+                    break
+                result.append(self._commands[command_id])
+        return result
+
+    def status_counts(self) -> Dict[str, int]:
+        """Количество команд по статусам"""
+        with self._lock:
+            return {status: count for status, count in self._status_counts.items() if count}
+
+    def evict_finished(self, now: Optional[datetime] = None) -> int:
+        """
+        Удалить завершенные команды сверх лимита и старше TTL
+
+        Returns:
+            Количество удаленных команд
+        """
+        now = now or datetime.now(timezone.utc)
+        evicted = 0
+        with self._lock:
+            while self._finished:
+                command_id, finished_at = next(iter(self._finished.items()))
+                over_limit = self.max_finished and len(self._finished) > self.max_finished
+                expired = self.finished_ttl is not None and now - finished_at > self.finished_ttl
+                if not (over_limit or expired):
+                    break
+
+                command = self._commands.pop(command_id)
+                self._finished.pop(command_id)
+                self._status_counts[command['status']] -= 1
+                evicted += 1
+
+        if evicted:
+            logger.info(f"Evicted {evicted} finished commands from memory")
+        return evicted
+
+    def _index_status(self, command: Dict[str, Any], status: str):
+        """Добавить команду в индексы для статуса"""
+        self._status_counts[status] = self._status_counts.get(status, 0) + 1
+        if status == 'pending':
+            bisect.insort(self._pending, (command['created_at'], command['id']))
+        elif status in FINISHED_STATUSES:
+            self._finished[command['id']] = datetime.now(timezone.utc)
+
+    def _unindex_status(self, command: Dict[str, Any], status: str):
+        """Убрать команду из индексов для статуса"""
+        self._status_counts[status] -= 1
+        if status == 'pending':
+            key = (command['created_at'], command['id'])
+            index = bisect.bisect_left(self._pending, key)
+            if index < len(self._pending) and self._pending[index] == key:
+                del self._pending[index]
+        elif status in FINISHED_STATUSES:
+            self._finished.pop(command['id'], None)
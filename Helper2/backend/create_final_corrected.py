@@ -3,24 +3,29 @@
 Создание финального исправленного письма без рамок и с правильным выравниванием
 """
 
-from precise_letter_generator import PreciseLetterGenerator
+from learning_document_generator import LearningDocumentGenerator
 
 def create_final_corrected():
     """Создает финальное исправленное письмо"""
     print("📧 Создание финального исправленного письма...")
     
-    generator = PreciseLetterGenerator()
+    generator = LearningDocumentGenerator(
+        documents_dir="../existing_documents",
+        supabase_url=None,
+        supabase_key=None
+    )
     
     # Данные для финального письма
-    apartment_id = "2001"
-    issue_type = "техническая проблема с вентиляцией"
-    issue_description = "обнаружены несоответствия в системе вентиляции квартиры 2001, требующие дополнительной проверки и корректировки"
+    document_data = {
+        'apartment_id': '2001',
+        'issue_type': 'техническая проблема с вентиляцией',
+        'issue_description': 'обнаружены несоответствия в системе вентиляции квартиры 2001, требующие дополнительной проверки и корректировки'
+    }
     
     try:
-        result = generator.create_precise_letter(
-            apartment_id=apartment_id,
-            issue_type=issue_type,
-            issue_description=issue_description
+        result = generator.generate_learning_based_document(
+            template_type='letter',
+            command_data=document_data
         )
         
         if result:
@@ -3,24 +3,29 @@
 Создание финального письма с логотипом для демонстрации
 """
 
-from letter_generator_with_logo import LetterGeneratorWithLogo
+from learning_document_generator import LearningDocumentGenerator
 
 def create_final_demo_letter():
     """Создает финальное демонстрационное письмо"""
     print("📧 Создание финального демонстрационного письма...")
     
-    generator = LetterGeneratorWithLogo()
+    generator = LearningDocumentGenerator(
+        documents_dir="../existing_documents",
+        supabase_url=None,
+        supabase_key=None
+    )
     
     # Данные для финального письма
-    apartment_id = "1601"
-    issue_type = "смещение сроков монтажа"
-    issue_description = "задержка в монтаже оконных блоков в квартире 1601 из-за несоответствия размеров, что влияет на общие сроки сдачи объекта"
+    document_data = {
+        'apartment_id': '1601',
+        'issue_type': 'смещение сроков монтажа',
+        'issue_description': 'задержка в монтаже оконных блоков в квартире 1601 из-за несоответствия размеров, что влияет на общие сроки сдачи объекта'
+    }
     
     try:
-        result = generator.create_letter_with_logo(
-            apartment_id=apartment_id,
-            issue_type=issue_type,
-            issue_description=issue_description
+        result = generator.generate_learning_based_document(
+            template_type='letter',
+            command_data=document_data
         )
         
         if result:
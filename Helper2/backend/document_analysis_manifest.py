@@ -0,0 +1,167 @@
+"""
+Манифест анализа документов
+Для каждого файла хранятся размер, время изменения, SHA-256 и результат
+DocumentAnalyzer.analyze_document_structure. При повторном запуске заново
+разбираются только измененные и новые файлы (параллельно, в пуле процессов),
+остальные берутся из манифеста - для неизмененного архива это только stat().
+Переименованный или перемещенный файл находится по хэшу и тоже не разбирается.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Tuple, Callable, Union
+
+logger = logging.getLogger(__name__)
+
+# Файл манифеста и число процессов (можно переопределить в .env)
+DOCUMENT_ANALYSIS_MANIFEST = Path(os.getenv(
+    'DOCUMENT_ANALYSIS_MANIFEST',
+    str(Path(__file__).parent / 'cache' / 'document_analysis' / 'manifest.json')
+))
+DOCUMENT_ANALYSIS_WORKERS = max(1, int(os.getenv('DOCUMENT_ANALYSIS_WORKERS', str(os.cpu_count() or 1))))
+
+# Версия анализатора: при изменении логики анализа увеличить, чтобы манифест пересобрался
+ANALYZER_VERSION = 1
+
+# Размер блока при вычислении хэша
+_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(file_path: Union[str, Path]) -> str:
+    """SHA-256 содержимого файла (читается блоками)"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DocumentAnalysisManifest:
+    """Манифест {путь: размер, время изменения, хэш, анализ, загружен ли в Supabase}"""
+
+    def __init__(self, manifest_path: Union[str, Path] = DOCUMENT_ANALYSIS_MANIFEST):
+        """
+        Args:
+            manifest_path: JSON файл манифеста
+        """
+        self.manifest_path = Path(manifest_path)
+        self.files: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Поврежденный манифест анализа {self.manifest_path}: {e}")
+            return {}
+
+        if data.get('version') != ANALYZER_VERSION:
+            print("🔄 Версия анализатора изменилась - документы будут проанализированы заново")
+            return {}
+        return data.get('files', {})
+
+    def save(self):
+        """Сохранить манифест (атомарно)"""
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.manifest_path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': ANALYZER_VERSION, 'files': self.files}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.manifest_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def analyze(self, file_paths: List[str], analyze_file: Callable[[str], Dict[str, Any]],
+                workers: int = DOCUMENT_ANALYSIS_WORKERS, full: bool = False) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        Анализ файлов с повторным использованием манифеста
+
+        Args:
+            file_paths: Пути к документам
+            analyze_file: Функция анализа одного файла (модульная - передается в процессы)
+            workers: Число процессов для разбора измененных файлов
+            full: Проанализировать все файлы заново
+
+        Returns:
+            (анализы в порядке file_paths - пустой словарь, если файл разобрать не удалось;
+             пути файлов, проанализированных заново)
+        """
+        previous = self.files
+        by_hash = {entry['sha256']: entry for entry in previous.values()}
+        files: Dict[str, Dict[str, Any]] = {}
+        pending: List[Tuple[str, Dict[str, Any]]] = []
+        moved = 0
+
+        for file_path in file_paths:
+            key = os.path.abspath(file_path)
+            stat = os.stat(key)
+            entry = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+            cached = None if full else previous.get(key)
+
+            if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+                files[key] = cached
+                continue
+
+            entry['sha256'] = file_sha256(key)
+            same_content = None if full else (cached if cached and cached['sha256'] == entry['sha256']
+                                              else by_hash.get(entry['sha256']))
+            if same_content:
+                # Содержимое не изменилось (файл перезаписан или перемещен)
+                if same_content is not cached:
+                    moved += 1
+                entry['analysis'] = dict(same_content['analysis'])
+                if entry['analysis']:
+                    entry['analysis']['file_name'] = os.path.basename(key)
+                entry['uploaded'] = same_content.get('uploaded', False) and same_content is cached
+                files[key] = entry
+            else:
+                pending.append((key, entry))
+
+        if pending:
+            print(f"🔍 Анализ {len(pending)} новых/измененных документов из {len(file_paths)} "
+                  f"(процессов: {min(workers, len(pending))})")
+            keys = [key for key, _ in pending]
+            if workers > 1 and len(pending) > 1:
+                with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+                    analyses = list(executor.map(analyze_file, keys, chunksize=4))
+            else:
+                analyses = [analyze_file(key) for key in keys]
+
+            for (key, entry), analysis in zip(pending, analyses):
+                entry['analysis'] = analysis or {}
+                entry['uploaded'] = False
+                files[key] = entry
+
+        unchanged = len(file_paths) - len(pending) - moved
+        print(f"⚡ Из манифеста: {unchanged} без изменений, {moved} перемещенных")
+
+        # Файлы из других папок остаются в манифесте, удаленные - выпадают
+        for key, entry in previous.items():
+            if key not in files and os.path.exists(key):
+                files[key] = entry
+        self.files = files
+        self.save()
+
+        results = [files[os.path.abspath(file_path)]['analysis'] for file_path in file_paths]
+        return results, [key for key, _ in pending]
+
+    def pending_upload(self) -> List[str]:
+        """Пути успешно проанализированных файлов, которые еще не загружены в Supabase"""
+        return [key for key, entry in self.files.items() if entry['analysis'] and not entry.get('uploaded')]
+
+    def mark_uploaded(self, file_paths: List[str]):
+        """Отметить файлы как загруженные в Supabase"""
+        for file_path in file_paths:
+            entry = self.files.get(os.path.abspath(file_path))
+            if entry:
+                entry['uploaded'] = True
+        self.save()
@@ -10,6 +10,17 @@ from docx.text.paragraph import Paragraph
 import requests
 import re
 
+from document_analysis_manifest import DocumentAnalysisManifest, DOCUMENT_ANALYSIS_WORKERS
+
+# Сколько записей отправляется в Supabase одним запросом
+SUPABASE_UPLOAD_BATCH = int(os.getenv('SUPABASE_UPLOAD_BATCH', '100'))
+
+
+def analyze_file(file_path: str) -> Dict[str, Any]:
+    """Анализ одного документа (для пула процессов)"""
+    return DocumentAnalyzer().analyze_document_structure(file_path)
+
+
 class DocumentAnalyzer:
     def __init__(self, supabase_url: str = None, supabase_key: str = None):
         self.supabase_url = supabase_url
@@ -306,6 +317,34 @@ class DocumentAnalyzer:
         else:
             return 'unknown'
     
+    def _build_example_record(self, analysis: Dict[str, Any], template_type: str = None) -> Dict[str, Any]:
+        """Запись document_examples для анализа документа"""
+        # Определяем тип документа если не указан
+        if not template_type:
+            template_type = self.determine_document_type(analysis)
+        
+        return {
+            'example_name': analysis['file_name'],
+            'example_type': template_type,
+            'file_name': analysis['file_name'],
+            'file_size': analysis['file_size'],
+            'document_data': analysis,
+            'quality_score': self._assess_document_quality(analysis),
+            'is_approved': True,
+            'metadata': {
+                'analysis_date': analysis['analysis_date'],
+                'auto_analyzed': True
+            }
+        }
+    
+    def _supabase_headers(self) -> Dict[str, str]:
+        return {
+            'apikey': self.supabase_key,
+            'Authorization': f'Bearer {self.supabase_key}',
+            'Content-Type': 'application/json',
+            'Prefer': 'return=minimal'
+        }
+    
     def upload_analysis_to_supabase(self, analysis: Dict[str, Any], file_path: str, template_type: str = None) -> bool:
         """Загружает анализ документа в Supabase"""
         if not self.supabase_url or not self.supabase_key:
@@ -313,35 +352,10 @@ class DocumentAnalyzer:
             return False
         
         try:
-            # Определяем тип документа если не указан
-            if not template_type:
-                template_type = self.determine_document_type(analysis)
-            
-            # Создаем запись в document_examples
-            example_data = {
-                'example_name': analysis['file_name'],
-                'example_type': template_type,
-                'file_name': analysis['file_name'],
-                'file_size': analysis['file_size'],
-                'document_data': analysis,
-                'quality_score': self._assess_document_quality(analysis),
-                'is_approved': True,
-                'metadata': {
-                    'analysis_date': analysis['analysis_date'],
-                    'auto_analyzed': True
-                }
-            }
-            
             # Отправляем в Supabase
             url = f"{self.supabase_url}/rest/v1/document_examples"
-            headers = {
-                'apikey': self.supabase_key,
-                'Authorization': f'Bearer {self.supabase_key}',
-                'Content-Type': 'application/json',
-                'Prefer': 'return=minimal'
-            }
-            
-            response = requests.post(url, headers=headers, json=example_data)
+            response = requests.post(url, headers=self._supabase_headers(),
+                                     json=self._build_example_record(analysis, template_type))
             response.raise_for_status()
             
             print(f"Анализ документа {analysis['file_name']} загружен в Supabase")
@@ -351,6 +365,34 @@ class DocumentAnalyzer:
             print(f"Ошибка загрузки анализа в Supabase: {e}")
             return False
     
+    def upload_analyses_to_supabase(self, analyses: List[Dict[str, Any]],
+                                    batch_size: int = SUPABASE_UPLOAD_BATCH) -> int:
+        """
+        Загружает анализы в Supabase пакетами (одна вставка массива на batch_size записей)
+        
+        Returns:
+            Количество загруженных анализов (с начала списка, до первой ошибки)
+        """
+        if not self.supabase_url or not self.supabase_key:
+            print("Supabase не настроен")
+            return 0
+        
+        url = f"{self.supabase_url}/rest/v1/document_examples"
+        uploaded = 0
+        with requests.Session() as session:
+            for start in range(0, len(analyses), batch_size):
+                records = [self._build_example_record(analysis) for analysis in analyses[start:start + batch_size]]
+                try:
+                    response = session.post(url, headers=self._supabase_headers(), json=records)
+                    response.raise_for_status()
+                except Exception as e:
+                    print(f"Ошибка загрузки анализов в Supabase: {e}")
+                    break
+                uploaded += len(records)
+        
+        print(f"Загружено в Supabase: {uploaded} из {len(analyses)} анализов")
+        return uploaded
+    
     def _assess_document_quality(self, analysis: Dict[str, Any]) -> int:
         """Оценивает качество документа (1-5)"""
         score = 3  # Базовая оценка
@@ -376,25 +418,38 @@ class DocumentAnalyzer:
         # Ограничиваем максимальную оценку
         return min(score, 5)
     
-    def batch_analyze_documents(self, documents_dir: str) -> List[Dict[str, Any]]:
-        """Анализирует все документы в папке"""
+    def batch_analyze_documents(self, documents_dir: str, full: bool = False,
+                                workers: int = DOCUMENT_ANALYSIS_WORKERS) -> List[Dict[str, Any]]:
+        """
+        Анализирует все документы в папке
+        
+        Заново разбираются только новые и измененные файлы (см. DocumentAnalysisManifest),
+        анализы, которые еще не загружены в Supabase, отправляются пакетами в конце.
+        
+        Args:
+            documents_dir: Папка с документами
+            full: Проанализировать все документы заново
+            workers: Число процессов для разбора документов
+        """
         results = []
         
         if not os.path.exists(documents_dir):
             print(f"Папка {documents_dir} не существует")
             return results
         
-        for filename in os.listdir(documents_dir):
-            if filename.endswith(('.docx', '.doc')):
-                file_path = os.path.join(documents_dir, filename)
-                print(f"Анализируем {filename}...")
-                
-                analysis = self.analyze_document_structure(file_path)
-                if analysis:
-                    results.append(analysis)
-                    
-                    # Загружаем в Supabase
-                    self.upload_analysis_to_supabase(analysis, file_path)
+        file_paths = [os.path.join(documents_dir, filename) for filename in sorted(os.listdir(documents_dir))
+                      if filename.endswith(('.docx', '.doc'))]
+        
+        manifest = DocumentAnalysisManifest()
+        analyses, _ = manifest.analyze(file_paths, analyze_file, workers, full)
+        results = [analysis for analysis in analyses if analysis]
+        
+        # Загружаем в Supabase (в том числе то, что не удалось загрузить в прошлый раз)
+        if self.supabase_url and self.supabase_key:
+            not_uploaded = set(manifest.pending_upload())
+            pending = [path for path in map(os.path.abspath, file_paths) if path in not_uploaded]
+            if pending:
+                uploaded = self.upload_analyses_to_supabase([manifest.files[path]['analysis'] for path in pending])
+                manifest.mark_uploaded(pending[:uploaded])
         
         return results
-
@@ -0,0 +1,111 @@
+"""
+Счетчик исходящих номеров документов
+Номер вида ДД/ММ-N выдается атомарным инкрементом в sqlite: за константное
+время и без повторов при одновременной генерации (в том числе из разных
+процессов - sqlite блокирует файл базы на время транзакции).
+"""
+
+import os
+import sqlite3
+import logging
+import threading
+from datetime import date, datetime
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Имя файла счетчика внутри директории документов
+DOCUMENT_COUNTER_FILENAME = '.document_numbers.sqlite3'
+# Сколько ждать блокировку базы другим процессом (секунды)
+DOCUMENT_COUNTER_LOCK_TIMEOUT = 30
+
+
+class DocumentCounter:
+    """Персистентный счетчик номеров документов по сериям и дням"""
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path: Путь к файлу sqlite
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS document_numbers ("
+                " series TEXT NOT NULL,"
+                " day TEXT NOT NULL,"
+                " value INTEGER NOT NULL,"
+                " PRIMARY KEY (series, day))"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # Соединение на вызов: безопасно для потоков, транзакции управляются вручную
+        return sqlite3.connect(self.db_path, timeout=DOCUMENT_COUNTER_LOCK_TIMEOUT, isolation_level=None)
+
+    def next_number(self, series: str = 'letter', day: Optional[date] = None,
+                    seed: Optional[Callable[[], int]] = None) -> int:
+        """
+        Получить следующий номер за день
+
+        Args:
+            series: Серия номеров (letter, act, ...)
+            day: День (по умолчанию сегодня)
+            seed: Сколько номеров уже выдано до появления счетчика - вызывается
+                один раз, если для серии еще нет ни одной записи
+
+        Returns:
+            Порядковый номер документа за день, начиная с 1
+        """
+        day_key = (day or date.today()).isoformat()
+        connection = self._connect()
+        try:
+            # BEGIN IMMEDIATE сразу берет блокировку на запись: чтение и
+            # инкремент выполняются без гонок между потоками и процессами
+            connection.execute("BEGIN IMMEDIATE")
+
+            initial = 0
+            if seed is not None:
+                exists = connection.execute(
+                    "SELECT 1 FROM document_numbers WHERE series = ? LIMIT 1", (series,)
+                ).fetchone()
+                if exists is None:
+                    initial = max(0, int(seed()))
+
+            connection.execute(
+                "INSERT INTO document_numbers (series, day, value) VALUES (?, ?, ?) "
+                "ON CONFLICT(series, day) DO UPDATE SET value = value + 1",
+                (series, day_key, initial + 1)
+            )
+            value = connection.execute(
+                "SELECT value FROM document_numbers WHERE series = ? AND day = ?", (series, day_key)
+            ).fetchone()[0]
+            connection.execute("COMMIT")
+            return value
+        except Exception:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
+
+    def next_document_number(self, series: str = 'letter', when: Optional[datetime] = None,
+                             seed: Optional[Callable[[], int]] = None) -> str:
+        """Следующий номер в формате ДД/ММ-N"""
+        when = when or datetime.now()
+        number = self.next_number(series, when.date(), seed)
+        return f"{when.strftime('%d/%m')}-{number}"
+
+
+# Счетчики по директориям документов
+_counters: Dict[str, DocumentCounter] = {}
+_counters_lock = threading.Lock()
+
+
+def get_document_counter(documents_dir: str = "documents") -> DocumentCounter:
+    """Получить счетчик номеров для директории документов"""
+    db_path = os.path.abspath(os.path.join(documents_dir, DOCUMENT_COUNTER_FILENAME))
+    with _counters_lock:
+        if db_path not in _counters:
+            _counters[db_path] = DocumentCounter(db_path)
+        return _counters[db_path]
@@ -0,0 +1,95 @@
+"""
+Пул потоков для генерации документов
+Генераторы (python-docx, скачивание шаблонов и данных) работают синхронно,
+поэтому выполняются вне event loop с ограничением параллельности и длины очереди
+"""
+
+import os
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Настройки пула (можно переопределить в .env)
+DOCUMENT_WORKERS = max(1, int(os.getenv('DOCUMENT_WORKERS', '4')))
+DOCUMENT_QUEUE_SIZE = max(1, int(os.getenv('DOCUMENT_QUEUE_SIZE', '100')))
+
+
+class DocumentWorkerPool:
+    """
+    Ограниченный пул для блокирующей генерации документов
+
+    Место в очереди резервируется при приеме команды (reserve) и освобождается
+    после ее обработки (release). Если очередь заполнена, новая команда
+    отклоняется сразу, а не копится в памяти.
+    """
+
+    def __init__(self, max_workers: int = DOCUMENT_WORKERS, max_queue: int = DOCUMENT_QUEUE_SIZE):
+        """
+        Args:
+            max_workers: Сколько документов генерируется одновременно
+            max_queue: Максимум команд в очереди (включая выполняющиеся)
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='doc-gen')
+        self._reserved = 0
+        self._running = 0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> bool:
+        """Зарезервировать место в очереди (False - очередь заполнена)"""
+        with self._lock:
+            if self._reserved >= self.max_queue:
+                return False
+            self._reserved += 1
+            return True
+
+    def release(self):
+        """Освободить место в очереди после обработки команды"""
+        with self._lock:
+            self._reserved = max(0, self._reserved - 1)
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Выполнить блокирующую функцию в пуле, не блокируя event loop"""
+        loop = asyncio.get_running_loop()
+
+        def task():
+            with self._lock:
+                self._running += 1
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+        return await loop.run_in_executor(self._executor, task)
+
+    def stats(self) -> Dict[str, int]:
+        """Состояние пула"""
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'running': self._running,
+                'queued': max(0, self._reserved - self._running),
+                'max_queue': self.max_queue
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Остановить пул"""
+        self._executor.shutdown(wait=wait)
+
+
+# Глобальный пул
+_pool_instance: Optional[DocumentWorkerPool] = None
+
+
+def get_document_worker_pool() -> DocumentWorkerPool:
+    """Получить глобальный пул генерации документов"""
+    global _pool_instance
+    if _pool_instance is None:
+        _pool_instance = DocumentWorkerPool()
+    return _pool_instance
@@ -0,0 +1,137 @@
+"""
+Извлечение характеристик изображения для эвристик типа дефекта
+Фото с телефона (12+ Мп) один раз уменьшается до рабочего разрешения - для JPEG
+уже при декодировании - после чего все признаки считаются за один проход
+по общим промежуточным данным (оттенки серого, градиенты).
+"""
+
+import os
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import cv2
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Рабочее разрешение (длинная сторона) и число потоков для батча (можно переопределить в .env)
+FEATURE_WORKING_SIZE = int(os.getenv('FEATURE_WORKING_SIZE', '512'))
+FEATURE_WORKERS = max(1, int(os.getenv('FEATURE_WORKERS', str(min(8, os.cpu_count() or 1)))))
+
+# Декодирование JPEG сразу в 1/2, 1/4, 1/8 разрешения
+_REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+def _decode_flag(image_bytes: bytes, working_size: int) -> int:
+    """Флаг декодирования: максимальное уменьшение, при котором длинная сторона >= working_size"""
+    try:
+        # Читается только заголовок, пиксели не декодируются
+        width, height = Image.open(io.BytesIO(image_bytes)).size
+    except Exception:
+        return cv2.IMREAD_COLOR
+    longest = max(width, height)
+    for factor, flag in _REDUCED_DECODE_FLAGS:
+        if longest // factor >= working_size:
+            return flag
+    return cv2.IMREAD_COLOR
+
+
+def decode_working_image(image_bytes: bytes, working_size: int = FEATURE_WORKING_SIZE) -> Optional[np.ndarray]:
+    """
+    Декодировать изображение (BGR) в рабочем разрешении
+
+    Returns:
+        Изображение с длинной стороной не больше working_size или None
+    """
+    nparr = np.frombuffer(image_bytes, np.uint8)
+    img = cv2.imdecode(nparr, _decode_flag(image_bytes, working_size))
+    if img is None:
+        return None
+
+    height, width = img.shape[:2]
+    scale = working_size / max(height, width)
+    if scale < 1.0:
+        img = cv2.resize(img, (max(1, round(width * scale)), max(1, round(height * scale))),
+                         interpolation=cv2.INTER_AREA)
+    return img
+
+
+def compute_features(img: np.ndarray) -> Dict[str, float]:
+    """Все характеристики изображения BGR за один проход"""
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    gray_f = gray.astype(np.float32)
+    pixels = gray.size
+
+    # Яркость и контраст
+    mean, std = cv2.meanStdDev(gray)
+
+    # Градиенты (для трещин и повреждений)
+    grad_x = cv2.Sobel(gray_f, cv2.CV_32F, 1, 0, ksize=3)
+    grad_y = cv2.Sobel(gray_f, cv2.CV_32F, 0, 1, ksize=3)
+    gradient_magnitude = cv2.magnitude(grad_x, grad_y)
+
+    # Средние по каналам (одним вызовом, порядок BGR)
+    blue_mean, green_mean, red_mean, _ = cv2.mean(img)
+
+    # Плотность краев
+    edges = cv2.Canny(gray, 50, 150)
+
+    # Текстура: локальное стандартное отклонение в окне 5x5 (E[x^2] - E[x]^2)
+    squared = gray_f * gray_f
+    local_mean = cv2.blur(gray_f, (5, 5))
+    local_variance = np.maximum(cv2.blur(squared, (5, 5)) - local_mean * local_mean, 0)
+
+    # Энтропия по гистограмме
+    hist = np.bincount(gray.ravel(), minlength=256) / pixels
+    nonzero = hist[hist > 0]
+
+    return {
+        'contrast': float(std[0][0]),
+        'brightness': float(mean[0][0]),
+        'gradient_magnitude': float(cv2.mean(gradient_magnitude)[0]),
+        'red_mean': float(red_mean),
+        'green_mean': float(green_mean),
+        'blue_mean': float(blue_mean),
+        'edge_density': cv2.countNonZero(edges) / pixels,
+        'texture_variance': float(cv2.mean(cv2.sqrt(local_variance))[0]),
+        'uniformity': float(cv2.mean(squared)[0]) / (255.0 ** 2),
+        'entropy': float(-np.sum(nonzero * np.log2(nonzero))),
+    }
+
+
+def extract_features(image_bytes: bytes, working_size: int = FEATURE_WORKING_SIZE) -> Optional[Dict[str, float]]:
+    """
+    Характеристики одного изображения
+
+    Returns:
+        Словарь характеристик или None, если изображение не читается
+    """
+    try:
+        img = decode_working_image(image_bytes, working_size)
+        if img is None:
+            return None
+        return compute_features(img)
+    except Exception as e:
+        logger.error(f"Ошибка анализа изображения: {e}")
+        return None
+
+
+def extract_features_batch(images: Sequence[bytes], working_size: int = FEATURE_WORKING_SIZE,
+                           workers: int = FEATURE_WORKERS) -> List[Optional[Dict[str, float]]]:
+    """
+    Характеристики нескольких изображений (OpenCV отпускает GIL, потоки работают параллельно)
+
+    Returns:
+        Список в порядке входных изображений (None для нечитаемых)
+    """
+    if len(images) <= 1 or workers <= 1:
+        return [extract_features(image_bytes, working_size) for image_bytes in images]
+    with ThreadPoolExecutor(max_workers=min(workers, len(images))) as executor:
+        return list(executor.map(lambda image_bytes: extract_features(image_bytes, working_size), images))
@@ -0,0 +1,114 @@
+"""
+Микро-батчинг запросов к модели
+Одиночные запросы, пришедшие почти одновременно, объединяются в один батч
+в пределах короткого окна и обрабатываются одним вызовом модели.
+"""
+
+import os
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Максимальный размер батча и окно ожидания (можно переопределить в .env)
+INFERENCE_MAX_BATCH = max(1, int(os.getenv('INFERENCE_MAX_BATCH', '32')))
+INFERENCE_BATCH_WINDOW_MS = float(os.getenv('INFERENCE_BATCH_WINDOW_MS', '10'))
+
+
+def predict_in_batches(predict_fn: Callable[[np.ndarray], np.ndarray], inputs: np.ndarray,
+                       batch_size: int = INFERENCE_MAX_BATCH) -> np.ndarray:
+    """Прогнать массив входов через модель батчами фиксированного размера"""
+    outputs = [predict_fn(inputs[start:start + batch_size]) for start in range(0, len(inputs), batch_size)]
+    return np.concatenate(outputs, axis=0)
+
+
+class MicroBatcher:
+    """Объединяет одиночные запросы в батчи"""
+
+    def __init__(self, predict_fn: Callable[[np.ndarray], np.ndarray],
+                 max_batch_size: int = INFERENCE_MAX_BATCH,
+                 max_wait_ms: float = INFERENCE_BATCH_WINDOW_MS):
+        """
+        Args:
+            predict_fn: Функция батча (N, ...) -> (N, ...), вызывается в отдельном потоке
+            max_batch_size: Максимальный размер батча
+            max_wait_ms: Сколько ждать новые запросы после первого в батче
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # Модель вызывается из одного потока, батчи выполняются по очереди
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='inference')
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, item: np.ndarray) -> np.ndarray:
+        """
+        Обработать один вход (без батч-измерения)
+
+        Returns:
+            Выход модели для этого входа
+        """
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self):
+        """Собрать батч: первый запрос ждем без ограничений, остальные - в пределах окна"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            futures = [future for _, future in batch]
+            try:
+                inputs = np.stack([item for item, _ in batch])
+                outputs = await loop.run_in_executor(self._executor, self.predict_fn, inputs)
+                for future, output in zip(futures, outputs):
+                    if not future.done():
+                        future.set_result(output)
+            except Exception as e:
+                logger.error(f"Ошибка батча инференса ({len(batch)}): {e}")
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def close(self):
+        """Остановить обработчик"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self._executor.shutdown(wait=False)
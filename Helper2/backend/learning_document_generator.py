@@ -1,70 +1,38 @@
 import os
 import uuid
 import json
-import requests
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 from docx import Document
-from docx.shared import Inches, Pt
+from docx.shared import Inches
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.table import WD_TABLE_ALIGNMENT
 from docx.oxml.shared import OxmlElement, qn
 
+from supabase_data_loader import get_supabase_data_loader, request_scoped
+from document_counter import get_document_counter
+from letter_template import get_letter_template
+
 class LearningDocumentGenerator:
     def __init__(self, documents_dir: str = "documents", supabase_url: str = None, supabase_key: str = None):
         self.documents_dir = documents_dir
         self.supabase_url = supabase_url
         self.supabase_key = supabase_key
+        self.data_loader = get_supabase_data_loader(supabase_url, supabase_key)
+        self.document_counter = get_document_counter(documents_dir)
+        self.letter_template = get_letter_template()
         os.makedirs(documents_dir, exist_ok=True)
     
     def get_supabase_data(self, table: str, filters: Dict[str, Any] = None) -> List[Dict]:
-        """Получение данных из Supabase"""
-        if not self.supabase_url or not self.supabase_key:
-            return []
-        
-        try:
-            url = f"{self.supabase_url}/rest/v1/{table}"
-            headers = {
-                'apikey': self.supabase_key,
-                'Authorization': f'Bearer {self.supabase_key}',
-                'Content-Type': 'application/json'
-            }
-            
-            params = {}
-            if filters:
-                for key, value in filters.items():
-                    params[key] = f'eq.{value}'
-            
-            response = requests.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"Ошибка получения данных из Supabase: {e}")
-            return []
+        """Получение данных из Supabase (через общий загрузчик с кэшем запросов)"""
+        return self.data_loader.select(table, filters)
     
     def get_learning_examples(self, template_type: str, limit: int = 5) -> List[Dict]:
         """Получение примеров документов для обучения из простой таблицы"""
-        try:
-            url = f"{self.supabase_url}/rest/v1/document_templates"
-            headers = {
-                'apikey': self.supabase_key,
-                'Authorization': f'Bearer {self.supabase_key}',
-                'Content-Type': 'application/json'
-            }
-            
-            params = {
-                'type': f'eq.{template_type}',
-                'is_active': 'eq.true',
-                'limit': limit,
-                'order': 'created_at.desc'
-            }
-            
-            response = requests.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"Ошибка получения примеров для обучения: {e}")
-            return []
+        return self.data_loader.select('document_templates', {
+            'type': template_type,
+            'is_active': 'true'
+        }, params={'limit': limit, 'order': 'created_at.desc'})
     
     def get_document_generation_rules(self, template_type: str) -> List[Dict]:
         """Получение правил генерации документов"""
@@ -75,28 +43,8 @@ class LearningDocumentGenerator:
     
     def get_best_template(self, template_type: str, apartment_id: str = None) -> Optional[Dict]:
         """Получение лучшего шаблона для типа документа"""
-        try:
-            url = f"{self.supabase_url}/rest/v1/document_templates"
-            headers = {
-                'apikey': self.supabase_key,
-                'Authorization': f'Bearer {self.supabase_key}',
-                'Content-Type': 'application/json'
-            }
-            
-            params = {
-                'type': f'eq.{template_type}',
-                'is_active': 'eq.true',
-                'limit': 1,
-                'order': 'created_at.desc'
-            }
-            
-            response = requests.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            result = response.json()
-            return result[0] if result else None
-        except Exception as e:
-            print(f"Ошибка получения шаблона: {e}")
-            return None
+        result = self.get_learning_examples(template_type, limit=1)
+        return result[0] if result else None
     
     def analyze_examples_patterns(self, examples: List[Dict]) -> Dict[str, Any]:
         """Анализирует паттерны в примерах документов"""
@@ -152,6 +100,7 @@ class LearningDocumentGenerator:
         
         return patterns
     
+    @request_scoped
     def generate_learning_based_document(self, template_type: str, command_data: Dict[str, Any]) -> str:
         """Генерирует документ на основе изученных примеров"""
         # Получаем примеры для обучения
@@ -163,29 +112,34 @@ class LearningDocumentGenerator:
         # Анализируем паттерны в примерах
         patterns = self.analyze_examples_patterns(examples)
         
-        # Создаем документ на основе изученных паттернов
-        doc = Document()
-        
-        # Устанавливаем точные поля как в оригинальных документах
-        sections = doc.sections
-        for section in sections:
-            section.top_margin = Inches(0.5)      # 0.50 дюйма
-            section.bottom_margin = Inches(0.5)   # 0.50 дюйма
-            section.left_margin = Inches(0.5)     # 0.50 дюйма
-            section.right_margin = Inches(0.5)    # 0.50 дюйма
-        
-        # Применяем правила форматирования
-        self._apply_formatting_rules(doc, rules, patterns)
-        
-        # Генерируем содержимое на основе типа документа
-        if template_type == 'handover_act':
-            self._generate_handover_act_content(doc, command_data, patterns, rules)
-        elif template_type == 'defect_report':
-            self._generate_defect_report_content(doc, command_data, patterns, rules)
-        elif template_type == 'work_report':
-            self._generate_work_report_content(doc, command_data, patterns, rules)
-        elif template_type == 'letter':
-            self._generate_letter_content(doc, command_data, patterns, rules)
+        if template_type == 'letter':
+            # Письма заполняются в копии скомпилированного каркаса
+            doc = self._generate_letter_content(command_data)
+            
+            # Применяем правила форматирования к готовому письму
+            self._apply_formatting_rules(doc, rules, patterns)
+        else:
+            # Создаем документ на основе изученных паттернов
+            doc = Document()
+            
+            # Устанавливаем точные поля как в оригинальных документах
+            sections = doc.sections
+            for section in sections:
+                section.top_margin = Inches(0.5)      # 0.50 дюйма
+                section.bottom_margin = Inches(0.5)   # 0.50 дюйма
+                section.left_margin = Inches(0.5)     # 0.50 дюйма
+                section.right_margin = Inches(0.5)    # 0.50 дюйма
+            
+            # Применяем правила форматирования
+            self._apply_formatting_rules(doc, rules, patterns)
+            
+            # Генерируем содержимое на основе типа документа
+            if template_type == 'handover_act':
+                self._generate_handover_act_content(doc, command_data, patterns, rules)
+            elif template_type == 'defect_report':
+                self._generate_defect_report_content(doc, command_data, patterns, rules)
+            elif template_type == 'work_report':
+                self._generate_work_report_content(doc, command_data, patterns, rules)
         
         # Сохраняем документ
         filename = f"learning_{template_type}_{command_data.get('apartment_id', 'unknown')}_{uuid.uuid4().hex[:8]}.docx"
@@ -502,365 +456,55 @@ class LearningDocumentGenerator:
         doc.add_paragraph('Технадзор: _________________')
         doc.add_paragraph('Подрядчик: _________________')
     
-    def _generate_letter_content(self, doc: Document, command_data: Dict[str, Any], patterns: Dict[str, Any], rules: List[Dict]):
-        """Генерирует содержимое письма на основе изученных примеров"""
+    def _generate_letter_content(self, command_data: Dict[str, Any]) -> Document:
+        """Генерирует письмо: заполняет копию общего каркаса письма"""
         apartment_id = command_data.get('apartment_id', 'Unknown')
         issue_type = command_data.get('issue_type', 'технический вопрос')
         issue_description = command_data.get('issue_description', 'Описание отсутствует')
-        expected_resolution = command_data.get('expected_resolution', 'Решение в процессе')
         
-        # Генерируем номер документа с сегодняшней датой
-        from datetime import datetime
+        # Генерируем номер документа с сегодняшней датой: атомарный счетчик
+        # за день, общий для всех генераторов, работающих с этой папкой
         current_date = datetime.now()
-        day_month = current_date.strftime('%d/%m')
-        
-        # Подсчитываем количество документов за сегодня
-        today_str = current_date.strftime('%d.%m.%y')
-        today_docs = []
-        
-        # Ищем файлы, которые содержат сегодняшнюю дату в названии
-        for f in os.listdir(self.documents_dir):
-            if f.endswith('.docx') and today_str in f:
-                today_docs.append(f)
-        
-        # Также считаем файлы learning_letter, созданные сегодня
-        import time
-        today_timestamp = current_date.timestamp()
-        today_start = current_date.replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
-        
-        for f in os.listdir(self.documents_dir):
-            if f.startswith('learning_letter_') and f.endswith('.docx'):
-                file_path = os.path.join(self.documents_dir, f)
-                file_time = os.path.getmtime(file_path)
-                if today_start <= file_time <= today_timestamp:
-                    today_docs.append(f)
+        document_number = self.document_counter.next_document_number(
+            'letter', current_date, seed=lambda: self._count_today_documents(current_date)
+        )
         
-        # Считаем общее количество документов за сегодня
-        # Это будет базовый номер для следующего документа
-        doc_number = len(today_docs) + 1
-        
-        document_number = f"{day_month}-{doc_number}"
-        
-        # Отладочная информация
         print(f"🔢 Генерируем номер документа: {document_number}")
-        print(f"📅 Сегодняшняя дата: {current_date.strftime('%d.%m.%Y')}")
-        print(f"📁 Найдено файлов за сегодня: {len(today_docs)}")
-        print(f"🔍 Следующий номер: {doc_number}")
-        
-        # 1. ТАБЛИЦА С ЛОГОТИПОМ И АДРЕСОМ (как в оригинале)
-        self._add_logo_and_address_table(doc, document_number)
-        
-        # 2. ОБРАЩЕНИЕ (по центру, жирный шрифт как в оригинале)
-        greeting = doc.add_paragraph()
-        greeting_run = greeting.add_run("Уважаемый Иса Исаевич!")
-        greeting_run.bold = True
-        greeting_run.font.name = 'Times New Roman'
-        greeting_run.font.size = Pt(12)  # 177800 = 12pt
-        greeting.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        
-        # Добавляем пустую строку
-        doc.add_paragraph()
-        
-        # 3. ОСНОВНОЙ ТЕКСТ (с точными отступами как в оригинале)
-        start_para = doc.add_paragraph()
-        start_run = start_para.add_run(f"Уведомляем Вас о том, что {issue_description.lower()}")
-        start_run.font.name = 'Times New Roman'
-        start_run.font.size = Pt(12)  # 177800 = 12pt
-        start_para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-        start_para.paragraph_format.left_indent = Pt(10.2)  # 180340 = 10.2pt
-        start_para.paragraph_format.first_line_indent = Pt(20.4)  # 360045 = 20.4pt
         
         # Дополнительная информация в зависимости от типа проблемы
+        additional = None
         if "смещение сроков" in issue_type.lower():
-            additional_para = doc.add_paragraph()
-            additional_run = additional_para.add_run("Данный факт влияет на сроки производства работ и монтаж инженерных систем, в том числе системы отопления, водоснабжения, вентиляции и электроснабжения компанией ООО «Интербилдинг» - сроки будут увеличены.")
-            additional_run.font.name = 'Times New Roman'
-            additional_run.font.size = Pt(12)
-            additional_para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-            additional_para.paragraph_format.first_line_indent = Pt(25.5)  # 450215 = 25.5pt
+            additional = "Данный факт влияет на сроки производства работ и монтаж инженерных систем, в том числе системы отопления, водоснабжения, вентиляции и электроснабжения компанией ООО «Интербилдинг» - сроки будут увеличены."
         elif "дефект" in issue_type.lower() or "проблема" in issue_type.lower():
-            additional_para = doc.add_paragraph()
-            additional_run = additional_para.add_run(f"Обнаруженные дефекты в квартире {apartment_id} требуют немедленного устранения для обеспечения качества выполняемых работ и соблюдения сроков сдачи объекта.")
-            additional_run.font.name = 'Times New Roman'
-            additional_run.font.size = Pt(12)
-            additional_para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-            additional_para.paragraph_format.first_line_indent = Pt(25.5)  # 450215 = 25.5pt
-        
-        # Добавляем пустую строку
-        doc.add_paragraph()
-        
-        # 4. ПРОСЬБА О СОДЕЙСТВИИ (с точными отступами)
-        request_para = doc.add_paragraph()
-        request_run = request_para.add_run("Просим Вас посодействовать в решении данного вопроса для ускорения процесса сдачи и передачи инженерных систем компанией ООО «Сварго» и выполнения монтажных работ инженерных систем компанией ООО «Интербилдинг».")
-        request_run.font.name = 'Times New Roman'
-        request_run.font.size = Pt(12)
-        request_para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-        request_para.paragraph_format.first_line_indent = Pt(25.5)  # 450215 = 25.5pt
-        request_para.paragraph_format.line_spacing = 1.0  # Межстрочный интервал как в оригинале
-        
-        # Добавляем несколько пустых строк перед подписью
-        for _ in range(8):
-            doc.add_paragraph()
-        
-        # 5. ПОДПИСЬ (точно как в оригинале - жирный шрифт)
-        position_para1 = doc.add_paragraph()
-        position_run1 = position_para1.add_run("           Заместитель директора и ")
-        position_run1.bold = True
-        position_run1.font.name = 'Times New Roman'
-        position_run1.font.size = Pt(11)  # 165100 = 11pt
-        position_para1.alignment = WD_ALIGN_PARAGRAPH.LEFT
-        position_para1.paragraph_format.line_spacing = 1.0  # Как в оригинале
-        
-        position_para2 = doc.add_paragraph()
-        position_run2 = position_para2.add_run("           руководитель проекта строительства ")
-        position_run2.bold = True
-        position_run2.font.name = 'Times New Roman'
-        position_run2.font.size = Pt(11)  # 165100 = 11pt
-        position_para2.alignment = WD_ALIGN_PARAGRAPH.LEFT
-        position_para2.paragraph_format.line_spacing = 1.0  # Как в оригинале
-        
-        # Компания и подпись в одном абзаце как в оригинале
-        signature_para = doc.add_paragraph()
-        company_run = signature_para.add_run("           ООО «Интербилдинг»")
-        company_run.bold = True
-        company_run.font.name = 'Times New Roman'
-        company_run.font.size = Pt(11)  # 165100 = 11pt
-        
-        # Добавляем много пробелов для выравнивания подписи по правому краю
-        signature_run = signature_para.add_run("                                                                                       Кучун Р.В.")
-        signature_run.bold = True
-        signature_run.font.name = 'Times New Roman'
-        signature_run.font.size = Pt(11)  # 165100 = 11pt
-        
-        signature_para.alignment = WD_ALIGN_PARAGRAPH.LEFT
-        signature_para.paragraph_format.line_spacing = 1.0
+            additional = f"Обнаруженные дефекты в квартире {apartment_id} требуют немедленного устранения для обеспечения качества выполняемых работ и соблюдения сроков сдачи объекта."
+        
+        return self.letter_template.render({
+            'date': current_date.strftime('%d.%m.%Yг.'),
+            'date_plain': current_date.strftime('%d.%m.%Y'),
+            'document_number': document_number,
+            'issue_description': issue_description.lower(),
+            'additional': additional
+        })
     
-    def _add_logo_and_address_table(self, doc: Document, document_number: str = None):
-        """Добавляет таблицу с логотипом и адресом как в оригинальных письмах"""
-        # Создаем таблицу 1x2 как в оригинале
-        table = doc.add_table(rows=1, cols=2)
-        # Убираем рамки таблицы
-        table.style = None
-        table.alignment = WD_TABLE_ALIGNMENT.LEFT
-        
-        # Получаем ячейки
-        cells = table.rows[0].cells
-        
-        # Левая ячейка - логотип и адрес отправителя (по центру как в оригинале)
-        left_cell = cells[0]
-        
-        # Добавляем логотип, если он существует
-        logo_path = "logo_image1.png"
-        if os.path.exists(logo_path):
-            try:
-                # Добавляем изображение в ячейку
-                paragraph = left_cell.paragraphs[0]
-                run = paragraph.add_run()
-                run.add_picture(logo_path, width=Inches(1.5))
-                paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER  # По центру как в оригинале
-                
-                # Добавляем адрес под логотипом
-                address_para = left_cell.add_paragraph()
-                address_run = address_para.add_run("Российская Федерация, 124498, Россия, Москва г.,\nЗеленоград г., 4922-й проезд, строение 2")
-                address_run.font.name = 'Times New Roman'
-                address_run.font.size = Pt(12)
-                address_para.alignment = WD_ALIGN_PARAGRAPH.CENTER  # По центру как в оригинале
-                
-                # Добавляем дату и номер документа точно как в оригинале
-                if document_number:
-                    # Первая строка: два пробела + подчеркивание + дата + подчеркивание + пробел + № (не подчеркнуто) + пробел + номер документа (подчеркнуто)
-                    first_line_para = left_cell.add_paragraph()
-                    first_line_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                    
-                    # Четыре пробела перед первым подчеркиванием
-                    spaces_run = first_line_para.add_run("    ")
-                    spaces_run.font.name = 'Times New Roman'
-                    spaces_run.font.size = Pt(12)
-                    
-                    # Три подчеркивания перед датой
-                    underline_before_run = first_line_para.add_run("___")
-                    underline_before_run.font.name = 'Times New Roman'
-                    underline_before_run.font.size = Pt(12)
-                    underline_before_run.underline = True
-                    
-                    # Дата (подчеркнуто) - используем сегодняшнюю дату
-                    from datetime import datetime
-                    current_date = datetime.now()
-                    today_date = current_date.strftime('%d.%m.%Yг.')
-                    date_run = first_line_para.add_run(today_date)
-                    date_run.font.name = 'Times New Roman'
-                    date_run.font.size = Pt(12)
-                    date_run.underline = True
-                    
-                    # Три подчеркивания после даты
-                    underline_after_run = first_line_para.add_run("___")
-                    underline_after_run.font.name = 'Times New Roman'
-                    underline_after_run.font.size = Pt(12)
-                    underline_after_run.underline = True
-                    
-                    # Пробел
-                    space_run = first_line_para.add_run(" ")
-                    space_run.font.name = 'Times New Roman'
-                    space_run.font.size = Pt(12)
-                    
-                    # № (не подчеркнуто)
-                    number_symbol_run = first_line_para.add_run("№")
-                    number_symbol_run.font.name = 'Times New Roman'
-                    number_symbol_run.font.size = Pt(12)
-                    
-                    # Пробел
-                    space_run2 = first_line_para.add_run(" ")
-                    space_run2.font.name = 'Times New Roman'
-                    space_run2.font.size = Pt(12)
-                    
-                    # Четыре подчеркивания перед номером документа
-                    number_underline_before_run = first_line_para.add_run("____")
-                    number_underline_before_run.font.name = 'Times New Roman'
-                    number_underline_before_run.font.size = Pt(12)
-                    number_underline_before_run.underline = True
-                    
-                    # Номер документа (подчеркнуто)
-                    number_run = first_line_para.add_run(document_number)
-                    number_run.font.name = 'Times New Roman'
-                    number_run.font.size = Pt(12)
-                    number_run.underline = True
-                    
-                    # Четыре подчеркивания после номера документа
-                    number_underline_after_run = first_line_para.add_run("____")
-                    number_underline_after_run.font.name = 'Times New Roman'
-                    number_underline_after_run.font.size = Pt(12)
-                    number_underline_after_run.underline = True
-                    
-                    # Вторая строка: "на № ________________ от ________________"
-                    second_line_para = left_cell.add_paragraph()
-                    second_line_run = second_line_para.add_run("на № ________________ от ________________")
-                    second_line_run.font.name = 'Times New Roman'
-                    second_line_run.font.size = Pt(12)
-                    second_line_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                
-            except Exception as e:
-                print(f"Ошибка добавления логотипа: {e}")
-                # Если не удалось добавить логотип, добавляем только адрес
-                left_para = left_cell.paragraphs[0]
-                left_para.text = "Российская Федерация, 124498, Россия, Москва г.,\nЗеленоград г., 4922-й проезд, строение 2"
-                left_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                
-                # Добавляем дату и номер документа точно как в оригинале
-                if document_number:
-                    # Первая строка: два пробела + подчеркивание + дата + подчеркивание + пробел + № (не подчеркнуто) + пробел + номер документа (подчеркнуто)
-                    first_line_para = left_cell.add_paragraph()
-                    first_line_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                    
-                    # Четыре пробела перед первым подчеркиванием
-                    spaces_run = first_line_para.add_run("    ")
-                    spaces_run.font.name = 'Times New Roman'
-                    spaces_run.font.size = Pt(12)
-                    
-                    # Три подчеркивания перед датой
-                    underline_before_run = first_line_para.add_run("___")
-                    underline_before_run.font.name = 'Times New Roman'
-                    underline_before_run.font.size = Pt(12)
-                    underline_before_run.underline = True
-                    
-                    # Дата (подчеркнуто) - используем сегодняшнюю дату
-                    from datetime import datetime
-                    current_date = datetime.now()
-                    today_date = current_date.strftime('%d.%m.%Yг.')
-                    date_run = first_line_para.add_run(today_date)
-                    date_run.font.name = 'Times New Roman'
-                    date_run.font.size = Pt(12)
-                    date_run.underline = True
-                    
-                    # Три подчеркивания после даты
-                    underline_after_run = first_line_para.add_run("___")
-                    underline_after_run.font.name = 'Times New Roman'
-                    underline_after_run.font.size = Pt(12)
-                    underline_after_run.underline = True
-                    
-                    # Пробел
-                    space_run = first_line_para.add_run(" ")
-                    space_run.font.name = 'Times New Roman'
-                    space_run.font.size = Pt(12)
-                    
-                    # № (не подчеркнуто)
-                    number_symbol_run = first_line_para.add_run("№")
-                    number_symbol_run.font.name = 'Times New Roman'
-                    number_symbol_run.font.size = Pt(12)
-                    
-                    # Пробел
-                    space_run2 = first_line_para.add_run(" ")
-                    space_run2.font.name = 'Times New Roman'
-                    space_run2.font.size = Pt(12)
-                    
-                    # Четыре подчеркивания перед номером документа
-                    number_underline_before_run = first_line_para.add_run("____")
-                    number_underline_before_run.font.name = 'Times New Roman'
-                    number_underline_before_run.font.size = Pt(12)
-                    number_underline_before_run.underline = True
-                    
-                    # Номер документа (подчеркнуто)
-                    number_run = first_line_para.add_run(document_number)
-                    number_run.font.name = 'Times New Roman'
-                    number_run.font.size = Pt(12)
-                    number_run.underline = True
-                    
-                    # Четыре подчеркивания после номера документа
-                    number_underline_after_run = first_line_para.add_run("____")
-                    number_underline_after_run.font.name = 'Times New Roman'
-                    number_underline_after_run.font.size = Pt(12)
-                    number_underline_after_run.underline = True
-                    
-                    # Вторая строка: "на № ________________ от ________________"
-                    second_line_para = left_cell.add_paragraph()
-                    second_line_run = second_line_para.add_run("на № ________________ от ________________")
-                    second_line_run.font.name = 'Times New Roman'
-                    second_line_run.font.size = Pt(12)
-                    second_line_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        else:
-            # Если логотип не найден, добавляем только адрес
-            left_para = left_cell.paragraphs[0]
-            left_para.text = "Российская Федерация, 124498, Россия, Москва г.,\nЗеленоград г., 4922-й проезд, строение 2"
-            left_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            
-            # Добавляем номер документа, если он передан
-            if document_number:
-                doc_number_para = left_cell.add_paragraph()
-                doc_number_para.text = f"№ {document_number}"
-                doc_number_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                
-                # Добавляем дату документа
-                current_date = datetime.now()
-                date_para = left_cell.add_paragraph()
-                date_para.text = current_date.strftime('%d.%m.%Y')
-                date_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        
-        # Правая ячейка - адрес получателя (отдельные абзацы по правому краю как в оригинале)
-        right_cell = cells[1]
-        
-        # Создаем отдельные абзацы для каждой строки адресата (жирный шрифт как в оригинале)
-        recipient1 = right_cell.add_paragraph()
-        recipient1_run = recipient1.add_run("Руководителю проекта")
-        recipient1_run.bold = True
-        recipient1_run.font.name = 'Times New Roman'
-        recipient1_run.font.size = Pt(12)
-        recipient1.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-        
-        recipient2 = right_cell.add_paragraph()
-        recipient2_run = recipient2.add_run("ООО «АВ Development»")
-        recipient2_run.bold = True
-        recipient2_run.font.name = 'Times New Roman'
-        recipient2_run.font.size = Pt(12)
-        recipient2.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-        
-        recipient3 = right_cell.add_paragraph()
-        recipient3_run = recipient3.add_run("Эльман И.И.")
-        recipient3_run.bold = True
-        recipient3_run.font.name = 'Times New Roman'
-        recipient3_run.font.size = Pt(12)
-        recipient3.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-        
-        # Добавляем пустую строку после таблицы
-        doc.add_paragraph()
+    def _count_today_documents(self, current_date: datetime) -> int:
+        """
+        Количество документов за сегодня по файлам в папке
+        Используется один раз - для начального значения счетчика номеров
+        """
+        today_str = current_date.strftime('%d.%m.%y')
+        today_start = current_date.replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+        count = 0
+        
+        with os.scandir(self.documents_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith('.docx'):
+                    continue
+                if today_str in entry.name:
+                    count += 1
+                elif entry.name.startswith('learning_letter_') and entry.stat().st_mtime >= today_start:
+                    count += 1
+        
+        return count
     
     def _log_learning_process(self, template_type: str, command_data: Dict[str, Any], patterns: Dict[str, Any], examples_count: int):
         """Логирует процесс обучения AI"""
@@ -887,18 +531,8 @@ class LearningDocumentGenerator:
                 }
             }
             
-            url = f"{self.supabase_url}/rest/v1/ai_learning_logs"
-            headers = {
-                'apikey': self.supabase_key,
-                'Authorization': f'Bearer {self.supabase_key}',
-                'Content-Type': 'application/json',
-                'Prefer': 'return=minimal'
-            }
-            
-            response = requests.post(url, headers=headers, json=log_data)
-            response.raise_for_status()
-            
-            print(f"Процесс обучения для {template_type} записан в логи")
+            if self.data_loader.insert('ai_learning_logs', log_data):
+                print(f"Процесс обучения для {template_type} записан в логи")
             
         except Exception as e:
             print(f"Ошибка записи логов обучения: {e}")
@@ -0,0 +1,247 @@
+"""
+Скомпилированный шаблон официального письма
+Статичный каркас письма (поля, таблица с логотипом и адресами, обращение,
+просьба о содействии, подпись) строится один раз: логотип встраивается один раз,
+шрифты и отступы задаются один раз. Каждое письмо - копия каркаса, в которой
+заполняются плейсхолдеры {{...}}.
+"""
+
+import os
+import copy
+import logging
+import threading
+from io import BytesIO
+from typing import Dict, Optional
+
+from docx import Document
+from docx.shared import Inches, Pt
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.enum.table import WD_TABLE_ALIGNMENT
+from docx.oxml.ns import qn
+
+logger = logging.getLogger(__name__)
+
+LOGO_PATH = "logo_image1.png"
+SENDER_ADDRESS = "Российская Федерация, 124498, Россия, Москва г.,\nЗеленоград г., 4922-й проезд, строение 2"
+RECIPIENT_LINES = ("Руководителю проекта", "ООО «АВ Development»", "Эльман И.И.")
+GREETING = "Уважаемый Иса Исаевич!"
+REQUEST_TEXT = ("Просим Вас посодействовать в решении данного вопроса для ускорения процесса сдачи "
+                "и передачи инженерных систем компанией ООО «Сварго» и выполнения монтажных работ "
+                "инженерных систем компанией ООО «Интербилдинг».")
+
+# Плейсхолдеры, которые заполняются в каждом письме
+DATE = "{{date}}"                        # 17.10.2026г. (строка с номером под логотипом)
+DATE_PLAIN = "{{date_plain}}"            # 17.10.2026 (вариант без логотипа)
+DOCUMENT_NUMBER = "{{document_number}}"
+ISSUE_DESCRIPTION = "{{issue_description}}"
+ADDITIONAL = "{{additional}}"            # абзац удаляется, если значение пустое
+
+# Необязательные строки письма: при пустом значении удаляется весь абзац,
+# остальные плейсхолдеры заменяются пустой строкой
+OPTIONAL_PLACEHOLDERS = {ADDITIONAL}
+
+
+def _run(paragraph, text: str, size: float = 12, bold: bool = False, underline: bool = False):
+    run = paragraph.add_run(text)
+    run.font.name = 'Times New Roman'
+    run.font.size = Pt(size)
+    if bold:
+        run.bold = True
+    if underline:
+        run.underline = True
+    return run
+
+
+class LetterTemplate:
+    """Каркас официального письма, собираемый один раз на процесс"""
+
+    def __init__(self, logo_path: str = LOGO_PATH):
+        self.logo_path = logo_path
+        self._skeleton: Optional[Document] = None
+        self._skeleton_bytes: Optional[bytes] = None
+        self._lock = threading.Lock()
+
+    def _add_header_table(self, doc: Document):
+        """Таблица 1x2: логотип, адрес, дата и номер слева; адресат справа"""
+        table = doc.add_table(rows=1, cols=2)
+        # Убираем рамки таблицы
+        table.style = None
+        table.alignment = WD_TABLE_ALIGNMENT.LEFT
+        left_cell, right_cell = table.rows[0].cells
+
+        if os.path.exists(self.logo_path):
+            try:
+                paragraph = left_cell.paragraphs[0]
+                paragraph.add_run().add_picture(self.logo_path, width=Inches(1.5))
+                paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+                address_para = left_cell.add_paragraph()
+                _run(address_para, SENDER_ADDRESS)
+                address_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+            except Exception as e:
+                logger.warning(f"Ошибка добавления логотипа: {e}")
+                left_para = left_cell.paragraphs[0]
+                left_para.text = SENDER_ADDRESS
+                left_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+            # "    ___17.10.2026г.___ № ____17/10-1____" - подчеркнуты дата и номер
+            number_para = left_cell.add_paragraph()
+            number_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+            _run(number_para, "    ")
+            _run(number_para, "___", underline=True)
+            _run(number_para, DATE, underline=True)
+            _run(number_para, "___", underline=True)
+            _run(number_para, " ")
+            _run(number_para, "№")
+            _run(number_para, " ")
+            _run(number_para, "____", underline=True)
+            _run(number_para, DOCUMENT_NUMBER, underline=True)
+            _run(number_para, "____", underline=True)
+
+            reply_para = left_cell.add_paragraph()
+            _run(reply_para, "на № ________________ от ________________")
+            reply_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        else:
+            # Логотип не найден - только адрес, номер и дата
+            left_para = left_cell.paragraphs[0]
+            left_para.text = SENDER_ADDRESS
+            left_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+            number_para = left_cell.add_paragraph()
+            number_para.add_run("№ ")
+            number_para.add_run(DOCUMENT_NUMBER)
+            number_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+            date_para = left_cell.add_paragraph()
+            date_para.add_run(DATE_PLAIN)
+            date_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+        # Адресат - отдельные абзацы по правому краю, жирный шрифт
+        for line in RECIPIENT_LINES:
+            recipient = right_cell.add_paragraph()
+            _run(recipient, line, bold=True)
+            recipient.alignment = WD_ALIGN_PARAGRAPH.RIGHT
+
+        # Пустая строка после таблицы
+        doc.add_paragraph()
+
+    def _build(self) -> Document:
+        """Собрать каркас письма"""
+        doc = Document()
+
+        for section in doc.sections:
+            section.top_margin = Inches(0.5)
+            section.bottom_margin = Inches(0.5)
+            section.left_margin = Inches(0.5)
+            section.right_margin = Inches(0.5)
+
+        self._add_header_table(doc)
+
+        greeting = doc.add_paragraph()
+        _run(greeting, GREETING, bold=True)
+        greeting.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+        doc.add_paragraph()
+
+        notice_para = doc.add_paragraph()
+        _run(notice_para, "Уведомляем Вас о том, что ")
+        _run(notice_para, ISSUE_DESCRIPTION)
+        notice_para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+        notice_para.paragraph_format.left_indent = Pt(10.2)
+        notice_para.paragraph_format.first_line_indent = Pt(20.4)
+
+        additional_para = doc.add_paragraph()
+        _run(additional_para, ADDITIONAL)
+        additional_para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+        additional_para.paragraph_format.first_line_indent = Pt(25.5)
+
+        doc.add_paragraph()
+
+        request_para = doc.add_paragraph()
+        _run(request_para, REQUEST_TEXT)
+        request_para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+        request_para.paragraph_format.first_line_indent = Pt(25.5)
+        request_para.paragraph_format.line_spacing = 1.0
+
+        # Пустые строки перед подписью
+        for _ in range(8):
+            doc.add_paragraph()
+
+        for text in ("           Заместитель директора и ", "           руководитель проекта строительства "):
+            position_para = doc.add_paragraph()
+            _run(position_para, text, size=11, bold=True)
+            position_para.alignment = WD_ALIGN_PARAGRAPH.LEFT
+            position_para.paragraph_format.line_spacing = 1.0
+
+        # Компания и подпись в одном абзаце, подпись выровнена пробелами
+        signature_para = doc.add_paragraph()
+        _run(signature_para, "           ООО «Интербилдинг»", size=11, bold=True)
+        _run(signature_para, " " * 87 + "Кучун Р.В.", size=11, bold=True)
+        signature_para.alignment = WD_ALIGN_PARAGRAPH.LEFT
+        signature_para.paragraph_format.line_spacing = 1.0
+
+        return doc
+
+    def _get_skeleton(self) -> Document:
+        with self._lock:
+            if self._skeleton is None:
+                self._skeleton = self._build()
+                buffer = BytesIO()
+                self._skeleton.save(buffer)
+                self._skeleton_bytes = buffer.getvalue()
+                logger.info("Каркас письма собран")
+            return self._skeleton
+
+    def _copy_skeleton(self) -> Document:
+        skeleton = self._get_skeleton()
+        try:
+            return copy.deepcopy(skeleton)
+        except Exception as e:
+            logger.warning(f"Не удалось скопировать каркас письма, читаем заново: {e}")
+            return Document(BytesIO(self._skeleton_bytes))
+
+    def render(self, values: Dict[str, Optional[str]]) -> Document:
+        """
+        Создать письмо из каркаса
+
+        Args:
+            values: Значения плейсхолдеров ({'document_number': '17/10-1', ...});
+                абзац необязательной строки (OPTIONAL_PLACEHOLDERS) с пустым значением удаляется
+
+        Returns:
+            Новый документ (каркас не изменяется)
+        """
+        doc = self._copy_skeleton()
+        replacements = {f"{{{{{key}}}}}": value for key, value in values.items()}
+
+        for text_element in list(doc.element.body.iter(qn('w:t'))):
+            text = text_element.text
+            if not text or '{{' not in text:
+                continue
+            value = replacements.get(text)
+            if value or text not in OPTIONAL_PLACEHOLDERS:
+                text_element.text = value or ''
+                continue
+
+            # Пустая необязательная строка - удаляем весь абзац
+            paragraph = text_element
+            while paragraph is not None and paragraph.tag != qn('w:p'):
+                paragraph = paragraph.getparent()
+            if paragraph is not None and paragraph.getparent() is not None:
+                paragraph.getparent().remove(paragraph)
+
+        return doc
+
+
+# Глобальный экземпляр
+_template_instance: Optional[LetterTemplate] = None
+_template_lock = threading.Lock()
+
+
+def get_letter_template() -> LetterTemplate:
+    """Получить общий каркас официального письма"""
+    global _template_instance
+    with _template_lock:
+        if _template_instance is None:
+            _template_instance = LetterTemplate()
+        return _template_instance
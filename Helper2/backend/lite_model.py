@@ -0,0 +1,86 @@
+"""
+Облегченная модель дефектов (TFLite)
+Загружает экспортированную модель .tflite через tflite-runtime без импорта
+TensorFlow: холодный старт - доли секунды, память - в несколько раз меньше Keras.
+Если tflite-runtime не установлен, используется tf.lite из TensorFlow.
+"""
+
+import os
+import logging
+import threading
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Потоков на один вызов модели (можно переопределить в .env)
+TFLITE_NUM_THREADS = int(os.getenv('TFLITE_NUM_THREADS', str(os.cpu_count() or 1)))
+
+
+def _interpreter_class():
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        from tensorflow.lite import Interpreter
+    return Interpreter
+
+
+class LiteModel:
+    """Модель TFLite с интерфейсом батча (N, H, W, 3) -> (N, K)"""
+
+    def __init__(self, model_path: str, num_threads: int = TFLITE_NUM_THREADS):
+        """
+        Args:
+            model_path: Путь к файлу .tflite
+            num_threads: Потоков на один вызов
+        """
+        self.model_path = model_path
+        self._interpreter = _interpreter_class()(model_path=model_path, num_threads=num_threads)
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        self._batch_size: Optional[int] = None
+        # Интерпретатор не потокобезопасен
+        self._lock = threading.Lock()
+
+    @property
+    def input_shape(self):
+        return tuple(self._input['shape'])
+
+    def _quantize(self, batch: np.ndarray) -> np.ndarray:
+        dtype = self._input['dtype']
+        if dtype == np.float32:
+            return batch.astype(np.float32, copy=False)
+        scale, zero_point = self._input['quantization']
+        return np.clip(np.round(batch / scale + zero_point),
+                       np.iinfo(dtype).min, np.iinfo(dtype).max).astype(dtype)
+
+    def _dequantize(self, output: np.ndarray) -> np.ndarray:
+        if output.dtype == np.float32:
+            return output
+        scale, zero_point = self._output['quantization']
+        return (output.astype(np.float32) - zero_point) * scale
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        """Выход модели для батча изображений (float32)"""
+        with self._lock:
+            if batch.shape[0] != self._batch_size:
+                self._interpreter.resize_tensor_input(self._input['index'], batch.shape)
+                self._interpreter.allocate_tensors()
+                self._batch_size = batch.shape[0]
+            self._interpreter.set_tensor(self._input['index'], self._quantize(batch))
+            self._interpreter.invoke()
+            return self._dequantize(self._interpreter.get_tensor(self._output['index'])).copy()
+
+
+def load_lite_model(model_path: str) -> Optional[LiteModel]:
+    """Загрузить модель TFLite (None, если файла нет или загрузка не удалась)"""
+    if not os.path.exists(model_path):
+        return None
+    try:
+        model = LiteModel(model_path)
+        logger.info(f"Загружена модель TFLite: {model_path}")
+        return model
+    except Exception as e:
+        logger.warning(f"Не удалось загрузить модель TFLite {model_path}: {e}")
+        return None
@@ -16,6 +16,7 @@ from supabase import create_client, Client
 import asyncio
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
+from command_notifier import get_command_notifier
 
 # Загружаем переменные окружения из .env файла
 load_dotenv()
@@ -243,6 +244,14 @@ async def get_pending_commands(
         logger.error(f"Error fetching pending commands: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@app.get("/api/commands/wait")
+async def wait_for_commands(since: Optional[int] = None, epoch: Optional[str] = None, timeout: float = 25):
+    """
+    Long-poll ожидание новых команд (для агента)
+    Запрос удерживается до появления новой команды или до истечения timeout
+    """
+    return await get_command_notifier().wait(since, epoch, timeout)
+
 @app.get("/api/commands/{command_id}", response_model=CommandResponse)
 async def get_command(
     command_id: str,
@@ -308,6 +317,10 @@ async def update_command(
         
         logger.info(f"Command {command_id} updated to status {update.status}")
         
+        # Команда возвращена в очередь - агенты должны узнать о ней сразу
+        if update.status == "pending":
+            await notify_agent(command_id)
+        
         return {"message": "Command updated successfully", "command_id": command_id}
         
     except HTTPException:
@@ -380,9 +393,8 @@ async def get_command_status(
 
 # Фоновые задачи
 async def notify_agent(command_id: str):
-    """Уведомление агента о новой команде (заглушка)"""
-    logger.info(f"Notifying agent about new command: {command_id}")
-    # Здесь можно добавить WebSocket уведомления или другие механизмы
+    """Уведомление агентов о новой команде (через long-poll /api/commands/wait)"""
+    await get_command_notifier().publish(command_id)
 
 # WebSocket endpoint для real-time обновлений (опционально)
 @app.websocket("/ws/commands/{command_id}")
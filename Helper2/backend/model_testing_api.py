@@ -6,15 +6,18 @@ API для тестирования модели обнаружения дефе
 from fastapi import FastAPI, File, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-import tensorflow as tf
-from tensorflow import keras
+from starlette.concurrency import run_in_threadpool
+from typing import List
 import numpy as np
 from PIL import Image
 import io
 import os
 from pathlib import Path
 import json
-import cv2
+
+from inference_batcher import MicroBatcher, predict_in_batches
+from image_features import extract_features, extract_features_batch
+from lite_model import LiteModel, load_lite_model
 
 app = FastAPI(title="Model Testing API", version="1.0.0")
 
@@ -34,6 +37,12 @@ app.add_middleware(
 # Глобальная переменная для модели
 model = None
 
+# Какую модель загружать: auto (TFLite, если экспортирована, иначе Keras), tflite или keras
+MODEL_BACKEND = os.getenv('MODEL_BACKEND', 'auto').lower()
+
+# Сколько изображений можно отправить в /test-images за один запрос
+MAX_IMAGES_PER_REQUEST = int(os.getenv('MAX_IMAGES_PER_REQUEST', '200'))
+
 def load_model():
     """Загружает модель для тестирования"""
     global model
@@ -48,8 +57,20 @@ def load_model():
         "datasets/maximized_training_data/maximized_concrete_defect_model.h5"
     ]
     
+    # Модели перебираются по приоритету; для каждой сначала пробуем экспортированную
+    # TFLite-модель (загружается без TensorFlow, см. export_inference_model.py), затем .h5
+    keras = None
     for model_path in model_paths:
-        if os.path.exists(model_path):
+        if MODEL_BACKEND in ('auto', 'tflite'):
+            lite_model = load_lite_model(str(Path(model_path).with_suffix('.tflite')))
+            if lite_model is not None:
+                model = lite_model
+                print(f"✅ Модель загружена: {lite_model.model_path}")
+                return model
+        
+        if MODEL_BACKEND != 'tflite' and os.path.exists(model_path):
+            if keras is None:
+                from tensorflow import keras
             try:
                 model = keras.models.load_model(model_path)
                 print(f"✅ Модель загружена: {model_path}")
@@ -58,6 +79,9 @@ def load_model():
                 print(f"❌ Ошибка загрузки модели {model_path}: {e}")
                 continue
     
+    if MODEL_BACKEND == 'tflite':
+        raise HTTPException(status_code=500, detail="Не найдена модель TFLite. Экспортируйте модель: export_inference_model.py")
+    
     # Если модель не загрузилась, выбрасываем ошибку
     raise HTTPException(status_code=500, detail="Не удалось загрузить модель. Проверьте наличие файлов модели.")
 
@@ -75,7 +99,7 @@ def preprocess_image(image_bytes, target_size=(224, 224)):
         image = image.resize(target_size)
         
         # Конвертируем в массив и нормализуем
-        img_array = np.array(image) / 255.0
+        img_array = np.asarray(image, dtype=np.float32) / 255.0
         img_array = np.expand_dims(img_array, axis=0)
         
         return img_array
@@ -84,63 +108,11 @@ def preprocess_image(image_bytes, target_size=(224, 224)):
 
 def analyze_image_characteristics(image_bytes):
     """Анализирует характеристики изображения для определения типа дефекта"""
-    try:
-        # Конвертируем байты в изображение
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
-        if img is None:
-            return None
-        
-        # Конвертируем в RGB
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        
-        # Анализируем характеристики
-        characteristics = {}
-        
-        # 1. Анализ контраста (стандартное отклонение)
-        characteristics['contrast'] = np.std(gray)
-        
-        # 2. Анализ яркости (среднее значение)
-        characteristics['brightness'] = np.mean(gray)
-        
-        # 3. Анализ градиентов (для трещин и повреждений)
-        grad_x = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
-        grad_y = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
-        gradient_magnitude = np.sqrt(grad_x**2 + grad_y**2)
-        characteristics['gradient_magnitude'] = np.mean(gradient_magnitude)
-        
-        # 4. Анализ цветовых каналов
-        characteristics['red_mean'] = np.mean(img_rgb[:, :, 0])
-        characteristics['green_mean'] = np.mean(img_rgb[:, :, 1])
-        characteristics['blue_mean'] = np.mean(img_rgb[:, :, 2])
-        
-        # 5. Анализ краев (для повреждений)
-        edges = cv2.Canny(gray, 50, 150)
-        characteristics['edge_density'] = np.sum(edges > 0) / (edges.shape[0] * edges.shape[1])
-        
-        # 6. Дополнительные характеристики
-        # Анализ текстуры (локальное стандартное отклонение)
-        kernel = np.ones((5,5), np.float32) / 25
-        local_mean = cv2.filter2D(gray.astype(np.float32), -1, kernel)
-        local_variance = cv2.filter2D((gray.astype(np.float32) - local_mean)**2, -1, kernel)
-        characteristics['texture_variance'] = np.mean(np.sqrt(local_variance))
-        
-        # Анализ однородности
-        characteristics['uniformity'] = np.sum((gray / 255.0) ** 2) / (gray.shape[0] * gray.shape[1])
-        
-        # Анализ энтропии (мера случайности)
-        hist, _ = np.histogram(gray, bins=256, range=(0, 256))
-        hist = hist / hist.sum()
-        entropy = -np.sum(hist * np.log2(hist + 1e-10))
-        characteristics['entropy'] = entropy
-        
-        return characteristics
-        
-    except Exception as e:
-        print(f"Ошибка анализа изображения: {e}")
-        return None
+    return extract_features(image_bytes)
+
+def analyze_images_characteristics(images):
+    """Характеристики нескольких изображений (параллельно)"""
+    return extract_features_batch(images)
 
 def determine_defect_type(characteristics):
     """Определяет тип дефекта на основе характеристик"""
@@ -300,28 +272,103 @@ def determine_defect_type(characteristics):
     
     return best_type, confidence, type_names.get(best_type, 'Неизвестно')
 
-def predict_defect(image_array, threshold=0.3):
-    """Предсказывает наличие дефекта"""
-    try:
-        if model is not None:
-            # Используем обученную модель
-            prediction = model.predict(image_array, verbose=0)
-            confidence = float(prediction[0][0])
-            print(f"🤖 Модель предсказала: {confidence:.3f} (порог: {threshold})")
+def run_model(batch: np.ndarray) -> np.ndarray:
+    """Прямой вызов модели на батче (без накладных расходов model.predict)"""
+    if isinstance(model, LiteModel):
+        return model.predict(batch)
+    import tensorflow as tf
+    return model(tf.convert_to_tensor(batch, dtype=tf.float32), training=False).numpy()
+
+# Объединяет одновременные запросы /test-image в батчи
+inference_batcher = MicroBatcher(run_model)
+
+def build_prediction(confidence: float, threshold: float) -> dict:
+    """Результат классификации по вероятности дефекта"""
+    return {
+        'has_defect': confidence > threshold,
+        'confidence': confidence,
+        'defect_probability': confidence * 100,
+        'normal_probability': (1 - confidence) * 100,
+        'threshold': threshold
+    }
+
+def prepare_image(image_bytes):
+    """Предобработка для модели и анализ характеристик (блокирующая, выполняется в пуле потоков)"""
+    image_array = preprocess_image(image_bytes)[0]
+    characteristics = analyze_image_characteristics(image_bytes)
+    return image_array, characteristics
+
+def build_image_report(filename, result, characteristics, threshold):
+    """Тип дефекта и рекомендации по результату модели и характеристикам изображения"""
+    # Отладочная информация
+    if characteristics:
+        print(f"🔍 Анализ изображения {filename}:")
+        print(f"   Яркость: {characteristics['brightness']:.2f}")
+        print(f"   Контраст: {characteristics['contrast']:.2f}")
+        print(f"   Градиенты: {characteristics['gradient_magnitude']:.2f}")
+        print(f"   Плотность краев: {characteristics['edge_density']:.3f}")
+        print(f"   Энтропия: {characteristics['entropy']:.2f}")
+    
+    # Определяем тип дефекта на основе результата модели и характеристик
+    if result['has_defect']:
+        # Если модель определила дефект, используем анализ характеристик для определения типа
+        defect_type_code, defect_confidence, defect_type_name = determine_defect_type(characteristics)
+        # Используем уверенность модели как основную
+        defect_confidence = result['confidence']
+        print(f"🔍 Модель определила дефект: {defect_type_name} (уверенность: {defect_confidence:.3f})")
+    else:
+        # Если модель определила как нормальное, считаем нормальным
+        defect_type_code = 'normal'
+        defect_confidence = result['confidence']
+        defect_type_name = 'Норма'
+        print(f"🔍 Модель определила как нормальное (уверенность: {defect_confidence:.3f})")
+    
+    # Добавляем рекомендации на основе типа дефекта
+    recommendations = []
+    if defect_type_code != "normal":
+        if defect_confidence > 0.7:
+            recommendations.append(f"Обнаружен дефект: {defect_type_name} (высокая уверенность)")
+            if defect_type_code == "broken_glass":
+                recommendations.append("🚨 СРОЧНО: Замените разбитое стекло для безопасности")
+            elif defect_type_code == "glass_scratch":
+                recommendations.append("🔧 Рекомендуется полировка или замена стекла")
+            elif defect_type_code == "window_frame_scratch":
+                recommendations.append("🔧 Обработайте царапину на раме антикоррозийным составом")
+            elif defect_type_code == "ceiling_leak":
+                recommendations.append("🚨 СРОЧНО: Устраните источник протечки и просушите потолок")
+            elif defect_type_code == "wall_crack":
+                recommendations.append("🔧 Заделайте трещину в стене герметиком")
+            elif defect_type_code == "surface_damage":
+                recommendations.append("🔧 Восстановите поврежденную поверхность")
+            elif defect_type_code == "stain":
+                recommendations.append("🧽 Очистите пятно и проверьте источник загрязнения")
+            elif defect_type_code == "paint_damage":
+                recommendations.append("🎨 Восстановите поврежденную краску")
+            elif defect_type_code == "plumbing_damage":
+                recommendations.append("🔧 Обратитесь к сантехнику для ремонта")
+            elif defect_type_code == "button_damage":
+                recommendations.append("🔧 Замените поврежденную кнопку смыва")
         else:
-            raise HTTPException(status_code=500, detail="Модель не загружена")
-        
-        has_defect = confidence > threshold
-        
-        return {
-            'has_defect': has_defect,
-            'confidence': confidence,
-            'defect_probability': confidence * 100,
-            'normal_probability': (1 - confidence) * 100,
-            'threshold': threshold
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Ошибка предсказания: {str(e)}")
+            recommendations.append(f"Возможен дефект: {defect_type_name} (низкая уверенность)")
+            recommendations.append("🔍 Рекомендуется дополнительная проверка специалистом")
+    else:
+        recommendations.append("✅ Дефект не обнаружен - поверхность в норме")
+    
+    return {
+        "filename": filename,
+        "result": result,
+        "defect_type": {
+            "code": defect_type_code,
+            "name": defect_type_name,
+            "confidence": defect_confidence
+        },
+        "recommendations": recommendations
+    }
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Остановка обработчика батчей"""
+    await inference_batcher.close()
 
 @app.get("/health")
 async def health_check():
@@ -354,79 +401,94 @@ async def test_image(
         # Читаем файл
         image_bytes = await file.read()
         
-        # Предобрабатываем изображение
-        image_array = preprocess_image(image_bytes)
+        # Предобработка и анализ характеристик - вне event loop
+        image_array, characteristics = await run_in_threadpool(prepare_image, image_bytes)
         
-        # Делаем предсказание
-        result = predict_defect(image_array, threshold)
+        # Делаем предсказание (одновременные запросы объединяются в один батч)
+        try:
+            output = await inference_batcher.submit(image_array)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Ошибка предсказания: {str(e)}")
+        confidence = float(output[0])
+        print(f"🤖 Модель предсказала: {confidence:.3f} (порог: {threshold})")
+        result = build_prediction(confidence, threshold)
         
-        # Анализируем характеристики изображения для определения типа дефекта
-        characteristics = analyze_image_characteristics(image_bytes)
+        report = build_image_report(file.filename, result, characteristics, threshold)
         
-        # Отладочная информация
-        if characteristics:
-            print(f"🔍 Анализ изображения {file.filename}:")
-            print(f"   Яркость: {characteristics['brightness']:.2f}")
-            print(f"   Контраст: {characteristics['contrast']:.2f}")
-            print(f"   Градиенты: {characteristics['gradient_magnitude']:.2f}")
-            print(f"   Плотность краев: {characteristics['edge_density']:.3f}")
-            print(f"   Энтропия: {characteristics['entropy']:.2f}")
+        return JSONResponse(content={
+            "success": True,
+            **report,
+            "model_info": {
+                "threshold_used": threshold,
+                "model_loaded": True
+            }
+        })
         
-        # Определяем тип дефекта на основе результата модели и характеристик
-        if result['has_defect']:
-            # Если модель определила дефект, используем анализ характеристик для определения типа
-            defect_type_code, defect_confidence, defect_type_name = determine_defect_type(characteristics)
-            # Используем уверенность модели как основную
-            defect_confidence = result['confidence']
-            print(f"🔍 Модель определила дефект: {defect_type_name} (уверенность: {defect_confidence:.3f})")
-        else:
-            # Если модель определила как нормальное, считаем нормальным
-            defect_type_code = 'normal'
-            defect_confidence = result['confidence']
-            defect_type_name = 'Норма'
-            print(f"🔍 Модель определила как нормальное (уверенность: {defect_confidence:.3f})")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Внутренняя ошибка сервера: {str(e)}")
+
+@app.post("/test-images")
+async def test_images(
+    files: List[UploadFile] = File(...),
+    threshold: float = 0.3
+):
+    """
+    Тестирует несколько изображений за один запрос (например, все фото обхода)
+    
+    Все изображения проходят через модель батчами.
+    
+    Args:
+        files: Загруженные изображения
+        threshold: Порог классификации (по умолчанию 0.3)
+    
+    Returns:
+        Результат анализа для каждого изображения
+    """
+    if len(files) > MAX_IMAGES_PER_REQUEST:
+        raise HTTPException(status_code=400, detail=f"Не больше {MAX_IMAGES_PER_REQUEST} изображений за запрос")
+    
+    try:
+        load_model()
         
-        # Добавляем рекомендации на основе типа дефекта
-        recommendations = []
-        if defect_type_code != "normal":
-            if defect_confidence > 0.7:
-                recommendations.append(f"Обнаружен дефект: {defect_type_name} (высокая уверенность)")
-                if defect_type_code == "broken_glass":
-                    recommendations.append("🚨 СРОЧНО: Замените разбитое стекло для безопасности")
-                elif defect_type_code == "glass_scratch":
-                    recommendations.append("🔧 Рекомендуется полировка или замена стекла")
-                elif defect_type_code == "window_frame_scratch":
-                    recommendations.append("🔧 Обработайте царапину на раме антикоррозийным составом")
-                elif defect_type_code == "ceiling_leak":
-                    recommendations.append("🚨 СРОЧНО: Устраните источник протечки и просушите потолок")
-                elif defect_type_code == "wall_crack":
-                    recommendations.append("🔧 Заделайте трещину в стене герметиком")
-                elif defect_type_code == "surface_damage":
-                    recommendations.append("🔧 Восстановите поврежденную поверхность")
-                elif defect_type_code == "stain":
-                    recommendations.append("🧽 Очистите пятно и проверьте источник загрязнения")
-                elif defect_type_code == "paint_damage":
-                    recommendations.append("🎨 Восстановите поврежденную краску")
-                elif defect_type_code == "plumbing_damage":
-                    recommendations.append("🔧 Обратитесь к сантехнику для ремонта")
-                elif defect_type_code == "button_damage":
-                    recommendations.append("🔧 Замените поврежденную кнопку смыва")
-            else:
-                recommendations.append(f"Возможен дефект: {defect_type_name} (низкая уверенность)")
-                recommendations.append("🔍 Рекомендуется дополнительная проверка специалистом")
-        else:
-            recommendations.append("✅ Дефект не обнаружен - поверхность в норме")
+        # Читаем файлы
+        uploads = []
+        errors = []
+        for file in files:
+            if not file.content_type or not file.content_type.startswith('image/'):
+                errors.append({"filename": file.filename, "error": "Файл должен быть изображением"})
+                continue
+            uploads.append((file.filename, await file.read()))
+        
+        def prepare_all():
+            all_characteristics = analyze_images_characteristics([image_bytes for _, image_bytes in uploads])
+            prepared = []
+            for (filename, image_bytes), characteristics in zip(uploads, all_characteristics):
+                try:
+                    prepared.append((filename, preprocess_image(image_bytes)[0], characteristics))
+                except HTTPException as e:
+                    errors.append({"filename": filename, "error": e.detail})
+            return prepared
+        
+        prepared = await run_in_threadpool(prepare_all)
+        
+        results = []
+        if prepared:
+            batch = np.stack([image_array for _, image_array, _ in prepared])
+            outputs = await run_in_threadpool(predict_in_batches, run_model, batch)
+            
+            for (filename, _, characteristics), output in zip(prepared, outputs):
+                result = build_prediction(float(output[0]), threshold)
+                results.append(build_image_report(filename, result, characteristics, threshold))
         
         return JSONResponse(content={
             "success": True,
-            "filename": file.filename,
-            "result": result,
-            "defect_type": {
-                "code": defect_type_code,
-                "name": defect_type_name,
-                "confidence": defect_confidence
-            },
-            "recommendations": recommendations,
+            "total": len(files),
+            "processed": len(results),
+            "defects_found": sum(1 for r in results if r['result']['has_defect']),
+            "results": results,
+            "errors": errors,
             "model_info": {
                 "threshold_used": threshold,
                 "model_loaded": True
@@ -447,6 +509,7 @@ async def get_model_info():
         return JSONResponse(content={
             "success": True,
             "model_loaded": True,
+            "model_backend": "tflite" if isinstance(model, LiteModel) else "keras",
             "capabilities": {
                 "defect_types": [
                     "Разбитое стекло - полное разрушение стеклянной поверхности",
@@ -470,6 +533,7 @@ async def get_model_info():
             },
             "usage": {
                 "upload_image": "POST /test-image",
+                "upload_images": "POST /test-images",
                 "parameters": {
                     "file": "Изображение для анализа",
                     "threshold": "Порог классификации (0.0-1.0)"
@@ -494,8 +558,8 @@ async def test_sample_images():
             "datasets/maximized_training_data/test/negative"
         ]
         
-        results = []
-        
+        # Собираем изображения, затем прогоняем их через модель батчами
+        samples = []
         for test_path in test_paths:
             if os.path.exists(test_path):
                 # Берем первые 3 изображения из каждой категории
@@ -508,25 +572,29 @@ async def test_sample_images():
                             image_bytes = f.read()
                         
                         # Предобрабатываем
-                        image_array = preprocess_image(image_bytes)
-                        
-                        # Предсказываем
-                        result = predict_defect(image_array, 0.3)
+                        image_array = preprocess_image(image_bytes)[0]
                         
                         # Определяем ожидаемый результат
                         expected = "defect" if "positive" in test_path else "normal"
-                        
-                        results.append({
-                            "filename": img_file.name,
-                            "expected": expected,
-                            "predicted": "defect" if result['has_defect'] else "normal",
-                            "confidence": result['defect_probability'],
-                            "correct": (expected == "defect" and result['has_defect']) or 
-                                     (expected == "normal" and not result['has_defect'])
-                        })
+                        samples.append((img_file.name, expected, image_array))
                     except Exception as e:
                         print(f"Ошибка обработки {img_file}: {e}")
         
+        results = []
+        if samples:
+            outputs = predict_in_batches(run_model, np.stack([image_array for _, _, image_array in samples]))
+            
+            for (filename, expected, _), output in zip(samples, outputs):
+                result = build_prediction(float(output[0]), 0.3)
+                results.append({
+                    "filename": filename,
+                    "expected": expected,
+                    "predicted": "defect" if result['has_defect'] else "normal",
+                    "confidence": result['defect_probability'],
+                    "correct": (expected == "defect" and result['has_defect']) or 
+                             (expected == "normal" and not result['has_defect'])
+                })
+        
         # Подсчитываем статистику
         total = len(results)
         correct = sum(1 for r in results if r['correct'])
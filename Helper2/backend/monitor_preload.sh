@@ -40,10 +40,10 @@ fi
 echo "🔍 Проверка статуса модели:"
 python3 -c "
 try:
-    from pdf_ai_processor import _processor_instance, PADDLEOCR_AVAILABLE
+    from pdf_ai_processor import _processor_pool, PADDLEOCR_AVAILABLE
     if PADDLEOCR_AVAILABLE:
         print('✅ Библиотека установлена')
-        if _processor_instance is not None:
+        if _processor_pool is not None and _processor_pool.loaded:
             print('✅ Модель загружена и готова!')
         else:
             print('⏳ Модель еще загружается...')
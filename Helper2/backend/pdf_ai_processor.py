@@ -8,6 +8,11 @@ import logging
 from typing import Dict, Any, List, Optional, Union
 from pathlib import Path
 import json
+import queue
+import threading
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 try:
@@ -19,8 +24,9 @@ except ImportError as e:
     PADDLEOCR_AVAILABLE = False
 
 try:
-    from pdf2image import convert_from_path
+    from pdf2image import convert_from_path, pdfinfo_from_path
     from PIL import Image
+    import numpy as np
     import io
     PDF2IMAGE_AVAILABLE = True
 except ImportError as e:
@@ -29,10 +35,27 @@ except ImportError as e:
 
 logger = logging.getLogger(__name__)
 
+# Разрешение растеризации страниц для OCR
+PDF_RENDER_DPI = 300
+
+# Конвейерная обработка: страницы растеризуются по одной в фоновых потоках,
+# пока модель распознает предыдущие. Число потоков ограничивает и память
+# (в памяти одновременно не больше PDF_PIPELINE_WORKERS + 1 изображений)
+PDF_PIPELINE_ENABLED = os.getenv('PDF_PIPELINE_ENABLED', '1') == '1'
+PDF_PIPELINE_WORKERS = max(1, int(os.getenv('PDF_PIPELINE_WORKERS', '2')))
+
+# Количество прогретых pipeline в пуле (каждый держит свою копию модели в памяти)
+# и загрузка моделей при старте сервера
+PDF_PROCESSOR_POOL_SIZE = max(1, int(os.getenv('PDF_PROCESSOR_POOL_SIZE', '1')))
+PDF_PRELOAD_ON_STARTUP = os.getenv('PDF_PRELOAD_ON_STARTUP', '0') == '1'
+
 
 class PDFAIProcessor:
     """Класс для обработки PDF файлов с помощью PaddleOCR-VL"""
     
+    # Версия процессора для ключа кэша результатов (менять при изменении модели или обработки)
+    CACHE_VERSION = f'PaddleOCR-VL-0.9B/dpi{PDF_RENDER_DPI}/v1'
+    
     def __init__(self):
         """
         Инициализация процессора PDF
@@ -56,12 +79,14 @@ class PDFAIProcessor:
             self.pipeline = None
             raise
     
-    def process_pdf_file(self, pdf_path: Union[str, Path]) -> Dict[str, Any]:
+    def process_pdf_file(self, pdf_path: Union[str, Path], pipelined: Optional[bool] = None) -> Dict[str, Any]:
         """
         Обработка PDF файла и извлечение всех данных
         
         Args:
             pdf_path: Путь к PDF файлу
+            pipelined: Конвейерный режим (по умолчанию PDF_PIPELINE_ENABLED):
+                       страницы растеризуются лениво и передаются в модель из памяти
             
         Returns:
             Словарь с извлеченными данными:
@@ -83,16 +108,25 @@ class PDFAIProcessor:
         
         logger.info(f"📄 Обработка PDF: {pdf_path.name}")
         
+        if pipelined is None:
+            pipelined = PDF_PIPELINE_ENABLED
+        
         try:
-            # Конвертируем PDF в изображения (по одной странице)
-            logger.info("Конвертация PDF в изображения...")
-            images = convert_from_path(str(pdf_path), dpi=300)
+            if pipelined:
+                page_count = pdfinfo_from_path(str(pdf_path))['Pages']
+                pages = self._iter_pages_pipelined(pdf_path, page_count)
+            else:
+                # Конвертируем PDF в изображения (весь документ сразу)
+                logger.info("Конвертация PDF в изображения...")
+                images = convert_from_path(str(pdf_path), dpi=PDF_RENDER_DPI)
+                page_count = len(images)
+                pages = self._iter_pages_sequential(images)
             
             all_results = {
                 'file_name': pdf_path.name,
                 'file_path': str(pdf_path),
                 'file_size': pdf_path.stat().st_size,
-                'pages': len(images),
+                'pages': page_count,
                 'text': '',
                 'tables': [],
                 'formulas': [],
@@ -110,34 +144,16 @@ class PDFAIProcessor:
             }
             
             # Обрабатываем каждую страницу
-            for page_num, image in enumerate(images, 1):
-                logger.info(f"Обработка страницы {page_num}/{len(images)}...")
+            for page_num, output in pages:
+                # Извлекаем данные из результата
+                page_data = self._extract_page_data(output, page_num)
+                all_results['pages_data'].append(page_data)
                 
-                try:
-                    # Сохраняем изображение во временный файл
-                    temp_image_path = f"/tmp/page_{page_num}.png"
-                    image.save(temp_image_path, 'PNG')
-                    
-                    # Обрабатываем через PaddleOCR-VL
-                    output = self.pipeline.predict(temp_image_path)
-                    
-                    # Извлекаем данные из результата
-                    page_data = self._extract_page_data(output, page_num)
-                    all_results['pages_data'].append(page_data)
-                    
-                    # Объединяем данные со всех страниц
-                    all_results['text'] += page_data.get('text', '') + '\n\n'
-                    all_results['tables'].extend(page_data.get('tables', []))
-                    all_results['formulas'].extend(page_data.get('formulas', []))
-                    all_results['charts'].extend(page_data.get('charts', []))
-                    
-                    # Удаляем временный файл
-                    if os.path.exists(temp_image_path):
-                        os.remove(temp_image_path)
-                        
-                except Exception as e:
-                    logger.error(f"Ошибка обработки страницы {page_num}: {e}")
-                    continue
+                # Объединяем данные со всех страниц
+                all_results['text'] += page_data.get('text', '') + '\n\n'
+                all_results['tables'].extend(page_data.get('tables', []))
+                all_results['formulas'].extend(page_data.get('formulas', []))
+                all_results['charts'].extend(page_data.get('charts', []))
             
             logger.info(f"✅ PDF обработан успешно: {len(all_results['text'])} символов текста, "
                        f"{len(all_results['tables'])} таблиц, {len(all_results['formulas'])} формул")
@@ -148,6 +164,79 @@ class PDFAIProcessor:
             logger.error(f"❌ Ошибка обработки PDF: {e}")
             raise
     
+    def _iter_pages_sequential(self, images: List[Any]):
+        """
+        Распознавание заранее растеризованных страниц через временные файлы
+        
+        Yields:
+            (номер страницы, результат PaddleOCR-VL)
+        """
+        for page_num, image in enumerate(images, 1):
+            logger.info(f"Обработка страницы {page_num}/{len(images)}...")
+            
+            try:
+                # Сохраняем изображение во временный файл
+                temp_image_path = f"/tmp/page_{page_num}.png"
+                image.save(temp_image_path, 'PNG')
+                
+                # Обрабатываем через PaddleOCR-VL
+                output = self.pipeline.predict(temp_image_path)
+                
+                # Удаляем временный файл
+                if os.path.exists(temp_image_path):
+                    os.remove(temp_image_path)
+                
+                yield page_num, output
+                    
+            except Exception as e:
+                logger.error(f"Ошибка обработки страницы {page_num}: {e}")
+                continue
+    
+    def _iter_pages_pipelined(self, pdf_path: Path, page_count: int):
+        """
+        Конвейерное распознавание: растеризация следующих страниц идет в пуле
+        потоков параллельно с распознаванием текущей
+        
+        Yields:
+            (номер страницы, результат PaddleOCR-VL)
+        """
+        with ThreadPoolExecutor(max_workers=PDF_PIPELINE_WORKERS, thread_name_prefix='pdf-render') as executor:
+            rendering = deque()
+            next_page = 1
+            
+            # Заполняем окно предварительной растеризации
+            while next_page <= page_count and len(rendering) < PDF_PIPELINE_WORKERS:
+                rendering.append((next_page, executor.submit(self._render_page, pdf_path, next_page)))
+                next_page += 1
+            
+            while rendering:
+                page_num, future = rendering.popleft()
+                if next_page <= page_count:
+                    rendering.append((next_page, executor.submit(self._render_page, pdf_path, next_page)))
+                    next_page += 1
+                
+                logger.info(f"Обработка страницы {page_num}/{page_count}...")
+                try:
+                    image = future.result()
+                    # Передаем изображение в модель из памяти (без временных файлов)
+                    output = self.pipeline.predict(image)
+                    del image
+                    yield page_num, output
+                except Exception as e:
+                    logger.error(f"Ошибка обработки страницы {page_num}: {e}")
+                    continue
+    
+    @staticmethod
+    def _render_page(pdf_path: Path, page_num: int) -> Any:
+        """Растеризация одной страницы в массив BGR (формат входа PaddleOCR-VL)"""
+        images = convert_from_path(str(pdf_path), dpi=PDF_RENDER_DPI, first_page=page_num, last_page=page_num)
+        if not images:
+            raise ValueError(f"Не удалось растеризовать страницу {page_num}")
+        image = images[0].convert('RGB')
+        array = np.ascontiguousarray(np.asarray(image)[:, :, ::-1])
+        image.close()
+        return array
+    
     def _extract_page_data(self, output: Any, page_num: int) -> Dict[str, Any]:
         """
         Извлечение данных из результата PaddleOCR-VL
@@ -285,36 +374,179 @@ class PDFAIProcessor:
         logger.info(f"💾 Результаты сохранены в: {output_path}")
 
 
-# Глобальный экземпляр процессора (ленивая инициализация)
-_processor_instance = None
-_initialization_lock = False
-
-
-def get_pdf_processor() -> PDFAIProcessor:
+class PDFProcessorPool:
     """
-    Получить глобальный экземпляр PDF процессора (singleton)
-    Инициализация происходит только при первом вызове
+    Пул прогретых процессоров PaddleOCR-VL
     
-    Returns:
-        Экземпляр PDFAIProcessor
+    Каждый процессор владеет своим pipeline, поэтому параллельные запросы
+    распознаются одновременно (до size штук), а не по очереди через один pipeline.
+    Процессоры создаются лениво до размера пула или все сразу через warm_up().
+    
+    Пул повторяет интерфейс PDFAIProcessor (process_pdf_file и т.д.):
+    каждый вызов берет процессор из пула и возвращает его обратно.
     """
-    global _processor_instance, _initialization_lock
     
-    if _processor_instance is None and not _initialization_lock:
+    def __init__(self, size: int = 1):
+        """
+        Args:
+            size: Количество процессоров (каждый загружает свою копию модели)
+        """
+        self.size = max(1, size)
+        self._idle: "queue.Queue[PDFAIProcessor]" = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def loaded(self) -> int:
+        """Количество загруженных процессоров"""
+        return self._created
+    
+    def warm_up(self, count: Optional[int] = None) -> int:
+        """
+        Загрузить модели заранее (например, при старте сервера)
+        
+        Args:
+            count: Сколько процессоров загрузить (по умолчанию - весь пул)
+            
+        Returns:
+            Количество загруженных процессоров
+        """
+        target = min(self.size, count or self.size)
+        while True:
+            processor = self._create_if_allowed(limit=target)
+            if processor is None:
+                break
+            self._idle.put(processor)
+        return self._created
+    
+    def _create_if_allowed(self, limit: int) -> Optional[PDFAIProcessor]:
+        """Создать новый процессор, если пул еще не заполнен до limit"""
+        with self._lock:
+            if self._created >= limit:
+                return None
+            # Резервируем место до загрузки модели, чтобы не загрузить лишнюю копию
+            self._created += 1
+            number = self._created
+        
         try:
-            _initialization_lock = True
-            logger.info("Инициализация PaddleOCR-VL (первый запуск, загрузка моделей может занять время)...")
-            _processor_instance = PDFAIProcessor()
-            logger.info("✅ PaddleOCR-VL готов к работе!")
+            logger.info(f"Инициализация PaddleOCR-VL {number}/{self.size} (загрузка моделей может занять время)...")
+            processor = PDFAIProcessor()
+            logger.info(f"✅ PaddleOCR-VL {number}/{self.size} готов к работе!")
+            return processor
         except Exception as e:
             logger.error(f"Ошибка инициализации PaddleOCR-VL: {e}")
-            _initialization_lock = False
+            with self._lock:
+                self._created -= 1
             raise
+    
+    def acquire(self, timeout: Optional[float] = None) -> PDFAIProcessor:
+        """
+        Взять процессор из пула (обязательно вернуть через release)
+        
+        Args:
+            timeout: Сколько ждать свободный процессор (None - без ограничения)
+        """
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        
+        processor = self._create_if_allowed(limit=self.size)
+        if processor is not None:
+            return processor
+        
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("Нет свободного процессора PaddleOCR-VL")
+    
+    def release(self, processor: PDFAIProcessor):
+        """Вернуть процессор в пул"""
+        self._idle.put(processor)
+    
+    @contextmanager
+    def checkout(self, timeout: Optional[float] = None):
+        """Контекстный менеджер: with pool.checkout() as processor: ..."""
+        processor = self.acquire(timeout)
+        try:
+            yield processor
         finally:
-            _initialization_lock = False
+            self.release(processor)
+    
+    def stats(self) -> Dict[str, int]:
+        """Состояние пула"""
+        idle = self._idle.qsize()
+        return {'size': self.size, 'loaded': self._created, 'idle': idle, 'busy': self._created - idle}
     
-    if _processor_instance is None:
-        raise RuntimeError("PaddleOCR-VL не инициализирован")
+    def process_pdf_file(self, pdf_path: Union[str, Path], **kwargs) -> Dict[str, Any]:
+        """Обработка PDF файла свободным процессором из пула"""
+        with self.checkout() as processor:
+            return processor.process_pdf_file(pdf_path, **kwargs)
+    
+    def process_pdf_url(self, pdf_url: str) -> Dict[str, Any]:
+        """Обработка PDF по URL свободным процессором из пула"""
+        with self.checkout() as processor:
+            return processor.process_pdf_url(pdf_url)
     
-    return _processor_instance
+    def extract_text_only(self, pdf_path: Union[str, Path]) -> str:
+        """Извлечение только текста свободным процессором из пула"""
+        with self.checkout() as processor:
+            return processor.extract_text_only(pdf_path)
+    
+    def extract_tables_only(self, pdf_path: Union[str, Path]) -> List[Dict]:
+        """Извлечение только таблиц свободным процессором из пула"""
+        with self.checkout() as processor:
+            return processor.extract_tables_only(pdf_path)
+
+
+# Глобальный пул процессоров (ленивая инициализация)
+_processor_pool: Optional[PDFProcessorPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pdf_processor_pool() -> PDFProcessorPool:
+    """
+    Получить глобальный пул процессоров PaddleOCR-VL
+    Размер задается PDF_PROCESSOR_POOL_SIZE, модели загружаются при первом запросе
+    или заранее через warm_up()
+    
+    Returns:
+        Экземпляр PDFProcessorPool
+    """
+    global _processor_pool
+    
+    if _processor_pool is None:
+        with _pool_lock:
+            if _processor_pool is None:
+                _processor_pool = PDFProcessorPool(PDF_PROCESSOR_POOL_SIZE)
+    
+    return _processor_pool
+
 
+def get_pdf_processor() -> PDFProcessorPool:
+    """
+    Получить глобальный PDF процессор
+    Возвращает пул с интерфейсом PDFAIProcessor: каждый вызов обработки
+    выполняется свободным прогретым процессором
+    
+    Returns:
+        Экземпляр PDFProcessorPool
+    """
+    return get_pdf_processor_pool()
+
+
+if __name__ == "__main__":
+    # Предзагрузка моделей: python3 pdf_ai_processor.py [количество процессоров]
+    import sys
+    
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    
+    try:
+        pool = get_pdf_processor_pool()
+        loaded = pool.warm_up(count)
+        print(f"✅ PaddleOCR-VL загружен ({loaded} из {pool.size}), модели готовы к использованию")
+        sys.exit(0)
+    except Exception as e:
+        print(f"❌ Ошибка: {e}")
+        sys.exit(1)
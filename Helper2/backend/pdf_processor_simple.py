@@ -26,6 +26,9 @@ logger = logging.getLogger(__name__)
 class SimplePDFProcessor:
     """Упрощенный класс для обработки PDF файлов"""
     
+    # Версия процессора для ключа кэша результатов (менять при изменении обработки)
+    CACHE_VERSION = 'SimplePDFProcessor/v2'
+    
     def __init__(self):
         """Инициализация процессора PDF"""
         if not PDF2IMAGE_AVAILABLE:
@@ -36,6 +39,9 @@ class SimplePDFProcessor:
         """
         Обработка PDF файла и извлечение данных
         
+        Текст, метаданные и число страниц читаются за один проход через один PdfReader.
+        Страницы не растеризуются - изображения для OCR возвращает render_pages().
+        
         Args:
             pdf_path: Путь к PDF файлу
             
@@ -49,20 +55,19 @@ class SimplePDFProcessor:
         logger.info(f"📄 Обработка PDF: {pdf_path.name}")
         
         try:
-            # Извлекаем текст через pypdf
-            text_content = self._extract_text_with_pypdf(pdf_path)
-            
-            # Получаем метаданные
-            metadata = self._extract_metadata(pdf_path)
+            with open(pdf_path, 'rb') as file:
+                pdf_reader = pypdf.PdfReader(file)
+                metadata = self._extract_metadata(pdf_reader)
+                pages_data = self._extract_pages(pdf_reader)
             
-            # Конвертируем в изображения для будущего OCR
-            images = convert_from_path(str(pdf_path), dpi=200)
+            page_count = len(pages_data)
+            text_content = self._join_pages_text(pages_data)
             
             results = {
                 'file_name': pdf_path.name,
                 'file_path': str(pdf_path),
                 'file_size': pdf_path.stat().st_size,
-                'pages': len(images),
+                'pages': page_count,
                 'text': text_content,
                 'tables': [],  # Будет добавлено при интеграции PaddleOCR
                 'formulas': [],  # Будет добавлено при интеграции PaddleOCR
@@ -70,7 +75,7 @@ class SimplePDFProcessor:
                 'structure': {
                     'headings': self._extract_headings(text_content),
                     'sections': [],
-                    'page_breaks': list(range(1, len(images) + 1))
+                    'page_breaks': list(range(1, page_count + 1))
                 },
                 'metadata': {
                     **metadata,
@@ -78,77 +83,89 @@ class SimplePDFProcessor:
                     'processor': 'SimplePDFProcessor',
                     'note': 'Для полной функциональности (таблицы, формулы, OCR) установите PaddleOCR-VL'
                 },
-                'pages_data': [
-                    {
-                        'page_number': i + 1,
-                        'text': self._extract_page_text(pdf_path, i + 1),
-                        'has_images': True
-                    }
-                    for i in range(len(images))
-                ]
+                'pages_data': pages_data
             }
             
-            logger.info(f"✅ PDF обработан: {len(text_content)} символов текста, {len(images)} страниц")
+            logger.info(f"✅ PDF обработан: {len(text_content)} символов текста, {page_count} страниц")
             return results
             
         except Exception as e:
             logger.error(f"❌ Ошибка обработки PDF: {e}")
             raise
     
-    def _extract_text_with_pypdf(self, pdf_path: Path) -> str:
-        """Извлечение текста через pypdf"""
-        text_parts = []
+    def render_pages(self, pdf_path: Union[str, Path], dpi: int = 200,
+                     first_page: Optional[int] = None, last_page: Optional[int] = None) -> List[Any]:
+        """
+        Растеризация страниц PDF (отдельный этап, нужен только для OCR)
         
-        try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = pypdf.PdfReader(file)
-                
-                for page_num, page in enumerate(pdf_reader.pages, 1):
-                    try:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text_parts.append(f"--- Страница {page_num} ---\n{page_text}\n")
-                    except Exception as e:
-                        logger.warning(f"Ошибка извлечения текста со страницы {page_num}: {e}")
-                        continue
-        except Exception as e:
-            logger.error(f"Ошибка чтения PDF: {e}")
-            raise
+        Args:
+            pdf_path: Путь к PDF файлу
+            dpi: Разрешение
+            first_page: Первая страница (по умолчанию - с начала)
+            last_page: Последняя страница (по умолчанию - до конца)
+            
+        Returns:
+            Список изображений PIL
+        """
+        return convert_from_path(str(pdf_path), dpi=dpi, first_page=first_page, last_page=last_page)
+    
+    def _extract_pages(self, pdf_reader: Any) -> List[Dict[str, Any]]:
+        """Извлечение текста всех страниц из уже открытого PdfReader"""
+        pages_data = []
         
+        for page_num, page in enumerate(pdf_reader.pages, 1):
+            try:
+                page_text = page.extract_text() or ""
+            except Exception as e:
+                logger.warning(f"Ошибка извлечения текста со страницы {page_num}: {e}")
+                page_text = ""
+            
+            pages_data.append({
+                'page_number': page_num,
+                'text': page_text,
+                'has_images': self._page_has_images(page)
+            })
+        
+        return pages_data
+    
+    @staticmethod
+    def _join_pages_text(pages_data: List[Dict[str, Any]]) -> str:
+        """Объединение текста страниц с разделителями"""
+        text_parts = [
+            f"--- Страница {page_data['page_number']} ---\n{page_data['text']}\n"
+            for page_data in pages_data
+            if page_data['text']
+        ]
         return "\n".join(text_parts)
     
-    def _extract_page_text(self, pdf_path: Path, page_num: int) -> str:
-        """Извлечение текста с конкретной страницы"""
+    @staticmethod
+    def _page_has_images(page: Any) -> bool:
+        """Есть ли на странице изображения (по ресурсам страницы, без их декодирования)"""
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = pypdf.PdfReader(file)
-                if page_num <= len(pdf_reader.pages):
-                    return pdf_reader.pages[page_num - 1].extract_text() or ""
-        except Exception as e:
-            logger.warning(f"Ошибка извлечения текста со страницы {page_num}: {e}")
-        return ""
+            resources = page.get('/Resources') or {}
+            xobjects = resources.get('/XObject') or {}
+            return any(xobject.get_object().get('/Subtype') == '/Image' for xobject in xobjects.values())
+        except Exception:
+            return False
     
-    def _extract_metadata(self, pdf_path: Path) -> Dict[str, Any]:
-        """Извлечение метаданных PDF"""
+    def _extract_metadata(self, pdf_reader: Any) -> Dict[str, Any]:
+        """Извлечение метаданных PDF из уже открытого PdfReader"""
         metadata = {}
         
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = pypdf.PdfReader(file)
-                
-                if pdf_reader.metadata:
-                    metadata = {
-                        'title': pdf_reader.metadata.get('/Title', ''),
-                        'author': pdf_reader.metadata.get('/Author', ''),
-                        'subject': pdf_reader.metadata.get('/Subject', ''),
-                        'creator': pdf_reader.metadata.get('/Creator', ''),
-                        'producer': pdf_reader.metadata.get('/Producer', ''),
-                        'creation_date': str(pdf_reader.metadata.get('/CreationDate', '')),
-                        'modification_date': str(pdf_reader.metadata.get('/ModDate', ''))
-                    }
-                
-                metadata['total_pages'] = len(pdf_reader.pages)
-                metadata['is_encrypted'] = pdf_reader.is_encrypted
+            if pdf_reader.metadata:
+                metadata = {
+                    'title': pdf_reader.metadata.get('/Title', ''),
+                    'author': pdf_reader.metadata.get('/Author', ''),
+                    'subject': pdf_reader.metadata.get('/Subject', ''),
+                    'creator': pdf_reader.metadata.get('/Creator', ''),
+                    'producer': pdf_reader.metadata.get('/Producer', ''),
+                    'creation_date': str(pdf_reader.metadata.get('/CreationDate', '')),
+                    'modification_date': str(pdf_reader.metadata.get('/ModDate', ''))
+                }
+            
+            metadata['total_pages'] = len(pdf_reader.pages)
+            metadata['is_encrypted'] = pdf_reader.is_encrypted
         except Exception as e:
             logger.warning(f"Ошибка извлечения метаданных: {e}")
         
@@ -196,9 +213,10 @@ class SimplePDFProcessor:
             raise
     
     def extract_text_only(self, pdf_path: Union[str, Path]) -> str:
-        """Извлечение только текста"""
-        result = self.process_pdf_file(pdf_path)
-        return result.get('text', '')
+        """Извлечение только текста (быстрый режим: один проход pypdf, без растеризации)"""
+        with open(pdf_path, 'rb') as file:
+            pdf_reader = pypdf.PdfReader(file)
+            return self._join_pages_text(self._extract_pages(pdf_reader))
     
     def extract_tables_only(self, pdf_path: Union[str, Path]) -> List[Dict]:
         """Извлечение таблиц (пока возвращает пустой список, требует PaddleOCR)"""
@@ -0,0 +1,223 @@
+"""
+Кэш результатов обработки PDF на диске
+Ключ - SHA-256 содержимого PDF + версия процессора/модели + режим извлечения.
+Повторная обработка тех же смет и актов возвращается из кэша без OCR.
+Размер кэша ограничен, старые записи удаляются по принципу LRU.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional, Callable, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Директория кэша и его максимальный размер (можно переопределить в .env)
+PDF_CACHE_DIR = Path(os.getenv('PDF_CACHE_DIR', str(Path(__file__).parent / 'cache' / 'pdf_results')))
+PDF_CACHE_MAX_MB = float(os.getenv('PDF_CACHE_MAX_MB', '512'))
+
+# Размер блока при вычислении хэша и скачивании
+_CHUNK_SIZE = 1024 * 1024
+
+
+def _json_default(value: Any) -> Any:
+    """Сериализация значений, которые не поддерживает json (numpy массивы и т.п.)"""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+
+class PDFResultCache:
+    """Content-addressed кэш результатов обработки PDF"""
+
+    def __init__(self, cache_dir: Union[str, Path] = PDF_CACHE_DIR, max_mb: float = PDF_CACHE_MAX_MB):
+        """
+        Args:
+            cache_dir: Директория для хранения результатов
+            max_mb: Максимальный размер кэша в мегабайтах
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def file_sha256(pdf_path: Union[str, Path]) -> str:
+        """SHA-256 содержимого файла (читается блоками)"""
+        digest = hashlib.sha256()
+        with open(pdf_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def make_key(content_hash: str, processor_version: str, variant: str = 'full') -> str:
+        """
+        Ключ кэша
+
+        Args:
+            content_hash: SHA-256 содержимого PDF
+            processor_version: Процессор и версия модели (например, 'PaddleOCR-VL-0.9B/dpi300')
+            variant: Режим извлечения (набор флагов, влияющих на обработку)
+        """
+        suffix = hashlib.sha256(f"{processor_version}|{variant}".encode('utf-8')).hexdigest()[:16]
+        return f"{content_hash}-{suffix}"
+
+    def _path(self, key: str) -> Path:
+        # Раскладываем по подпапкам, чтобы не держать тысячи файлов в одной директории
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Получить результат из кэша (None, если его нет)"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                results = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Поврежденная запись кэша PDF {key}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+        # Отмечаем использование (время изменения файла = время последнего доступа для LRU)
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return results
+
+    def put(self, key: str, results: Dict[str, Any]):
+        """Сохранить результат в кэш"""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Пишем во временный файл и атомарно переименовываем
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, default=_json_default)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self.evict()
+
+    def evict(self) -> int:
+        """
+        Удалить давно не использованные записи, пока размер кэша превышает лимит
+
+        Returns:
+            Количество удаленных записей
+        """
+        with self._lock:
+            entries = []
+            total_size = 0
+            for path in self.cache_dir.glob('*/*.json'):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total_size += stat.st_size
+
+            if total_size <= self.max_bytes:
+                return 0
+
+            removed = 0
+            for _, size, path in sorted(entries):
+                if total_size <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total_size -= size
+                removed += 1
+
+        logger.info(f"🧹 Кэш PDF: удалено {removed} записей")
+        return removed
+
+    def clear(self):
+        """Очистить кэш полностью"""
+        with self._lock:
+            for path in self.cache_dir.glob('*/*.json'):
+                path.unlink(missing_ok=True)
+
+
+# Глобальный экземпляр
+_cache_instance = None
+
+
+def get_pdf_result_cache() -> PDFResultCache:
+    """Получить глобальный экземпляр кэша результатов PDF"""
+    global _cache_instance
+    if _cache_instance is None:
+        _cache_instance = PDFResultCache()
+    return _cache_instance
+
+
+def process_pdf_cached(pdf_path: Union[str, Path], get_processor: Callable[[], Any],
+                       processor_version: str, variant: str = 'full') -> Tuple[Dict[str, Any], bool]:
+    """
+    Обработка PDF с использованием кэша
+
+    Процессор создается только при промахе кэша, поэтому повторные запросы
+    не требуют загрузки моделей.
+
+    Args:
+        pdf_path: Путь к PDF файлу
+        get_processor: Функция, возвращающая процессор (get_pdf_processor / get_simple_pdf_processor)
+        processor_version: Версия процессора для ключа кэша
+        variant: Режим извлечения
+
+    Returns:
+        (результаты обработки, найдено ли в кэше)
+    """
+    pdf_path = Path(pdf_path)
+    cache = get_pdf_result_cache()
+    key = cache.make_key(cache.file_sha256(pdf_path), processor_version, variant)
+
+    results = cache.get(key)
+    if results is not None:
+        logger.info(f"⚡ Результат обработки PDF найден в кэше: {pdf_path.name}")
+        hit = True
+    else:
+        results = get_processor().process_pdf_file(pdf_path)
+        cache.put(key, results)
+        hit = False
+
+    # Имя и путь файла относятся к текущему запросу, а не к закэшированному
+    results['file_name'] = pdf_path.name
+    results['file_path'] = str(pdf_path)
+    return results, hit
+
+
+def process_pdf_url_cached(pdf_url: str, get_processor: Callable[[], Any],
+                           processor_version: str, variant: str = 'full') -> Tuple[Dict[str, Any], bool]:
+    """
+    Обработка PDF по URL с использованием кэша
+    PDF скачивается во временный файл, ключ кэша считается по его содержимому
+
+    Returns:
+        (результаты обработки, найдено ли в кэше)
+    """
+    import requests
+
+    logger.info(f"📥 Загрузка PDF по URL: {pdf_url}")
+
+    with requests.get(pdf_url, timeout=30, stream=True) as response:
+        response.raise_for_status()
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
+            for chunk in response.iter_content(chunk_size=_CHUNK_SIZE):
+                tmp_file.write(chunk)
+            tmp_path = tmp_file.name
+
+    try:
+        return process_pdf_cached(tmp_path, get_processor, processor_version, variant)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -17,6 +17,8 @@ from pathlib import Path
 import requests
 import tempfile
 import shutil
+import asyncio
+import zipfile
 
 # Загружаем переменные окружения из .env файла
 # Указываем явный путь к файлу .env в директории backend
@@ -27,14 +29,22 @@ from smart_document_generator import SmartDocumentGenerator
 from learning_document_generator import LearningDocumentGenerator
 from local_learning_generator import LocalLearningGenerator
 from supabase_learning_generator import SupabaseLearningGenerator
-from yandex_disk_api import get_folder_contents, get_download_link, download_file, format_file_size, format_date, get_yandex_disk_folder_path, get_yandex_disk_public_key, get_public_view_link
+from command_store import CommandStore
+from command_notifier import get_command_notifier
+from document_worker_pool import get_document_worker_pool
+from pdf_result_cache import process_pdf_cached, process_pdf_url_cached
+from yandex_disk_api import format_file_size, format_date, get_yandex_disk_folder_path, get_yandex_disk_public_key, get_public_view_link
+from yandex_disk_client import get_folder_contents_async, get_download_link_async, invalidate_listing_cache, close_async_client, open_file_stream, STREAM_CHUNK_SIZE, PROXY_RESPONSE_HEADERS
 from fastapi.responses import StreamingResponse, Response
-from fastapi import UploadFile, File
-from io import BytesIO
+from fastapi import UploadFile, File, Request
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 
 # Импорт PDF AI процессора
 try:
-    from pdf_ai_processor import get_pdf_processor, PDFAIProcessor
+    from pdf_ai_processor import get_pdf_processor_pool, PDFAIProcessor, PADDLEOCR_AVAILABLE, PDF_PRELOAD_ON_STARTUP
+    if not PADDLEOCR_AVAILABLE:
+        raise ImportError("paddleocr не установлен")
     PDF_AI_AVAILABLE = True
     USE_PADDLEOCR = True
 except ImportError as e:
@@ -50,24 +60,19 @@ except ImportError as e:
         logger.info("✅ Используется упрощенный PDF процессор (без PaddleOCR)")
     except ImportError as e2:
         logger.warning(f"Упрощенный PDF процессор также не доступен: {e2}")
-import tempfile
-import shutil
-
-# Импорт PDF AI процессора
-try:
-    from pdf_ai_processor import get_pdf_processor, PDFAIProcessor
-    PDF_AI_AVAILABLE = True
-except ImportError as e:
-    logger.warning(f"PDF AI processor не доступен: {e}")
-    PDF_AI_AVAILABLE = False
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # In-memory хранилище для демонстрации
-commands_storage = []
-documents_storage = []
+commands_storage = CommandStore()
+documents_storage: Dict[str, Dict[str, Any]] = {}
+
+# Пакетная генерация документов (например, актов для всего дома)
+BATCH_COMMAND_TYPE = "batch_generate"
+BATCH_MAX_APARTMENTS = int(os.getenv('BATCH_MAX_APARTMENTS', '1000'))
+BATCH_ARCHIVE_DIR = os.path.join("documents", "batches")
 
 # Инициализация генераторов документов
 doc_generator = DocumentGenerator()
@@ -76,6 +81,9 @@ learning_doc_generator = LearningDocumentGenerator()
 local_learning_generator = LocalLearningGenerator()
 supabase_learning_generator = SupabaseLearningGenerator()
 
+# Пул потоков для генерации документов (DOCUMENT_WORKERS, DOCUMENT_QUEUE_SIZE)
+document_pool = get_document_worker_pool()
+
 # Модели данных
 class CommandCreate(BaseModel):
     type: str = Field(..., description="Тип команды: create_act, print_act, create_defect, print_defect_report, smart_act, smart_defect_report, smart_work_report")
@@ -96,6 +104,27 @@ class CommandUpdate(BaseModel):
     result_url: Optional[str] = None
     error_message: Optional[str] = None
 
+class CommandBulkUpdate(CommandUpdate):
+    id: str
+
+class BatchCommandCreate(BaseModel):
+    type: str = Field(..., description="Тип документа для каждой квартиры: create_act, smart_act, ...")
+    apartment_ids: List[str] = Field(..., description="Список квартир (например, вся секция дома)")
+    payload: Dict[str, Any] = Field(default_factory=dict, description="Общие параметры для всех документов")
+    created_by: Optional[str] = Field(None, description="ID пользователя")
+
+class BatchCommandStatus(BaseModel):
+    id: str
+    type: str
+    status: str
+    created_at: datetime
+    total: int
+    completed: int
+    failed: int
+    result_url: Optional[str] = None
+    error_message: Optional[str] = None
+    items: List[Dict[str, Any]] = []
+
 class CommandStatus(BaseModel):
     id: str
     type: str
@@ -157,6 +186,21 @@ def validate_payload(command_type: str, payload: Dict[str, Any]) -> bool:
         return all(field in payload for field in required_fields)
     return True
 
+@app.on_event("startup")
+async def startup_event():
+    """Предзагрузка моделей PaddleOCR-VL (если включена PDF_PRELOAD_ON_STARTUP)"""
+    if USE_PADDLEOCR and PDF_PRELOAD_ON_STARTUP:
+        import asyncio
+        pool = get_pdf_processor_pool()
+        loaded = await asyncio.get_running_loop().run_in_executor(None, pool.warm_up)
+        logger.info(f"PaddleOCR-VL pool warmed up: {loaded}/{pool.size}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Освобождение ресурсов при остановке"""
+    await close_async_client()
+    document_pool.shutdown(wait=False)
+
 # API Endpoints
 
 @app.get("/")
@@ -180,6 +224,8 @@ async def health_check():
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "storage": {
             "commands": len(commands_storage),
+            "commands_by_status": commands_storage.status_counts(),
+            "document_pool": document_pool.stats(),
             "documents": len(documents_storage)
         }
     }
@@ -190,6 +236,7 @@ async def create_command(
     background_tasks: BackgroundTasks
 ):
     """Создание новой команды"""
+    reserved = False
     try:
         # Валидация типа команды
         if not validate_command_type(command.type):
@@ -205,6 +252,14 @@ async def create_command(
                 detail="Invalid payload for command type"
             )
         
+        # Резервируем место в очереди генерации документов
+        if not document_pool.reserve():
+            raise HTTPException(
+                status_code=503,
+                detail="Очередь генерации документов переполнена, повторите позже"
+            )
+        reserved = True
+        
         # Создание команды
         command_id = str(uuid.uuid4())
         command_data = {
@@ -220,11 +275,14 @@ async def create_command(
             "attempt_count": 0
         }
         
-        commands_storage.append(command_data)
+        commands_storage.add(command_data)
         
         # Логирование
         logger.info(f"Command created: {command_id} of type {command.type}")
         
+        # Уведомляем агентов, ожидающих на /api/commands/wait
+        await get_command_notifier().publish(command_id)
+        
         # Запуск фоновой задачи для имитации обработки
         background_tasks.add_task(process_command, command_id)
         
@@ -242,22 +300,16 @@ async def create_command(
         raise
     except Exception as e:
         logger.error(f"Error creating command: {e}")
+        if reserved:
+            document_pool.release()
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.get("/api/commands/pending", response_model=List[CommandStatus])
 async def get_pending_commands(limit: int = 10):
     """Получение pending команд (для агента)"""
     try:
-        pending_commands = [
-            cmd for cmd in commands_storage 
-            if cmd['status'] == 'pending'
-        ]
-        
-        # Сортируем по дате создания
-        pending_commands.sort(key=lambda x: x['created_at'])
-        
-        # Ограничиваем количество
-        pending_commands = pending_commands[:limit]
+        # Очередь уже отсортирована по дате создания
+        pending_commands = commands_storage.pending(limit)
         
         commands = []
         for cmd in pending_commands:
@@ -278,11 +330,97 @@ async def get_pending_commands(limit: int = 10):
         logger.error(f"Error fetching pending commands: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@app.get("/api/commands/wait")
+async def wait_for_commands(since: Optional[int] = None, epoch: Optional[str] = None, timeout: float = 25):
+    """
+    Long-poll ожидание новых команд (для агента)
+    Запрос удерживается до появления новой команды или до истечения timeout
+    """
+    return await get_command_notifier().wait(since, epoch, timeout)
+
+@app.post("/api/commands/batch", response_model=BatchCommandStatus)
+async def create_batch_command(batch: BatchCommandCreate, background_tasks: BackgroundTasks):
+    """Пакетная генерация документов для списка квартир (результат - один ZIP)"""
+    if not validate_command_type(batch.type):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid command type. Must be one of: {', '.join(VALID_COMMAND_TYPES)}"
+        )
+    
+    apartment_ids = list(dict.fromkeys(str(apartment_id) for apartment_id in batch.apartment_ids))
+    if not apartment_ids:
+        raise HTTPException(status_code=400, detail="apartment_ids must not be empty")
+    if len(apartment_ids) > BATCH_MAX_APARTMENTS:
+        raise HTTPException(status_code=400, detail=f"Too many apartments (max {BATCH_MAX_APARTMENTS})")
+    
+    if not validate_payload(batch.type, {**batch.payload, 'apartment_id': apartment_ids[0]}):
+        raise HTTPException(status_code=400, detail="Invalid payload for command type")
+    
+    # Весь пакет занимает одно место в очереди, документы генерируются
+    # не более чем в document_pool.max_workers - 1 потоков одновременно
+    if not document_pool.reserve():
+        raise HTTPException(
+            status_code=503,
+            detail="Очередь генерации документов переполнена, повторите позже"
+        )
+    
+    command_id = str(uuid.uuid4())
+    command_data = {
+        "id": command_id,
+        "type": BATCH_COMMAND_TYPE,
+        "payload": {"document_type": batch.type, "apartment_ids": apartment_ids, "common": batch.payload},
+        # Сразу processing: пакет обрабатывает backend, он не должен попасть
+        # в /api/commands/pending и к офисным агентам
+        "status": "processing",
+        "created_by": batch.created_by,
+        "created_at": datetime.now(timezone.utc),
+        "processed_at": None,
+        "result_url": None,
+        "error_message": None,
+        "attempt_count": 0,
+        "archive_path": None,
+        "items": [
+            {"apartment_id": apartment_id, "status": "pending", "result_url": None, "error_message": None}
+            for apartment_id in apartment_ids
+        ]
+    }
+    commands_storage.add(command_data)
+    
+    logger.info(f"Batch command created: {command_id} ({batch.type} x {len(apartment_ids)})")
+    background_tasks.add_task(process_batch_command, command_id)
+    
+    return build_batch_status(command_data)
+
+@app.get("/api/commands/batch/{command_id}", response_model=BatchCommandStatus)
+async def get_batch_command(command_id: str):
+    """Прогресс пакетной генерации"""
+    command = commands_storage.get(command_id)
+    if not command or command['type'] != BATCH_COMMAND_TYPE:
+        raise HTTPException(status_code=404, detail="Batch command not found")
+    return build_batch_status(command)
+
+@app.get("/api/commands/batch/{command_id}/download")
+async def download_batch_archive(command_id: str):
+    """Скачивание ZIP со всеми документами пакета"""
+    command = commands_storage.get(command_id)
+    if not command or command['type'] != BATCH_COMMAND_TYPE:
+        raise HTTPException(status_code=404, detail="Batch command not found")
+    
+    archive_path = command.get('archive_path')
+    if not archive_path or not os.path.exists(archive_path):
+        raise HTTPException(status_code=404, detail="Archive is not ready")
+    
+    return FileResponse(
+        path=archive_path,
+        filename=f"{command['payload']['document_type']}_{command_id[:8]}.zip",
+        media_type='application/zip'
+    )
+
 @app.get("/api/commands/{command_id}", response_model=CommandResponse)
 async def get_command(command_id: str):
     """Получение команды по ID"""
     try:
-        command = next((cmd for cmd in commands_storage if cmd['id'] == command_id), None)
+        command = commands_storage.get(command_id)
         
         if not command:
             raise HTTPException(status_code=404, detail="Command not found")
@@ -308,25 +446,12 @@ async def update_command(command_id: str, update: CommandUpdate):
     """Обновление статуса команды (для агента)"""
     try:
         # Находим команду
-        command = next((cmd for cmd in commands_storage if cmd['id'] == command_id), None)
+        command = commands_storage.get(command_id)
         
         if not command:
             raise HTTPException(status_code=404, detail="Command not found")
         
-        # Обновляем команду
-        command['status'] = update.status
-        command['updated_at'] = datetime.now(timezone.utc)
-        
-        if update.status in ["done", "failed"]:
-            command['processed_at'] = datetime.now(timezone.utc)
-        
-        if update.result_url:
-            command['result_url'] = update.result_url
-            
-        if update.error_message:
-            command['error_message'] = update.error_message
-        
-        logger.info(f"Command {command_id} updated to status {update.status}")
+        await apply_command_update(command, update)
         
         return {"message": "Command updated successfully", "command_id": command_id}
         
@@ -336,11 +461,46 @@ async def update_command(command_id: str, update: CommandUpdate):
         logger.error(f"Error updating command {command_id}: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@app.patch("/api/commands")
+async def update_commands_bulk(updates: List[CommandBulkUpdate]):
+    """Пакетное обновление статусов команд (для агента, одним запросом)"""
+    updated = []
+    not_found = []
+    for update in updates:
+        command = commands_storage.get(update.id)
+        if not command:
+            not_found.append(update.id)
+            continue
+        await apply_command_update(command, update)
+        updated.append(update.id)
+    
+    return {"updated": updated, "not_found": not_found}
+
+async def apply_command_update(command: Dict[str, Any], update: CommandUpdate):
+    """Применение обновления статуса к команде"""
+    commands_storage.set_status(command, update.status)
+    command['updated_at'] = datetime.now(timezone.utc)
+    
+    if update.status in ["done", "failed"]:
+        command['processed_at'] = datetime.now(timezone.utc)
+    
+    if update.result_url:
+        command['result_url'] = update.result_url
+        
+    if update.error_message:
+        command['error_message'] = update.error_message
+    
+    logger.info(f"Command {command['id']} updated to status {update.status}")
+    
+    # Команда возвращена в очередь - агенты должны узнать о ней сразу
+    if update.status == "pending":
+        await get_command_notifier().publish(command['id'])
+
 @app.get("/api/commands/{command_id}/status")
 async def get_command_status(command_id: str):
     """Получение статуса команды (для мобильного приложения)"""
     try:
-        command = next((cmd for cmd in commands_storage if cmd['id'] == command_id), None)
+        command = commands_storage.get(command_id)
         
         if not command:
             raise HTTPException(status_code=404, detail="Command not found")
@@ -363,11 +523,8 @@ async def get_command_status(command_id: str):
 async def get_all_commands(limit: int = 50):
     """Получение всех команд (для отладки)"""
     try:
-        # Сортируем по дате создания (новые сначала)
-        sorted_commands = sorted(commands_storage, key=lambda x: x['created_at'], reverse=True)
-        
-        # Ограничиваем количество
-        sorted_commands = sorted_commands[:limit]
+        # Новые сначала
+        sorted_commands = commands_storage.recent(limit)
         
         return {
             "commands": sorted_commands,
@@ -384,7 +541,7 @@ async def download_document(document_id: str):
     """Скачивание сгенерированного документа"""
     try:
         # Находим документ
-        document = next((doc for doc in documents_storage if doc['id'] == document_id), None)
+        document = documents_storage.get(document_id)
         
         if not document:
             raise HTTPException(status_code=404, detail="Document not found")
@@ -445,12 +602,16 @@ def web_search(q: Optional[str] = None):
 @app.get("/api/yandex-disk/files")
 async def get_yandex_disk_files(folder_path: Optional[str] = None):
     """Получить список файлов из папки на Яндекс Диске (поддерживает публичные папки)"""
+    return await list_yandex_disk_files(folder_path, use_cache=True)
+
+async def list_yandex_disk_files(folder_path: Optional[str], use_cache: bool):
+    """Список файлов для frontend (из кэша или напрямую из API)"""
     try:
         # Нормализуем путь: убираем префикс "disk:" если есть
         if folder_path and folder_path.startswith('disk:'):
             folder_path = folder_path[5:]  # Убираем "disk:"
         
-        files = get_folder_contents(folder_path)
+        files = await get_folder_contents_async(folder_path, use_cache=use_cache)
         
         # Получаем публичный ключ, если используется публичная папка
         public_key = get_yandex_disk_public_key()
@@ -489,8 +650,38 @@ async def get_yandex_disk_files(folder_path: Optional[str] = None):
         logger.error(f"Error getting Yandex Disk files: {e}")
         raise HTTPException(status_code=500, detail=f"Ошибка получения файлов: {str(e)}")
 
+async def stream_yandex_disk_file(request: Request, file_path: str, public_key: Optional[str],
+                                  mime_type: str, headers: Dict[str, str]):
+    """
+    Потоковая передача файла с Яндекс Диска клиенту
+
+    Файл передается блоками, не загружаясь в память целиком. Заголовки Range и
+    If-None-Match передаются в хранилище, поэтому работают перемотка видео
+    и частичная загрузка PDF.
+    """
+    upstream = await open_file_stream(file_path, public_key=public_key, request_headers=request.headers)
+
+    headers = dict(headers)
+    for name in PROXY_RESPONSE_HEADERS:
+        if name in upstream.headers:
+            headers[name] = upstream.headers[name]
+
+    # Ответы без тела (304 Not Modified, 416 Range Not Satisfiable)
+    if upstream.status_code in (304, 416):
+        await upstream.aclose()
+        headers.pop('content-length', None)
+        return Response(status_code=upstream.status_code, headers=headers)
+
+    return StreamingResponse(
+        upstream.aiter_bytes(STREAM_CHUNK_SIZE),
+        status_code=upstream.status_code,
+        media_type=mime_type,
+        headers=headers,
+        background=BackgroundTask(upstream.aclose)
+    )
+
 @app.get("/api/yandex-disk/download")
-async def download_yandex_disk_file(file_path: str):
+async def download_yandex_disk_file(file_path: str, request: Request):
     """Скачать файл с Яндекс Диска (поддерживает публичные папки)"""
     try:
         # Нормализуем путь: убираем префикс "disk:" если есть
@@ -499,8 +690,6 @@ async def download_yandex_disk_file(file_path: str):
         
         # Получаем публичный ключ, если используется публичная папка
         public_key = get_yandex_disk_public_key()
-        # Получаем содержимое файла
-        file_content = download_file(file_path, public_key=public_key)
         
         # Извлекаем имя файла из пути
         file_name = os.path.basename(file_path)
@@ -532,15 +721,10 @@ async def download_yandex_disk_file(file_path: str):
             encoded_name = quote(file_name, safe='')
             content_disposition = f"attachment; filename*=UTF-8''{encoded_name}"
         
-        # Создаем поток для скачивания
-        file_stream = BytesIO(file_content)
-        
-        return StreamingResponse(
-            file_stream,
-            media_type=mime_type,
-            headers={
-                'Content-Disposition': content_disposition
-            }
+        # Передаем файл потоком (без загрузки в память)
+        return await stream_yandex_disk_file(
+            request, file_path, public_key, mime_type,
+            {'Content-Disposition': content_disposition}
         )
         
     except ValueError as e:
@@ -559,7 +743,7 @@ async def get_yandex_disk_download_link(file_path: str):
         
         # Получаем публичный ключ, если используется публичная папка
         public_key = get_yandex_disk_public_key()
-        download_url = get_download_link(file_path, public_key=public_key)
+        download_url = await get_download_link_async(file_path, public_key=public_key)
         return {
             'download_url': download_url,
             'file_path': file_path,
@@ -573,7 +757,7 @@ async def get_yandex_disk_download_link(file_path: str):
         raise HTTPException(status_code=500, detail=f"Ошибка получения ссылки: {str(e)}")
 
 @app.get("/api/yandex-disk/view")
-async def view_yandex_disk_file(file_path: str):
+async def view_yandex_disk_file(file_path: str, request: Request):
     """Просмотр файла с Яндекс Диска в браузере (поддерживает публичные папки)"""
     try:
         # Нормализуем путь: убираем префикс "disk:" если есть
@@ -586,9 +770,6 @@ async def view_yandex_disk_file(file_path: str):
         # Логируем для отладки
         logger.info(f"Viewing file: {file_path}, public_key: {public_key}")
         
-        # Получаем содержимое файла
-        file_content = download_file(file_path, public_key=public_key)
-        
         # Извлекаем имя файла из пути
         file_name = os.path.basename(file_path)
         
@@ -675,12 +856,8 @@ async def view_yandex_disk_file(file_path: str):
             headers['Access-Control-Allow-Headers'] = '*'
             headers['Cache-Control'] = 'public, max-age=3600'
         
-        # Используем Response вместо StreamingResponse для бинарных данных в памяти
-        return Response(
-            content=file_content,
-            media_type=mime_type,
-            headers=headers
-        )
+        # Передаем файл потоком с поддержкой Range (перемотка видео, частичная загрузка PDF)
+        return await stream_yandex_disk_file(request, file_path, public_key, mime_type, headers)
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -712,17 +889,87 @@ async def get_yandex_disk_view_link(file_path: str):
 
 @app.get("/api/yandex-disk/refresh")
 async def refresh_yandex_disk_files(folder_path: Optional[str] = None):
-    """Обновить список файлов из папки на Яндекс Диске (алиас для get_yandex_disk_files)"""
-    return await get_yandex_disk_files(folder_path)
+    """Обновить список файлов из папки на Яндекс Диске (в обход кэша)"""
+    if folder_path is None:
+        invalidate_listing_cache()
+    return await list_yandex_disk_files(folder_path, use_cache=False)
 
 # Фоновые задачи
+def generate_command_document(command_type: str, payload: Dict[str, Any]) -> Optional[str]:
+    """
+    Генерация документа для команды (блокирующая, выполняется в пуле потоков)
+    
+    Returns:
+        Путь к созданному документу
+    """
+    document_path = None
+    
+    # Проверяем, нужно ли использовать умный генератор (с реальными данными)
+    use_smart_generator = payload.get('meta', {}).get('use_real_data', True)
+    
+    if command_type == 'create_act':
+        # Используем профессиональный шаблон для создания актов
+        document_path = supabase_learning_generator.generate_professional_document('handover_act', payload)
+        logger.info(f"Generated professional handover act: {document_path}")
+        
+    elif command_type == 'create_defect':
+        # Используем профессиональный шаблон для создания отчетов о дефектах
+        document_path = supabase_learning_generator.generate_professional_document('defect_report', payload)
+        logger.info(f"Generated professional defect report: {document_path}")
+        
+    elif command_type == 'print_defect_report':
+        # Используем профессиональный шаблон для создания отчетов о работах
+        document_path = supabase_learning_generator.generate_professional_document('work_report', payload)
+        logger.info(f"Generated professional work report: {document_path}")
+        
+    elif command_type == 'create_letter':
+        # Используем профессиональный шаблон для создания писем
+        document_path = supabase_learning_generator.generate_professional_document('official_letter', payload)
+        logger.info(f"Generated professional letter: {document_path}")
+    
+    elif command_type == 'smart_act':
+        document_path = smart_doc_generator.generate_smart_handover_act(payload)
+        logger.info(f"Generated smart handover act: {document_path}")
+        
+    elif command_type == 'smart_defect_report':
+        document_path = smart_doc_generator.generate_smart_defect_report(payload)
+        logger.info(f"Generated smart defect report: {document_path}")
+        
+    elif command_type == 'smart_work_report':
+        document_path = smart_doc_generator.generate_smart_work_report(payload)
+        logger.info(f"Generated smart work report: {document_path}")
+    
+    elif command_type == 'learning_act':
+        # Используем Supabase генератор (использует примеры из Storage)
+        document_path = supabase_learning_generator.generate_based_on_supabase_examples('handover_act', payload)
+        logger.info(f"Generated Supabase learning-based handover act: {document_path}")
+        
+    elif command_type == 'learning_defect_report':
+        # Используем Supabase генератор (использует примеры из Storage)
+        document_path = supabase_learning_generator.generate_based_on_supabase_examples('defect_report', payload)
+        logger.info(f"Generated Supabase learning-based defect report: {document_path}")
+        
+    elif command_type == 'learning_work_report':
+        # Используем Supabase генератор (использует примеры из Storage)
+        document_path = supabase_learning_generator.generate_based_on_supabase_examples('work_report', payload)
+        logger.info(f"Generated Supabase learning-based work report: {document_path}")
+        
+    else:
+        # Для других типов команд генерируем общий отчет
+        if use_smart_generator:
+            document_path = smart_doc_generator.generate_smart_work_report(payload)
+            logger.info(f"Generated smart general report: {document_path}")
+        else:
+            document_path = doc_generator.generate_work_report(payload)
+            logger.info(f"Generated general report: {document_path}")
+    
+    return document_path
+
 async def process_command(command_id: str):
     """Реальная обработка команды с генерацией документов"""
-    import asyncio
-    
     try:
         # Находим команду
-        command = next((cmd for cmd in commands_storage if cmd['id'] == command_id), None)
+        command = commands_storage.get(command_id)
         
         if not command:
             logger.error(f"Command {command_id} not found for processing")
@@ -731,73 +978,11 @@ async def process_command(command_id: str):
         logger.info(f"Processing command {command_id} of type {command['type']}")
         
         # Обновляем статус на "processing"
-        command['status'] = 'processing'
+        commands_storage.set_status(command, 'processing')
         command['attempt_count'] += 1
         
-        # Имитируем небольшую задержку
-        await asyncio.sleep(1)
-        
-        # Генерируем документ в зависимости от типа команды
-        document_path = None
-        
-        # Проверяем, нужно ли использовать умный генератор (с реальными данными)
-        use_smart_generator = command['payload'].get('meta', {}).get('use_real_data', True)
-        
-        if command['type'] == 'create_act':
-            # Используем профессиональный шаблон для создания актов
-            document_path = supabase_learning_generator.generate_professional_document('handover_act', command['payload'])
-            logger.info(f"Generated professional handover act: {document_path}")
-            
-        elif command['type'] == 'create_defect':
-            # Используем профессиональный шаблон для создания отчетов о дефектах
-            document_path = supabase_learning_generator.generate_professional_document('defect_report', command['payload'])
-            logger.info(f"Generated professional defect report: {document_path}")
-            
-        elif command['type'] == 'print_defect_report':
-            # Используем профессиональный шаблон для создания отчетов о работах
-            document_path = supabase_learning_generator.generate_professional_document('work_report', command['payload'])
-            logger.info(f"Generated professional work report: {document_path}")
-            
-        elif command['type'] == 'create_letter':
-            # Используем профессиональный шаблон для создания писем
-            document_path = supabase_learning_generator.generate_professional_document('official_letter', command['payload'])
-            logger.info(f"Generated professional letter: {document_path}")
-        
-        elif command['type'] == 'smart_act':
-            document_path = smart_doc_generator.generate_smart_handover_act(command['payload'])
-            logger.info(f"Generated smart handover act: {document_path}")
-            
-        elif command['type'] == 'smart_defect_report':
-            document_path = smart_doc_generator.generate_smart_defect_report(command['payload'])
-            logger.info(f"Generated smart defect report: {document_path}")
-            
-        elif command['type'] == 'smart_work_report':
-            document_path = smart_doc_generator.generate_smart_work_report(command['payload'])
-            logger.info(f"Generated smart work report: {document_path}")
-        
-        elif command['type'] == 'learning_act':
-            # Используем Supabase генератор (использует примеры из Storage)
-            document_path = supabase_learning_generator.generate_based_on_supabase_examples('handover_act', command['payload'])
-            logger.info(f"Generated Supabase learning-based handover act: {document_path}")
-            
-        elif command['type'] == 'learning_defect_report':
-            # Используем Supabase генератор (использует примеры из Storage)
-            document_path = supabase_learning_generator.generate_based_on_supabase_examples('defect_report', command['payload'])
-            logger.info(f"Generated Supabase learning-based defect report: {document_path}")
-            
-        elif command['type'] == 'learning_work_report':
-            # Используем Supabase генератор (использует примеры из Storage)
-            document_path = supabase_learning_generator.generate_based_on_supabase_examples('work_report', command['payload'])
-            logger.info(f"Generated Supabase learning-based work report: {document_path}")
-            
-        else:
-            # Для других типов команд генерируем общий отчет
-            if use_smart_generator:
-                document_path = smart_doc_generator.generate_smart_work_report(command['payload'])
-                logger.info(f"Generated smart general report: {document_path}")
-            else:
-                document_path = doc_generator.generate_work_report(command['payload'])
-                logger.info(f"Generated general report: {document_path}")
+        # Генерируем документ в пуле потоков, чтобы не блокировать остальные запросы
+        document_path = await document_pool.run(generate_command_document, command['type'], command['payload'])
         
         if document_path and os.path.exists(document_path):
             # Создаем запись о документе
@@ -808,12 +993,12 @@ async def process_command(command_id: str):
                 'file_name': os.path.basename(document_path),
                 'created_at': datetime.now(timezone.utc)
             }
-            documents_storage.append(document_record)
+            documents_storage[document_record['id']] = document_record
             
             # Обновляем команду
-            command['status'] = 'done'
             command['processed_at'] = datetime.now(timezone.utc)
             command['result_url'] = f"/api/documents/{document_record['id']}/download"
+            commands_storage.set_status(command, 'done')
             
             logger.info(f"Command {command_id} processed successfully, document: {document_path}")
         else:
@@ -823,15 +1008,116 @@ async def process_command(command_id: str):
         logger.error(f"Error processing command {command_id}: {e}")
         
         # Обновляем статус на "failed"
-        command = next((cmd for cmd in commands_storage if cmd['id'] == command_id), None)
+        command = commands_storage.get(command_id)
         if command:
-            command['status'] = 'failed'
             command['error_message'] = str(e)
             command['processed_at'] = datetime.now(timezone.utc)
+            commands_storage.set_status(command, 'failed')
+    
+    finally:
+        # Освобождаем место в очереди генерации
+        document_pool.release()
+
+def build_batch_status(command: Dict[str, Any]) -> BatchCommandStatus:
+    """Прогресс пакетной команды"""
+    items = command['items']
+    return BatchCommandStatus(
+        id=command['id'],
+        type=command['payload']['document_type'],
+        status=command['status'],
+        created_at=command['created_at'],
+        total=len(items),
+        completed=sum(1 for item in items if item['status'] == 'done'),
+        failed=sum(1 for item in items if item['status'] == 'failed'),
+        result_url=command.get('result_url'),
+        error_message=command.get('error_message'),
+        items=items
+    )
+
+def build_batch_archive(command_id: str, document_paths: List[str]) -> str:
+    """Упаковка документов пакета в ZIP (docx уже сжаты, поэтому без повторного сжатия)"""
+    os.makedirs(BATCH_ARCHIVE_DIR, exist_ok=True)
+    archive_path = os.path.join(BATCH_ARCHIVE_DIR, f"batch_{command_id}.zip")
+    with zipfile.ZipFile(archive_path, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for document_path in document_paths:
+            archive.write(document_path, arcname=os.path.basename(document_path))
+    return archive_path
+
+async def process_batch_command(command_id: str):
+    """Пакетная генерация документов с отслеживанием прогресса"""
+    command = commands_storage.get(command_id)
+    try:
+        if not command:
+            logger.error(f"Batch command {command_id} not found for processing")
+            return
+        
+        command['attempt_count'] += 1
+        
+        document_type = command['payload']['document_type']
+        common_payload = command['payload']['common']
+        
+        # Один поток пула оставляем одиночным командам (если потоков больше одного)
+        semaphore = asyncio.Semaphore(max(1, document_pool.max_workers - 1))
+        document_paths = []
+        
+        async def generate_item(item: Dict[str, Any]):
+            async with semaphore:
+                try:
+                    payload = {**common_payload, 'apartment_id': item['apartment_id']}
+                    document_path = await document_pool.run(generate_command_document, document_type, payload)
+                    if not document_path or not os.path.exists(document_path):
+                        raise Exception("Failed to generate document")
+                    
+                    document_record = {
+                        'id': str(uuid.uuid4()),
+                        'command_id': command_id,
+                        'file_path': document_path,
+                        'file_name': os.path.basename(document_path),
+                        'created_at': datetime.now(timezone.utc)
+                    }
+                    documents_storage[document_record['id']] = document_record
+                    document_paths.append(document_path)
+                    
+                    item['result_url'] = f"/api/documents/{document_record['id']}/download"
+                    item['status'] = 'done'
+                except Exception as e:
+                    logger.error(f"Batch {command_id}: apartment {item['apartment_id']} failed: {e}")
+                    item['error_message'] = str(e)
+                    item['status'] = 'failed'
+        
+        await asyncio.gather(*(generate_item(item) for item in command['items']))
+        
+        if not document_paths:
+            raise Exception("No documents were generated")
+        
+        command['archive_path'] = await document_pool.run(build_batch_archive, command_id, document_paths)
+        command['result_url'] = f"/api/commands/batch/{command_id}/download"
+        command['processed_at'] = datetime.now(timezone.utc)
+        commands_storage.set_status(command, 'done')
+        
+        logger.info(f"Batch command {command_id} processed: {len(document_paths)}/{len(command['items'])} documents")
+        
+    except Exception as e:
+        logger.error(f"Error processing batch command {command_id}: {e}")
+        if command:
+            command['error_message'] = str(e)
+            command['processed_at'] = datetime.now(timezone.utc)
+            commands_storage.set_status(command, 'failed')
+    
+    finally:
+        document_pool.release()
 
 
 # ==================== PDF AI Processing Endpoints ====================
 
+def get_pdf_processor_factory():
+    """Функция получения активного PDF процессора и его версия (для ключа кэша)"""
+    if USE_PADDLEOCR:
+        return get_pdf_processor_pool, PDFAIProcessor.CACHE_VERSION
+    from pdf_processor_simple import get_simple_pdf_processor, SimplePDFProcessor
+    return get_simple_pdf_processor, SimplePDFProcessor.CACHE_VERSION
+
+
 class PDFProcessRequest(BaseModel):
     """Запрос на обработку PDF"""
     pdf_url: Optional[str] = Field(None, description="URL PDF файла")
@@ -878,13 +1164,10 @@ async def process_pdf_file(
             tmp_path = tmp_file.name
         
         try:
-            # Обрабатываем PDF (используем PaddleOCR если доступен, иначе упрощенную версию)
-            if USE_PADDLEOCR:
-                processor = get_pdf_processor()
-            else:
-                from pdf_processor_simple import get_simple_pdf_processor
-                processor = get_simple_pdf_processor()
-            results = processor.process_pdf_file(tmp_path)
+            # Обрабатываем PDF (результаты кэшируются по содержимому файла)
+            get_processor, processor_version = get_pdf_processor_factory()
+            # Обработка в пуле потоков, чтобы OCR не блокировал event loop
+            results, _ = await run_in_threadpool(process_pdf_cached, tmp_path, get_processor, processor_version)
             
             # Фильтруем результаты в зависимости от параметров
             filtered_results = {
@@ -945,13 +1228,9 @@ async def process_pdf_url(request: PDFProcessRequest):
         raise HTTPException(status_code=400, detail="Не указан URL PDF файла")
     
     try:
-        # Используем PaddleOCR если доступен, иначе упрощенную версию
-        if USE_PADDLEOCR:
-            processor = get_pdf_processor()
-        else:
-            from pdf_processor_simple import get_simple_pdf_processor
-            processor = get_simple_pdf_processor()
-        results = processor.process_pdf_url(request.pdf_url)
+        # Используем PaddleOCR если доступен, иначе упрощенную версию (с кэшем результатов)
+        get_processor, processor_version = get_pdf_processor_factory()
+        results, _ = await run_in_threadpool(process_pdf_url_cached, request.pdf_url, get_processor, processor_version)
         
         # Фильтруем результаты
         filtered_results = {
@@ -1004,12 +1283,9 @@ async def extract_pdf_text(pdf_url: str):
         )
     
     try:
-        if USE_PADDLEOCR:
-            processor = get_pdf_processor()
-        else:
-            from pdf_processor_simple import get_simple_pdf_processor
-            processor = get_simple_pdf_processor()
-        text = processor.extract_text_only(pdf_url)
+        get_processor, processor_version = get_pdf_processor_factory()
+        results, _ = await run_in_threadpool(process_pdf_url_cached, pdf_url, get_processor, processor_version)
+        text = results.get('text', '')
         
         return {
             'success': True,
@@ -1040,12 +1316,9 @@ async def extract_pdf_tables(pdf_url: str):
         )
     
     try:
-        if USE_PADDLEOCR:
-            processor = get_pdf_processor()
-        else:
-            from pdf_processor_simple import get_simple_pdf_processor
-            processor = get_simple_pdf_processor()
-        tables = processor.extract_tables_only(pdf_url)
+        get_processor, processor_version = get_pdf_processor_factory()
+        results, _ = await run_in_threadpool(process_pdf_url_cached, pdf_url, get_processor, processor_version)
+        tables = results.get('tables', [])
         
         return {
             'success': True,
@@ -1076,6 +1349,7 @@ async def pdf_ai_health():
             'charts': USE_PADDLEOCR,
             'ocr': USE_PADDLEOCR
         },
+        'pool': get_pdf_processor_pool().stats() if USE_PADDLEOCR else None,
         'message': 'PDF AI processor готов к работе' if PDF_AI_AVAILABLE else 'PDF AI processor не установлен'
     }
 
@@ -1,7 +1,6 @@
 import os
 import uuid
 import json
-import requests
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 from docx import Document
@@ -10,37 +9,19 @@ from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.table import WD_TABLE_ALIGNMENT
 from docx.oxml.shared import OxmlElement, qn
 
+from supabase_data_loader import get_supabase_data_loader, request_scoped
+
 class SmartDocumentGenerator:
     def __init__(self, documents_dir: str = "documents", supabase_url: str = None, supabase_key: str = None):
         self.documents_dir = documents_dir
         self.supabase_url = supabase_url
         self.supabase_key = supabase_key
+        self.data_loader = get_supabase_data_loader(supabase_url, supabase_key)
         os.makedirs(documents_dir, exist_ok=True)
     
     def get_supabase_data(self, table: str, filters: Dict[str, Any] = None) -> List[Dict]:
-        """Получение данных из Supabase"""
-        if not self.supabase_url or not self.supabase_key:
-            return []
-        
-        try:
-            url = f"{self.supabase_url}/rest/v1/{table}"
-            headers = {
-                'apikey': self.supabase_key,
-                'Authorization': f'Bearer {self.supabase_key}',
-                'Content-Type': 'application/json'
-            }
-            
-            params = {}
-            if filters:
-                for key, value in filters.items():
-                    params[key] = f'eq.{value}'
-            
-            response = requests.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"Ошибка получения данных из Supabase: {e}")
-            return []
+        """Получение данных из Supabase (через общий загрузчик с кэшем запросов)"""
+        return self.data_loader.select(table, filters)
     
     def get_apartment_defects(self, apartment_id: str) -> List[Dict]:
         """Получение дефектов для квартиры"""
@@ -56,31 +37,17 @@ class SmartDocumentGenerator:
     
     def get_recent_work_journal(self, days: int = 7) -> List[Dict]:
         """Получение недавних записей журнала работ"""
-        try:
-            url = f"{self.supabase_url}/rest/v1/work_journal"
-            headers = {
-                'apikey': self.supabase_key,
-                'Authorization': f'Bearer {self.supabase_key}',
-                'Content-Type': 'application/json'
-            }
-            
-            # Получаем записи за последние N дней
-            end_date = datetime.now().strftime('%Y-%m-%d')
-            start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
-            
-            params = {
-                'work_date': f'gte.{start_date}',
-                'work_date': f'lte.{end_date}',
-                'order': 'work_date.desc'
-            }
-            
-            response = requests.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"Ошибка получения журнала работ: {e}")
-            return []
+        # Получаем записи за последние N дней
+        end_date = datetime.now().strftime('%Y-%m-%d')
+        start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+        
+        return self.data_loader.select('work_journal', params=[
+            ('work_date', f'gte.{start_date}'),
+            ('work_date', f'lte.{end_date}'),
+            ('order', 'work_date.desc')
+        ])
     
+    @request_scoped
     def generate_smart_handover_act(self, command_data: Dict[str, Any]) -> str:
         """Генерирует умный акт приёмки на основе реальных данных"""
         doc = Document()
@@ -218,6 +185,7 @@ class SmartDocumentGenerator:
         
         return filepath
     
+    @request_scoped
     def generate_smart_defect_report(self, command_data: Dict[str, Any]) -> str:
         """Генерирует умный отчет о дефектах на основе реальных данных"""
         doc = Document()
@@ -337,6 +305,7 @@ class SmartDocumentGenerator:
         
         return filepath
     
+    @request_scoped
     def generate_smart_work_report(self, command_data: Dict[str, Any]) -> str:
         """Генерирует умный отчет о работах на основе реальных данных"""
         doc = Document()
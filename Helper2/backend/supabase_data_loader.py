@@ -0,0 +1,182 @@
+"""
+Загрузка данных из Supabase REST для генераторов документов
+Одна сессия requests с пулом соединений и кэш запросов на время генерации
+одного документа (request_scope): документ не запрашивает дефекты и прогресс
+квартиры повторно, а следующий документ всегда видит свежие данные.
+"""
+
+import os
+import copy
+import logging
+import threading
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union, Callable
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Таймаут запросов (можно переопределить в .env)
+SUPABASE_REQUEST_TIMEOUT = float(os.getenv('SUPABASE_REQUEST_TIMEOUT', '15'))
+
+Params = Union[Dict[str, Any], Sequence[Tuple[str, Any]]]
+
+# Кэш запросов текущей генерации (None - вне request_scope, запросы не кэшируются)
+_request_memo: ContextVar[Optional[Dict[Tuple, List[Dict]]]] = ContextVar('supabase_request_memo', default=None)
+
+
+@contextmanager
+def request_scope():
+    """
+    Кэш запросов на время генерации одного документа
+
+    Вложенные области используют кэш внешней. Кэш привязан к контексту
+    (потоку/задаче), поэтому параллельные генерации его не разделяют.
+    """
+    if _request_memo.get() is not None:
+        yield
+        return
+    token = _request_memo.set({})
+    try:
+        yield
+    finally:
+        _request_memo.reset(token)
+
+
+def request_scoped(func: Callable) -> Callable:
+    """Декоратор: метод генерации выполняется в своей request_scope"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with request_scope():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+class SupabaseDataLoader:
+    """Доступ к таблицам Supabase с пулом соединений и кэшем запросов (см. request_scope)"""
+
+    def __init__(self, supabase_url: Optional[str], supabase_key: Optional[str]):
+        """
+        Args:
+            supabase_url: URL проекта Supabase
+            supabase_key: Ключ API
+        """
+        self.supabase_url = supabase_url
+        self.supabase_key = supabase_key
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if supabase_key:
+            self.session.headers.update({
+                'apikey': supabase_key,
+                'Authorization': f'Bearer {supabase_key}',
+                'Content-Type': 'application/json'
+            })
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.supabase_url and self.supabase_key)
+
+    @staticmethod
+    def _eq_params(filters: Optional[Dict[str, Any]]) -> List[Tuple[str, str]]:
+        return [(key, f'eq.{value}') for key, value in (filters or {}).items()]
+
+    def _memo_key(self, table: str, params: List[Tuple[str, Any]]) -> Tuple:
+        return (self.supabase_url, table, tuple(sorted((key, str(value)) for key, value in params)))
+
+    @staticmethod
+    def _memo_get(key: Tuple) -> Optional[List[Dict]]:
+        """Копия закэшированных строк (вызывающий код может их изменять)"""
+        memo = _request_memo.get()
+        if memo is None or key not in memo:
+            return None
+        return copy.deepcopy(memo[key])
+
+    @staticmethod
+    def _memo_put(key: Tuple, rows: List[Dict]):
+        memo = _request_memo.get()
+        if memo is not None:
+            memo[key] = copy.deepcopy(rows)
+
+    def _get(self, table: str, params: List[Tuple[str, Any]]) -> List[Dict]:
+        response = self.session.get(f"{self.supabase_url}/rest/v1/{table}", params=params,
+                                    timeout=SUPABASE_REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+
+    def select(self, table: str, filters: Optional[Dict[str, Any]] = None,
+               params: Optional[Params] = None, use_cache: bool = True) -> List[Dict]:
+        """
+        Выборка строк таблицы
+
+        Args:
+            table: Имя таблицы
+            filters: Фильтры равенства {колонка: значение}
+            params: Дополнительные параметры PostgREST (order, limit, gte/lte ...);
+                список пар, если одна колонка фильтруется несколько раз
+            use_cache: Использовать кэш запросов текущей request_scope
+
+        Returns:
+            Строки таблицы ([] если Supabase не настроен или запрос не удался)
+        """
+        if not self.configured:
+            return []
+
+        query = self._eq_params(filters)
+        if params:
+            query += list(params.items()) if isinstance(params, dict) else list(params)
+
+        key = self._memo_key(table, query)
+        if use_cache:
+            rows = self._memo_get(key)
+            if rows is not None:
+                return rows
+
+        try:
+            rows = self._get(table, query)
+        except Exception as e:
+            logger.error(f"Ошибка получения данных из Supabase ({table}): {e}")
+            return []
+
+        self._memo_put(key, rows)
+        return rows
+
+    def insert(self, table: str, row: Dict[str, Any]) -> bool:
+        """Вставка строки (без возврата представления)"""
+        if not self.configured:
+            return False
+        try:
+            response = self.session.post(f"{self.supabase_url}/rest/v1/{table}", json=row,
+                                         headers={'Prefer': 'return=minimal'},
+                                         timeout=SUPABASE_REQUEST_TIMEOUT)
+            response.raise_for_status()
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка записи в Supabase ({table}): {e}")
+            return False
+
+    @staticmethod
+    def clear():
+        """Очистить кэш запросов текущей request_scope"""
+        memo = _request_memo.get()
+        if memo is not None:
+            memo.clear()
+
+
+# Глобальные экземпляры (по одному на проект Supabase)
+_loaders: Dict[Tuple[Optional[str], Optional[str]], SupabaseDataLoader] = {}
+_loaders_lock = threading.Lock()
+
+
+def get_supabase_data_loader(supabase_url: Optional[str], supabase_key: Optional[str]) -> SupabaseDataLoader:
+    """Получить общий загрузчик данных для проекта Supabase"""
+    key = (supabase_url, supabase_key)
+    with _loaders_lock:
+        if key not in _loaders:
+            _loaders[key] = SupabaseDataLoader(supabase_url, supabase_key)
+        return _loaders[key]
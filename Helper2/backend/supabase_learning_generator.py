@@ -6,13 +6,13 @@
 
 import os
 import uuid
-import requests
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 from docx import Document
 from docx.shared import Inches, Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.table import WD_TABLE_ALIGNMENT
+from template_cache import TemplateCache
 
 class SupabaseLearningGenerator:
     def __init__(self, documents_dir: str = "documents"):
@@ -30,6 +30,19 @@ class SupabaseLearningGenerator:
                         self.supabase_url = line.split('=', 1)[1].strip()
                     elif line.startswith('SUPABASE_SERVICE_ROLE_KEY='):
                         self.supabase_key = line.split('=', 1)[1].strip()
+        
+        # Локальный кэш шаблонов (скачиваются один раз, затем ревалидируются)
+        self.template_cache = TemplateCache(self.supabase_url)
+        # Структура примеров: путь к шаблону в кэше -> результат анализа
+        self._structure_cache: Dict[str, Dict[str, Any]] = {}
+        
+        # Удаляем временные копии шаблонов, оставшиеся от прежней версии генератора
+        for filename in os.listdir(documents_dir):
+            if filename.startswith('temp_') and filename.endswith('.docx'):
+                try:
+                    os.remove(os.path.join(documents_dir, filename))
+                except OSError:
+                    pass
     
     def get_examples_from_supabase(self, template_type: str) -> List[str]:
         """Получает список примеров документов из Supabase Storage"""
@@ -66,51 +79,31 @@ class SupabaseLearningGenerator:
         return known_documents.get(template_type, [])
     
     def download_example_from_supabase(self, file_path: str) -> Optional[str]:
-        """Скачивает пример документа из Supabase Storage"""
+        """
+        Получает пример документа из Supabase Storage через локальный кэш шаблонов
+        
+        Returns:
+            Путь к локальной копии (файл принадлежит кэшу, удалять его не нужно)
+        """
         try:
-            # Пробуем разные варианты URL для простых названий файлов
-            urls_to_try = [
-                f"{self.supabase_url}/storage/v1/object/public/Documents-base/{file_path}",
-                f"{self.supabase_url}/storage/v1/object/Documents-base/{file_path}",
-                f"{self.supabase_url}/storage/v1/object/public/Documents-base/templates/{file_path}",
-                f"{self.supabase_url}/storage/v1/object/Documents-base/templates/{file_path}"
-            ]
-            
-            response = None
-            working_url = None
-            
-            for url in urls_to_try:
-                try:
-                    response = requests.get(url)
-                    if response.status_code == 200:
-                        working_url = url
-                        break
-                except:
-                    continue
-            
-            if not working_url:
+            local_path = self.template_cache.get_path(file_path)
+            if not local_path:
                 raise Exception(f"Не удалось найти файл по ни одному из URL")
-            
-            # Сохраняем временно для анализа
-            temp_filename = f"temp_{uuid.uuid4().hex[:8]}.docx"
-            temp_path = os.path.join(self.documents_dir, temp_filename)
-            
-            with open(temp_path, 'wb') as f:
-                f.write(response.content)
-            
-            print(f"📥 Скачан пример: {os.path.basename(file_path)}")
-            return temp_path
+            return local_path
             
         except Exception as e:
             print(f"❌ Ошибка скачивания {file_path}: {e}")
             return None
     
     def analyze_example_structure(self, file_path: str) -> Dict[str, Any]:
-        """Анализирует структуру примера документа"""
+        """Анализирует структуру примера документа (результат кэшируется до изменения файла)"""
         try:
-            from document_analyzer import DocumentAnalyzer
-            analyzer = DocumentAnalyzer()
-            return analyzer.analyze_document_structure(file_path)
+            cache_key = f"{file_path}:{os.path.getmtime(file_path)}"
+            if cache_key not in self._structure_cache:
+                from document_analyzer import DocumentAnalyzer
+                analyzer = DocumentAnalyzer()
+                self._structure_cache[cache_key] = analyzer.analyze_document_structure(file_path)
+            return self._structure_cache[cache_key]
         except Exception as e:
             print(f"❌ Ошибка анализа {file_path}: {e}")
             return {}
@@ -126,16 +119,16 @@ class SupabaseLearningGenerator:
             print(f"❌ Не найдено примеров для типа {template_type} в Supabase Storage")
             return self._generate_fallback_document(template_type, command_data)
         
-        # Скачиваем первый пример для анализа
+        # Получаем первый пример для анализа (из локального кэша)
         example_path = examples[0]
-        temp_file = self.download_example_from_supabase(example_path)
+        template_file = self.download_example_from_supabase(example_path)
         
-        if not temp_file:
+        if not template_file:
             print(f"❌ Не удалось скачать пример {example_path}")
             return self._generate_fallback_document(template_type, command_data)
         
         # Анализируем структуру примера
-        example_structure = self.analyze_example_structure(temp_file)
+        example_structure = self.analyze_example_structure(template_file)
         
         print(f"📚 Используем пример из Supabase: {os.path.basename(example_path)}")
         print(f"📊 Структура: {len(example_structure.get('structure', {}).get('headings', []))} заголовков, {len(example_structure.get('tables', []))} таблиц")
@@ -146,12 +139,6 @@ class SupabaseLearningGenerator:
         # Применяем структуру из примера
         self._apply_example_structure(doc, example_structure, template_type, apartment_id)
         
-        # Удаляем временный файл
-        try:
-            os.remove(temp_file)
-        except:
-            pass
-        
         # Сохраняем новый документ
         filename = f"supabase_learning_{template_type}_{apartment_id}_{uuid.uuid4().hex[:8]}.docx"
         filepath = os.path.join(self.documents_dir, filename)
@@ -303,25 +290,16 @@ class SupabaseLearningGenerator:
         """Генерирует профессиональный документ на основе шаблона 7.docx"""
         apartment_id = command_data.get('apartment_id', '1101')
         
-        # Скачиваем профессиональный шаблон
-        temp_file = self.download_example_from_supabase('7.docx')
+        # Получаем копию профессионального шаблона из кэша
+        doc = self.template_cache.get_document('7.docx')
         
-        if not temp_file:
+        if doc is None:
             print("❌ Не удалось скачать профессиональный шаблон")
             return self._generate_fallback_document(template_type, command_data)
         
-        # Открываем шаблон как документ
-        doc = Document(temp_file)
-        
         # Обновляем данные в документе
         self._update_professional_template(doc, template_type, apartment_id, command_data)
         
-        # Удаляем временный файл
-        try:
-            os.remove(temp_file)
-        except:
-            pass
-        
         # Сохраняем новый документ
         filename = f"professional_{template_type}_{apartment_id}_{uuid.uuid4().hex[:8]}.docx"
         filepath = os.path.join(self.documents_dir, filename)
@@ -0,0 +1,182 @@
+"""
+Локальный кэш шаблонов документов из Supabase Storage
+Шаблон скачивается один раз, хранится на диске (с ETag) и периодически
+ревалидируется. Разобранный Document держится в памяти, генераторы
+получают его копию без повторного скачивания и парсинга.
+"""
+
+import os
+import copy
+import json
+import time
+import hashlib
+import logging
+import threading
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import requests
+from docx import Document
+
+logger = logging.getLogger(__name__)
+
+# Директория кэша и период ревалидации (можно переопределить в .env)
+TEMPLATE_CACHE_DIR = Path(os.getenv('TEMPLATE_CACHE_DIR', str(Path(__file__).parent / 'cache' / 'templates')))
+TEMPLATE_REVALIDATE_SECONDS = float(os.getenv('TEMPLATE_REVALIDATE_SECONDS', '600'))
+
+# Таймаут запросов к Storage (секунды)
+TEMPLATE_REQUEST_TIMEOUT = 15
+
+
+class TemplateCache:
+    """Кэш шаблонов Documents-base из Supabase Storage"""
+
+    def __init__(self, supabase_url: Optional[str], cache_dir: Path = TEMPLATE_CACHE_DIR,
+                 revalidate_seconds: float = TEMPLATE_REVALIDATE_SECONDS):
+        """
+        Args:
+            supabase_url: URL проекта Supabase
+            cache_dir: Директория для хранения шаблонов
+            revalidate_seconds: Как часто проверять, не изменился ли шаблон в Storage
+        """
+        self.supabase_url = supabase_url
+        self.cache_dir = Path(cache_dir)
+        self.revalidate_seconds = revalidate_seconds
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self._session = requests.Session()
+        self._lock = threading.Lock()
+        # file_path -> {'url', 'etag', 'checked_at', 'local_path', 'document'}
+        self._entries: Dict[str, Dict[str, Any]] = {}
+
+    def _candidate_urls(self, file_path: str) -> List[str]:
+        """Варианты URL для простых названий файлов"""
+        return [
+            f"{self.supabase_url}/storage/v1/object/public/Documents-base/{file_path}",
+            f"{self.supabase_url}/storage/v1/object/Documents-base/{file_path}",
+            f"{self.supabase_url}/storage/v1/object/public/Documents-base/templates/{file_path}",
+            f"{self.supabase_url}/storage/v1/object/Documents-base/templates/{file_path}"
+        ]
+
+    def _paths(self, file_path: str):
+        """Пути к файлу шаблона и его метаданным на диске"""
+        name = hashlib.sha256(file_path.encode('utf-8')).hexdigest()[:16]
+        suffix = Path(file_path).suffix or '.bin'
+        return self.cache_dir / f"{name}{suffix}", self.cache_dir / f"{name}.json"
+
+    def _load_entry(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """Загрузить запись из памяти или с диска"""
+        entry = self._entries.get(file_path)
+        if entry is not None:
+            return entry
+
+        local_path, meta_path = self._paths(file_path)
+        if not (local_path.exists() and meta_path.exists()):
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # После перезапуска шаблон с диска нужно ревалидировать
+        entry = {'url': meta.get('url'), 'etag': meta.get('etag'), 'checked_at': 0.0,
+                 'local_path': str(local_path), 'document': None}
+        self._entries[file_path] = entry
+        return entry
+
+    def _store(self, file_path: str, url: str, response: requests.Response) -> Dict[str, Any]:
+        """Сохранить скачанный шаблон на диск"""
+        local_path, meta_path = self._paths(file_path)
+        tmp_path = local_path.with_suffix(local_path.suffix + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(response.content)
+        os.replace(tmp_path, local_path)
+
+        etag = response.headers.get('ETag')
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump({'file_path': file_path, 'url': url, 'etag': etag}, f, ensure_ascii=False)
+
+        entry = {'url': url, 'etag': etag, 'checked_at': time.monotonic(),
+                 'local_path': str(local_path), 'document': None}
+        self._entries[file_path] = entry
+        logger.info(f"📥 Шаблон сохранен в кэш: {file_path}")
+        return entry
+
+    def _fetch(self, file_path: str, entry: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Скачать или ревалидировать шаблон (сначала по запомненному URL)"""
+        urls = self._candidate_urls(file_path)
+        if entry and entry.get('url') in urls:
+            urls.remove(entry['url'])
+            urls.insert(0, entry['url'])
+
+        for url in urls:
+            headers = {}
+            if entry and entry.get('etag') and url == entry.get('url'):
+                headers['If-None-Match'] = entry['etag']
+            try:
+                response = self._session.get(url, headers=headers, timeout=TEMPLATE_REQUEST_TIMEOUT)
+            except requests.RequestException as e:
+                logger.warning(f"Ошибка запроса шаблона {url}: {e}")
+                continue
+
+            if response.status_code == 304 and entry:
+                entry['checked_at'] = time.monotonic()
+                return entry
+            if response.status_code == 200:
+                return self._store(file_path, url, response)
+
+        return None
+
+    def get_path(self, file_path: str) -> Optional[str]:
+        """
+        Получить путь к локальной копии шаблона
+
+        Args:
+            file_path: Имя файла в Documents-base (например, '7.docx')
+
+        Returns:
+            Путь к файлу в кэше или None, если шаблон недоступен
+        """
+        if not self.supabase_url:
+            return None
+
+        with self._lock:
+            entry = self._load_entry(file_path)
+            if entry and time.monotonic() - entry['checked_at'] < self.revalidate_seconds:
+                return entry['local_path']
+
+            fresh = self._fetch(file_path, entry)
+            if fresh is None:
+                if entry:
+                    # Storage недоступен - используем последнюю сохраненную версию
+                    logger.warning(f"Не удалось ревалидировать шаблон {file_path}, используем кэш")
+                    entry['checked_at'] = time.monotonic()
+                    return entry['local_path']
+                return None
+            return fresh['local_path']
+
+    def get_document(self, file_path: str) -> Optional[Document]:
+        """
+        Получить копию разобранного шаблона для заполнения
+
+        Returns:
+            Новый объект Document (изменения не затрагивают кэш) или None
+        """
+        local_path = self.get_path(file_path)
+        if local_path is None:
+            return None
+
+        with self._lock:
+            entry = self._entries[file_path]
+            if entry['document'] is None:
+                entry['document'] = Document(local_path)
+            cached_document = entry['document']
+
+            try:
+                return copy.deepcopy(cached_document)
+            except Exception as e:
+                logger.warning(f"Не удалось скопировать шаблон {file_path}, читаем заново: {e}")
+                with open(local_path, 'rb') as f:
+                    return Document(BytesIO(f.read()))
@@ -0,0 +1,408 @@
+"""
+Асинхронный клиент Яндекс Диска для FastAPI endpoints
+Общий пул соединений (httpx.AsyncClient) и кэш списков файлов с TTL
+и ревалидацией по ETag / дате изменения папки
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import List, Dict, Optional, Any, Tuple
+
+import httpx
+
+from yandex_disk_api import (
+    YANDEX_DISK_API_BASE,
+    get_headers,
+    get_yandex_disk_token,
+    get_yandex_disk_folder_path,
+    get_yandex_disk_public_key,
+)
+
+logger = logging.getLogger(__name__)
+
+# Время жизни кэша списка файлов (секунды) и сколько папок хранить
+LISTING_CACHE_TTL = float(os.getenv('YANDEX_DISK_LISTING_TTL', '60'))
+LISTING_CACHE_SIZE = int(os.getenv('YANDEX_DISK_LISTING_CACHE_SIZE', '500'))
+
+# Время жизни закэшированной ссылки на скачивание (секунды) и размер кэша
+DOWNLOAD_LINK_TTL = float(os.getenv('YANDEX_DISK_LINK_TTL', '900'))
+DOWNLOAD_LINK_CACHE_SIZE = 5000
+
+# Общий HTTP клиент с пулом соединений (создается лениво)
+_client: Optional[httpx.AsyncClient] = None
+
+# Кэш списков файлов: (public_key, path) -> запись (порядок - от давно использованных к недавним)
+_listing_cache: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+# Блокировки по ключу, чтобы параллельные запросы одной папки не дублировались
+_listing_locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+# Кэш ссылок на скачивание: (public_key, path) -> (href, expires_at)
+_download_link_cache: Dict[Tuple[str, str], Tuple[str, float]] = {}
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Получить общий HTTP клиент (keep-alive пул соединений к API и хранилищу)"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(60.0, connect=10.0),  # 60 секунд для больших папок
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+            follow_redirects=True
+        )
+    return _client
+
+
+async def close_async_client():
+    """Закрыть общий HTTP клиент (при остановке приложения)"""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
+
+def _format_items(items: List[Dict[str, Any]], public_key: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Форматировать элементы ответа API (тот же формат, что в yandex_disk_api)"""
+    formatted_items = []
+    for item in items:
+        formatted_item = {
+            'name': item.get('name', ''),
+            'path': item.get('path', ''),
+            'type': item.get('type', 'file'),  # 'file' или 'dir'
+            'size': item.get('size', 0),
+            'modified': item.get('modified', ''),
+            'created': item.get('created', ''),
+            'mime_type': item.get('mime_type', ''),
+            'preview': item.get('preview', ''),
+            'file': item.get('file', ''),
+            'public_url': item.get('public_url', '')
+        }
+        if public_key:
+            formatted_item['public_key'] = public_key  # Сохраняем публичный ключ для скачивания
+        formatted_items.append(formatted_item)
+    return formatted_items
+
+
+def _normalize_private_path(path: Optional[str]) -> str:
+    """Нормализовать путь для обычной (не публичной) папки"""
+    if path is None:
+        path = get_yandex_disk_folder_path()
+    if not path:
+        path = '/'
+    # Убираем префикс "disk:" если есть
+    if path.startswith('disk:'):
+        path = path[5:]
+    path = path.strip('/')
+    return f'/{path}' if path else '/'
+
+
+def _raise_for_listing_error(response: httpx.Response, folder_path: str, public_key: Optional[str]):
+    """Преобразовать ошибку API в исключение (как в синхронной версии)"""
+    if public_key:
+        if response.status_code == 404:
+            raise ValueError(f"Публичная папка не найдена: {public_key}")
+    else:
+        if response.status_code == 401:
+            raise ValueError("Неверный OAuth токен или токен истек")
+        elif response.status_code == 403:
+            raise ValueError("Нет доступа к указанной папке")
+        elif response.status_code == 404:
+            raise ValueError(f"Папка не найдена: {folder_path}")
+
+    try:
+        error_data = response.json() if response.content else {}
+    except ValueError:
+        error_data = {}
+    error_message = error_data.get('message', f'Ошибка API: {response.status_code}')
+    raise Exception(f"Ошибка получения списка файлов: {error_message}")
+
+
+async def _revalidate(url: str, params: Dict[str, Any], headers: Dict[str, str],
+                      cached: Dict[str, Any]) -> Tuple[bool, Optional[httpx.Response]]:
+    """
+    Проверить, что закэшированный список файлов все еще актуален
+
+    Если API вернул ETag - используем условный запрос (304 Not Modified).
+    Иначе запрашиваем только дату изменения папки и сравниваем ее с закэшированной.
+
+    Returns:
+        (актуален ли кэш, полный ответ со списком, если он уже получен условным запросом)
+    """
+    client = get_async_client()
+
+    if cached.get('etag'):
+        response = await client.get(url, headers={**headers, 'If-None-Match': cached['etag']}, params=params)
+        if response.status_code == 304:
+            return True, None
+        # Список изменился: ответ 200 уже содержит новый список, повторный запрос не нужен
+        return False, response if response.status_code == 200 else None
+
+    if cached.get('modified'):
+        light_params = {**params, 'limit': 0, 'fields': 'modified'}
+        response = await client.get(url, headers=headers, params=light_params)
+        if response.status_code == 200:
+            return response.json().get('modified') == cached['modified'], None
+
+    return False, None
+
+
+def _store_listing(cache_key: Tuple[str, str], entry: Dict[str, Any]):
+    """Сохранить список в кэш, вытесняя давно не использованные папки"""
+    _listing_cache[cache_key] = entry
+    _listing_cache.move_to_end(cache_key)
+    while len(_listing_cache) > LISTING_CACHE_SIZE:
+        stale_key, _ = _listing_cache.popitem(last=False)
+        lock = _listing_locks.get(stale_key)
+        if lock is not None and not lock.locked():
+            del _listing_locks[stale_key]
+
+    # Блокировки папок, для которых нет записи в кэше (например, после ошибок API)
+    if len(_listing_locks) > LISTING_CACHE_SIZE:
+        for key in [key for key, lock in _listing_locks.items()
+                    if key not in _listing_cache and not lock.locked()]:
+            del _listing_locks[key]
+
+
+async def get_folder_contents_async(folder_path: Optional[str] = None, use_cache: bool = True) -> List[Dict[str, Any]]:
+    """
+    Получить список файлов и папок (асинхронно, с кэшем)
+    Поддерживает как обычные папки (с OAuth токеном), так и публичные папки (без токена)
+
+    Args:
+        folder_path: Путь к папке на Яндекс Диске (если None, используется из env)
+        use_cache: Использовать кэш (False - всегда запрашивать API и обновить кэш)
+
+    Returns:
+        Список словарей с информацией о файлах и папках
+    """
+    public_key = get_yandex_disk_public_key()
+
+    if public_key:
+        url = f"{YANDEX_DISK_API_BASE}/public/resources"
+        params = {
+            'public_key': f"https://disk.yandex.ru/d/{public_key}",  # API требует полную ссылку
+            'limit': 1000,
+            'sort': '-modified'
+        }
+        if folder_path:
+            params['path'] = folder_path
+        headers = {'Accept': 'application/json'}
+    else:
+        token = get_yandex_disk_token()
+        if not token or not token.strip():
+            raise ValueError(
+                "YANDEX_DISK_TOKEN не установлен в переменных окружения. "
+                "Для работы с публичной папкой установите YANDEX_DISK_PUBLIC_KEY в файле .env"
+            )
+        folder_path = _normalize_private_path(folder_path)
+        url = f"{YANDEX_DISK_API_BASE}/resources"
+        params = {
+            'path': folder_path,
+            'limit': 1000,  # Максимальное количество файлов
+            'sort': '-modified'  # Сортировка по дате изменения (новые сначала)
+        }
+        headers = get_headers()
+
+    cache_key = (public_key or '', params.get('path', ''))
+    lock = _listing_locks.setdefault(cache_key, asyncio.Lock())
+
+    async with lock:
+        cached = _listing_cache.get(cache_key)
+        response = None
+        if use_cache and cached:
+            _listing_cache.move_to_end(cache_key)
+            if cached['expires_at'] > time.monotonic():
+                return cached['items']
+            try:
+                fresh, response = await _revalidate(url, params, headers, cached)
+                if fresh:
+                    cached['expires_at'] = time.monotonic() + LISTING_CACHE_TTL
+                    logger.info(f"Yandex Disk listing revalidated: {cache_key[1] or '/'}")
+                    return cached['items']
+            except httpx.HTTPError as e:
+                logger.warning(f"Ошибка ревалидации кэша Яндекс Диска: {e}")
+
+        if response is None:
+            try:
+                response = await get_async_client().get(url, headers=headers, params=params)
+            except httpx.HTTPError as e:
+                raise Exception(f"Ошибка подключения к API Яндекс Диска: {str(e)}")
+
+        if response.status_code != 200:
+            _raise_for_listing_error(response, folder_path, public_key)
+
+        data = response.json()
+        items = _format_items(data.get('_embedded', {}).get('items', []), public_key)
+        _store_listing(cache_key, {
+            'items': items,
+            'etag': response.headers.get('ETag'),
+            'modified': data.get('modified'),
+            'expires_at': time.monotonic() + LISTING_CACHE_TTL
+        })
+        return items
+
+
+def invalidate_listing_cache(folder_path: Optional[str] = None):
+    """
+    Сбросить кэш списков файлов
+
+    Args:
+        folder_path: Путь к папке (если None - сбросить весь кэш)
+    """
+    if folder_path is None:
+        _listing_cache.clear()
+        return
+
+    public_key = get_yandex_disk_public_key()
+    path = folder_path if public_key else _normalize_private_path(folder_path)
+    _listing_cache.pop((public_key or '', path), None)
+
+
+async def get_download_link_async(file_path: str, public_key: Optional[str] = None, use_cache: bool = True) -> str:
+    """
+    Получить прямую ссылку для скачивания файла (асинхронно, с кэшем)
+
+    Ссылки хранилища действуют ограниченное время, поэтому кэшируются на
+    DOWNLOAD_LINK_TTL секунд. Повторный просмотр того же файла не требует
+    дополнительного запроса к API.
+
+    Args:
+        file_path: Путь к файлу на Яндекс Диске
+        public_key: Публичный ключ папки (если используется публичная папка)
+        use_cache: Использовать кэш ссылок (False - всегда запрашивать API)
+
+    Returns:
+        URL для скачивания файла
+    """
+    public_key = public_key or get_yandex_disk_public_key()
+    cache_key = _download_link_key(file_path, public_key)
+
+    if use_cache:
+        cached = _download_link_cache.get(cache_key)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
+    download_url = await _resolve_download_link(cache_key[1], public_key)
+    _download_link_cache[cache_key] = (download_url, time.monotonic() + DOWNLOAD_LINK_TTL)
+
+    # Не даем кэшу расти бесконечно: удаляем просроченные ссылки
+    if len(_download_link_cache) > DOWNLOAD_LINK_CACHE_SIZE:
+        now = time.monotonic()
+        for key in [key for key, (_, expires_at) in _download_link_cache.items() if expires_at <= now]:
+            del _download_link_cache[key]
+        while len(_download_link_cache) > DOWNLOAD_LINK_CACHE_SIZE:
+            del _download_link_cache[next(iter(_download_link_cache))]
+
+    return download_url
+
+
+def invalidate_download_link(file_path: str, public_key: Optional[str] = None):
+    """Удалить ссылку на файл из кэша (например, если хранилище ответило 401/410)"""
+    public_key = public_key or get_yandex_disk_public_key()
+    _download_link_cache.pop(_download_link_key(file_path, public_key), None)
+
+
+def _download_link_key(file_path: str, public_key: Optional[str]) -> Tuple[str, str]:
+    """Ключ кэша ссылок: (public_key, нормализованный путь)"""
+    if public_key:
+        # Для публичных папок путь должен быть относительным (без начального /)
+        return (public_key, file_path.lstrip('/'))
+    return ('', _normalize_private_path(file_path))
+
+
+async def _resolve_download_link(path: str, public_key: Optional[str]) -> str:
+    """Запросить у API прямую ссылку для скачивания"""
+    if public_key:
+        url = f"{YANDEX_DISK_API_BASE}/public/resources/download"
+        params = {'public_key': f"https://disk.yandex.ru/d/{public_key}", 'path': path}
+        headers = {'Accept': 'application/json'}
+    else:
+        url = f"{YANDEX_DISK_API_BASE}/resources/download"
+        params = {'path': path}
+        headers = get_headers()
+
+    try:
+        response = await get_async_client().get(url, headers=headers, params=params)
+    except httpx.HTTPError as e:
+        raise Exception(f"Ошибка подключения к API Яндекс Диска: {str(e)}")
+
+    if response.status_code == 200:
+        download_url = response.json().get('href', '')
+        if not download_url:
+            raise Exception("API не вернул ссылку для скачивания")
+        return download_url
+    elif response.status_code == 401 and not public_key:
+        raise ValueError("Неверный OAuth токен или токен истек")
+    elif response.status_code == 403:
+        raise ValueError("Нет доступа к файлу")
+    elif response.status_code == 404:
+        raise ValueError(f"Файл не найден: {path}")
+
+    try:
+        error_data = response.json() if response.content else {}
+    except ValueError:
+        error_data = {}
+    error_message = error_data.get('message', f'Ошибка API: {response.status_code}')
+    raise Exception(f"Ошибка получения ссылки для скачивания: {error_message}")
+
+
+# Размер блока при потоковой передаче файла клиенту
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Заголовки запроса, которые передаются в хранилище (докачка, перемотка видео, кэш браузера)
+PROXY_REQUEST_HEADERS = ('range', 'if-range', 'if-none-match', 'if-modified-since')
+
+# Заголовки ответа хранилища, которые передаются клиенту
+PROXY_RESPONSE_HEADERS = ('content-length', 'content-range', 'accept-ranges', 'etag', 'last-modified')
+
+# Ответы хранилища, означающие, что закэшированная ссылка устарела
+EXPIRED_LINK_STATUSES = (401, 410)
+
+
+async def open_file_stream(file_path: str, public_key: Optional[str] = None,
+                           request_headers: Optional[Any] = None) -> httpx.Response:
+    """
+    Открыть потоковое скачивание файла с Яндекс Диска
+
+    Тело ответа не загружается в память: его нужно читать через aiter_bytes()
+    и обязательно закрыть через aclose(). Хранилище запрашивается без сжатия
+    (Accept-Encoding: identity), поэтому переданные клиенту content-length
+    и content-range соответствуют байтам тела. Если закэшированная ссылка устарела
+    (401/410 от хранилища), ссылка запрашивается заново и запрос повторяется.
+
+    Args:
+        file_path: Путь к файлу на Яндекс Диске
+        public_key: Публичный ключ папки (если используется публичная папка)
+        request_headers: Заголовки входящего запроса (Range, If-None-Match и т.д.)
+
+    Returns:
+        Открытый ответ хранилища (200, 206, 304 или 416)
+    """
+    # Без сжатия: иначе aiter_bytes() распакует тело и его длина не совпадет с content-length
+    headers = {'Accept-Encoding': 'identity'}
+    for name, value in (request_headers or {}).items():
+        if name.lower() in PROXY_REQUEST_HEADERS:
+            headers[name] = value
+
+    client = get_async_client()
+    use_cache = True
+    while True:
+        download_url = await get_download_link_async(file_path, public_key, use_cache=use_cache)
+        try:
+            response = await client.send(client.build_request('GET', download_url, headers=headers), stream=True)
+        except httpx.HTTPError as e:
+            raise Exception(f"Ошибка при скачивании файла: {str(e)}")
+
+        if response.status_code in EXPIRED_LINK_STATUSES and use_cache:
+            await response.aclose()
+            logger.info(f"Ссылка на файл устарела ({response.status_code}), запрашиваем новую: {file_path}")
+            invalidate_download_link(file_path, public_key)
+            use_cache = False
+            continue
+        break
+
+    if response.status_code not in (200, 206, 304, 416):
+        await response.aclose()
+        raise Exception(f"Ошибка скачивания файла: {response.status_code}")
+    return response
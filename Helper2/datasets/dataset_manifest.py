@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Манифест датасета дефектов бетона
+Каждое изображение хешируется (sha256) один раз - хеш пересчитывается только при
+изменении размера или времени изменения файла. Одинаковые изображения из
+concrete_cracks, expanded_dataset и maximized_dataset учитываются один раз.
+Разбиения train/val/test хранятся как CSV-индексы в manifest/splits/ вместо копий
+файлов: выборка определяется хешем изображения, поэтому пересоздание разбиения
+занимает секунды, а добавление новых изображений не перемешивает старые.
+
+Использование:
+    python dataset_manifest.py build
+    python dataset_manifest.py split maximized --sources maximized_dataset --ratios 0.7 0.15 0.15
+    python dataset_manifest.py stats
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import shutil
+from collections import Counter
+from pathlib import Path
+
+DATASETS_DIR = Path(__file__).resolve().parent
+MANIFEST_DIR = DATASETS_DIR / "manifest"
+IMAGES_INDEX = MANIFEST_DIR / "images.csv"
+SPLITS_DIR = MANIFEST_DIR / "splits"
+
+# Источники в порядке приоритета: у дубликатов остается путь из первого источника
+DEFAULT_SOURCES = ("concrete_cracks", "expanded_dataset", "maximized_dataset")
+LABELS = ("negative", "positive")
+SPLITS = ("train", "val", "test")
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+IMAGE_FIELDS = ["sha256", "path", "source", "label", "size", "mtime"]
+SPLIT_FIELDS = ["sha256", "path", "label", "split"]
+
+
+def hash_file(path, chunk_size=1 << 20):
+    """sha256 содержимого файла"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_csv(path):
+    if not Path(path).exists():
+        return []
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def _write_csv(path, fields, rows):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp_path, path)
+
+
+def build_manifest(sources=DEFAULT_SOURCES):
+    """
+    Индексирует изображения источников (source/<label>/*.jpg)
+
+    Returns:
+        Строки индекса (все файлы, включая дубликаты)
+    """
+    previous = {row["path"]: row for row in _read_csv(IMAGES_INDEX)}
+    rows = []
+    hashed = 0
+
+    for source in sources:
+        for label in LABELS:
+            label_dir = DATASETS_DIR / source / label
+            if not label_dir.exists():
+                continue
+            for image_path in sorted(label_dir.iterdir()):
+                if image_path.suffix.lower() not in IMAGE_EXTENSIONS:
+                    continue
+                stat = image_path.stat()
+                relative = image_path.relative_to(DATASETS_DIR).as_posix()
+                cached = previous.get(relative)
+                if cached and int(cached["size"]) == stat.st_size and cached["mtime"] == str(int(stat.st_mtime)):
+                    sha256 = cached["sha256"]
+                else:
+                    sha256 = hash_file(image_path)
+                    hashed += 1
+                rows.append({
+                    "sha256": sha256,
+                    "path": relative,
+                    "source": source,
+                    "label": label,
+                    "size": stat.st_size,
+                    "mtime": int(stat.st_mtime)
+                })
+
+    _write_csv(IMAGES_INDEX, IMAGE_FIELDS, rows)
+    unique = unique_images(rows)
+    print(f"✅ Манифест: {len(rows)} файлов, {len(unique)} уникальных изображений (хешировано заново: {hashed})")
+    return rows
+
+
+def unique_images(rows, sources=None):
+    """
+    Уникальные изображения (по хешу) из указанных источников
+
+    Если одно изображение встречается с разными метками, остается первая.
+    """
+    unique = {}
+    conflicts = 0
+    for row in rows:
+        if sources and row["source"] not in sources:
+            continue
+        existing = unique.get(row["sha256"])
+        if existing is None:
+            unique[row["sha256"]] = row
+        elif existing["label"] != row["label"]:
+            conflicts += 1
+    if conflicts:
+        print(f"⚠️ {conflicts} изображений встречаются с разными метками - оставлена первая")
+    return list(unique.values())
+
+
+def _bucket(sha256, seed):
+    """Число [0, 1), стабильное для изображения и зерна"""
+    value = hashlib.sha256(f"{seed}:{sha256}".encode("utf-8")).hexdigest()[:8]
+    return int(value, 16) / 0x100000000
+
+
+def make_split(name, sources=DEFAULT_SOURCES, ratios=(0.7, 0.15, 0.15), seed=42):
+    """
+    Создает разбиение train/val/test из манифеста
+
+    Args:
+        name: Имя разбиения (manifest/splits/<name>.csv)
+        sources: Источники изображений
+        ratios: Доли train/val/test
+        seed: Зерно (другое зерно - другое разбиение)
+
+    Returns:
+        Строки разбиения
+    """
+    rows = _read_csv(IMAGES_INDEX) or build_manifest()
+    total = float(sum(ratios))
+    train_edge = ratios[0] / total
+    val_edge = train_edge + ratios[1] / total
+
+    split_rows = []
+    for row in sorted(unique_images(rows, sources), key=lambda r: r["path"]):
+        bucket = _bucket(row["sha256"], seed)
+        split = "train" if bucket < train_edge else "val" if bucket < val_edge else "test"
+        split_rows.append({"sha256": row["sha256"], "path": row["path"], "label": row["label"], "split": split})
+
+    _write_csv(SPLITS_DIR / f"{name}.csv", SPLIT_FIELDS, split_rows)
+    print_split_stats(name, split_rows)
+    return split_rows
+
+
+def has_split(name):
+    """Есть ли разбиение с таким именем"""
+    return (SPLITS_DIR / f"{name}.csv").exists()
+
+
+def load_split(name, split):
+    """
+    Файлы одной выборки разбиения
+
+    Returns:
+        (абсолютные пути, индексы классов, {имя класса: индекс}) - классы по алфавиту,
+        как в flow_from_directory
+    """
+    class_indices = {label: index for index, label in enumerate(sorted(LABELS))}
+    paths, labels = [], []
+    for row in _read_csv(SPLITS_DIR / f"{name}.csv"):
+        if row["split"] == split:
+            paths.append(str(DATASETS_DIR / row["path"]))
+            labels.append(class_indices[row["label"]])
+    return paths, labels, class_indices
+
+
+def _link(source, target):
+    """Жесткая ссылка (без копирования данных), при невозможности - копия"""
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def materialize_split(name, output_dir):
+    """
+    Раскладывает разбиение в папки output_dir/<split>/<label>/ жесткими ссылками
+
+    Для скриптов, которые читают папки. Файлы, которых нет в разбиении, удаляются.
+
+    Returns:
+        {(split, label): количество}
+    """
+    output_dir = Path(output_dir)
+    expected = {}
+    for row in _read_csv(SPLITS_DIR / f"{name}.csv"):
+        source = DATASETS_DIR / row["path"]
+        target = output_dir / row["split"] / row["label"] / source.name
+        if target in expected:
+            # Одинаковые имена разных изображений из разных источников
+            target = target.with_name(f"{row['sha256'][:8]}_{source.name}")
+        expected[target] = source
+
+    for split in SPLITS:
+        for label in LABELS:
+            target_dir = output_dir / split / label
+            target_dir.mkdir(parents=True, exist_ok=True)
+            for existing in target_dir.iterdir():
+                if existing.is_file() and existing not in expected:
+                    existing.unlink()
+
+    linked = 0
+    for target, source in expected.items():
+        if target.exists():
+            if os.path.samefile(target, source):
+                continue
+            target.unlink()
+        _link(source, target)
+        linked += 1
+
+    counts = Counter((target.parent.parent.name, target.parent.name) for target in expected)
+    print(f"🔗 {output_dir}: {len(expected)} изображений (новых ссылок: {linked})")
+    return counts
+
+
+def print_split_stats(name, split_rows):
+    counts = Counter((row["split"], row["label"]) for row in split_rows)
+    print(f"📊 Разбиение {name}:")
+    for split in SPLITS:
+        print(f"   {split.capitalize()}: {counts[(split, 'positive')]} дефектов, {counts[(split, 'negative')]} норма")
+
+
+def print_stats():
+    rows = _read_csv(IMAGES_INDEX)
+    if not rows:
+        print("❌ Манифест не создан: python dataset_manifest.py build")
+        return
+    unique = unique_images(rows)
+    duplicate_bytes = sum(int(row["size"]) for row in rows) - sum(int(row["size"]) for row in unique)
+    print(f"📊 Файлов: {len(rows)}, уникальных изображений: {len(unique)}, "
+          f"дубликатов: {len(rows) - len(unique)} ({duplicate_bytes / 1024 / 1024:.1f} МБ)")
+    for source, count in Counter(row["source"] for row in rows).items():
+        print(f"   {source}: {count}")
+    for split_path in sorted(SPLITS_DIR.glob("*.csv")):
+        print_split_stats(split_path.stem, _read_csv(split_path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Манифест датасета дефектов бетона")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Проиндексировать изображения")
+    build.add_argument("--sources", nargs="+", default=list(DEFAULT_SOURCES))
+
+    split = commands.add_parser("split", help="Создать разбиение train/val/test")
+    split.add_argument("name")
+    split.add_argument("--sources", nargs="+", default=list(DEFAULT_SOURCES))
+    split.add_argument("--ratios", nargs=3, type=float, default=[0.7, 0.15, 0.15])
+    split.add_argument("--seed", type=int, default=42)
+    split.add_argument("--output", help="Разложить разбиение в папки (жесткие ссылки)")
+
+    commands.add_parser("stats", help="Статистика манифеста и разбиений")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        build_manifest(args.sources)
+    elif args.command == "split":
+        make_split(args.name, args.sources, args.ratios, args.seed)
+        if args.output:
+            materialize_split(args.name, args.output)
+    else:
+        print_stats()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,41 +7,39 @@ import tensorflow as tf
 from tensorflow import keras
 from tensorflow.keras import layers
 import json
+import sys
 from pathlib import Path
 import numpy as np
 
+# Общий конвейер данных лежит в datasets/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from image_pipeline import split_or_directory_dataset
+
 def load_dataset_config():
     """Загружает конфигурацию датасета"""
     with open("expanded_dataset_config.json", "r", encoding="utf-8") as f:
         return json.load(f)
 
-def create_data_generators(config):
-    """Создает генераторы данных для обучения"""
-    train_datagen = keras.preprocessing.image.ImageDataGenerator(
-        rescale=1./255,
-        rotation_range=config["augmentation"]["rotation"],
-        brightness_range=[1-config["augmentation"]["brightness"], 
-                         1+config["augmentation"]["brightness"]],
-        horizontal_flip=config["augmentation"]["horizontal_flip"],
-        zoom_range=config["augmentation"]["zoom_range"]
-    )
+def create_datasets(config):
+    """
+    Создает конвейеры данных tf.data (JPEG декодируются один раз, аугментация слоями Keras)
     
-    train_generator = train_datagen.flow_from_directory(
-        "train/",
-        target_size=tuple(config["image_size"]),
-        batch_size=config["training"]["batch_size"],
-        class_mode="binary"
-    )
+    Выборки берутся из разбиения манифеста (dataset_manifest.py), если оно создано, иначе из папок train/ и val/.
+    """
+    image_size = tuple(config["image_size"])
+    batch_size = config["training"]["batch_size"]
     
-    val_datagen = keras.preprocessing.image.ImageDataGenerator(rescale=1./255)
-    val_generator = val_datagen.flow_from_directory(
-        "val/",
-        target_size=tuple(config["image_size"]),
-        batch_size=config["training"]["batch_size"],
-        class_mode="binary"
+    train_ds, _ = split_or_directory_dataset(
+        "expanded",
+        "train",
+        image_size,
+        batch_size,
+        training=True,
+        augmentation=config["augmentation"]
     )
+    val_ds, _ = split_or_directory_dataset("expanded", "val", image_size, batch_size)
     
-    return train_generator, val_generator
+    return train_ds, val_ds
 
 def create_improved_model(config):
     """Создает улучшенную модель для классификации"""
@@ -85,8 +83,8 @@ def train_expanded_model():
     # Загружаем конфигурацию
     config = load_dataset_config()
     
-    # Создаем генераторы данных
-    train_gen, val_gen = create_data_generators(config)
+    # Создаем конвейеры данных
+    train_ds, val_ds = create_datasets(config)
     
     # Создаем улучшенную модель
     model = create_improved_model(config)
@@ -111,9 +109,9 @@ def train_expanded_model():
     
     # Обучаем модель
     history = model.fit(
-        train_gen,
+        train_ds,
         epochs=config["training"]["epochs"],
-        validation_data=val_gen,
+        validation_data=val_ds,
         callbacks=callbacks,
         verbose=1
     )
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Входной конвейер tf.data для обучения моделей дефектов
+Вместо ImageDataGenerator.flow_from_directory: JPEG декодируются параллельно
+и только один раз - уменьшенные тензоры 224x224 (uint8) кэшируются в памяти
+или в файле, аугментация выполняется слоями Keras над целым батчем,
+следующий батч готовится (prefetch), пока модель обучается на текущем.
+
+Использование:
+    train_ds, class_indices = directory_dataset("train/", (224, 224), 32, training=True,
+                                                augmentation=config["augmentation"])
+    model.fit(train_ds, ...)
+
+    # или по разбиению из манифеста (dataset_manifest.py) - без копий файлов
+    train_ds, class_indices = manifest_dataset("maximized", "train", (224, 224), 32, training=True)
+"""
+
+import hashlib
+from pathlib import Path
+
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+from tensorflow.keras import layers
+
+from dataset_manifest import has_split, load_split
+
+AUTOTUNE = tf.data.AUTOTUNE
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def list_labelled_files(data_dir, validation_split=None, subset=None, seed=123):
+    """
+    Файлы изображений и метки по поддиректориям классов
+
+    Классы нумеруются по алфавиту, как в flow_from_directory.
+
+    Args:
+        data_dir: Директория вида data_dir/<класс>/*.jpg
+        validation_split: Доля валидационной выборки (если нужно разделение)
+        subset: 'training' или 'validation' (вместе с validation_split)
+        seed: Зерно для воспроизводимого разделения
+
+    Returns:
+        (пути, метки, {имя класса: индекс})
+    """
+    data_dir = Path(data_dir)
+    class_names = sorted(p.name for p in data_dir.iterdir() if p.is_dir())
+    class_indices = {name: index for index, name in enumerate(class_names)}
+
+    paths, labels = [], []
+    for name, index in class_indices.items():
+        files = sorted(str(p) for p in (data_dir / name).iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+        if validation_split:
+            files = list(np.random.RandomState(seed).permutation(files))
+            split = int(len(files) * (1 - validation_split))
+            files = files[:split] if subset == 'training' else files[split:]
+        paths.extend(files)
+        labels.extend([index] * len(files))
+
+    return paths, labels, class_indices
+
+
+def random_brightness_scale(brightness):
+    """
+    Яркость как в ImageDataGenerator(brightness_range=[1 - b, 1 + b]):
+    каждое изображение умножается на случайный коэффициент
+    """
+    def scale(images):
+        factors = tf.random.uniform([tf.shape(images)[0], 1, 1, 1], 1.0 - brightness, 1.0 + brightness)
+        return images * factors
+
+    return layers.Lambda(scale, name='random_brightness')
+
+
+def build_augmentation(augmentation):
+    """
+    Слои аугментации по конфигурации (ключи как в *_dataset_config.json)
+
+    Сдвиг (shear_range) слоями Keras не поддерживается и пропускается.
+    contrast не применяется - ImageDataGenerator его тоже не использовал.
+    """
+    augmentation = augmentation or {}
+    steps = []
+
+    flip_modes = []
+    if augmentation.get('horizontal_flip'):
+        flip_modes.append('horizontal')
+    if augmentation.get('vertical_flip'):
+        flip_modes.append('vertical')
+    if flip_modes:
+        steps.append(layers.RandomFlip('_and_'.join(flip_modes)))
+
+    if augmentation.get('rotation'):
+        steps.append(layers.RandomRotation(augmentation['rotation'] / 360.0, fill_mode='nearest'))
+    if augmentation.get('zoom_range'):
+        steps.append(layers.RandomZoom(augmentation['zoom_range'], fill_mode='nearest'))
+    if augmentation.get('width_shift_range') or augmentation.get('height_shift_range'):
+        steps.append(layers.RandomTranslation(augmentation.get('height_shift_range', 0),
+                                              augmentation.get('width_shift_range', 0),
+                                              fill_mode='nearest'))
+    if augmentation.get('brightness'):
+        steps.append(random_brightness_scale(augmentation['brightness']))
+
+    return keras.Sequential(steps, name='augmentation') if steps else None
+
+
+def _cache_path(cache_dir, paths, image_size):
+    """Файл кэша зависит от списка файлов и размера - при изменении датасета создается новый"""
+    digest = hashlib.md5('\n'.join(paths).encode('utf-8')).hexdigest()[:12]
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return str(cache_dir / f"images_{image_size[0]}x{image_size[1]}_{digest}")
+
+
+def make_dataset(paths, labels, image_size=(224, 224), batch_size=32, training=False,
+                 augmentation=None, cache='memory', num_classes=None, seed=123):
+    """
+    Собирает конвейер tf.data
+
+    Args:
+        paths: Пути к изображениям
+        labels: Индексы классов
+        image_size: Размер входа модели
+        batch_size: Размер батча
+        training: Перемешивание и аугментация
+        augmentation: Конфигурация аугментации (см. build_augmentation)
+        cache: 'memory', директория для файлового кэша или None
+        num_classes: Для one-hot меток (categorical); None - бинарные метки
+
+    Returns:
+        tf.data.Dataset с батчами (изображения float32 0..1, метки)
+    """
+    image_size = tuple(image_size)
+
+    def load(path, label):
+        image = tf.io.decode_image(tf.io.read_file(path), channels=3, expand_animations=False)
+        image = tf.image.resize(image, image_size)
+        # В кэше храним uint8 - в 4 раза меньше памяти, чем float32
+        return tf.cast(tf.clip_by_value(tf.round(image), 0, 255), tf.uint8), label
+
+    dataset = tf.data.Dataset.from_tensor_slices((list(paths), list(labels)))
+    dataset = dataset.map(load, num_parallel_calls=AUTOTUNE, deterministic=not training)
+
+    if cache == 'memory':
+        dataset = dataset.cache()
+    elif cache:
+        dataset = dataset.cache(_cache_path(cache, paths, image_size))
+
+    if training:
+        dataset = dataset.shuffle(len(paths), seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size)
+
+    augment = build_augmentation(augmentation) if training else None
+
+    def prepare(images, batch_labels):
+        images = tf.cast(images, tf.float32) / 255.0
+        if augment is not None:
+            images = tf.clip_by_value(augment(images, training=True), 0.0, 1.0)
+        if num_classes:
+            batch_labels = tf.one_hot(batch_labels, num_classes)
+        else:
+            batch_labels = tf.cast(batch_labels, tf.float32)
+        return images, batch_labels
+
+    dataset = dataset.map(prepare, num_parallel_calls=AUTOTUNE)
+    return dataset.prefetch(AUTOTUNE)
+
+
+def directory_dataset(data_dir, image_size=(224, 224), batch_size=32, training=False,
+                      augmentation=None, cache='memory', label_mode='binary',
+                      validation_split=None, subset=None, seed=123):
+    """
+    Конвейер по директории с поддиректориями классов (замена flow_from_directory)
+
+    Args:
+        label_mode: 'binary' или 'categorical'
+        Остальные - см. list_labelled_files и make_dataset
+
+    Returns:
+        (tf.data.Dataset, {имя класса: индекс})
+    """
+    paths, labels, class_indices = list_labelled_files(data_dir, validation_split, subset, seed)
+    num_classes = len(class_indices) if label_mode == 'categorical' else None
+    dataset = make_dataset(paths, labels, image_size, batch_size, training,
+                           augmentation, cache, num_classes, seed)
+    print(f"📊 {data_dir}: {len(paths)} изображений, классы {class_indices}")
+    return dataset, class_indices
+
+
+def manifest_dataset(split_name, subset, image_size=(224, 224), batch_size=32, training=False,
+                     augmentation=None, cache='memory', seed=123):
+    """
+    Конвейер по разбиению из манифеста (manifest/splits/<split_name>.csv)
+
+    Args:
+        split_name: Имя разбиения
+        subset: 'train', 'val' или 'test'
+        Остальные - см. make_dataset
+
+    Returns:
+        (tf.data.Dataset с бинарными метками, {имя класса: индекс})
+    """
+    paths, labels, class_indices = load_split(split_name, subset)
+    dataset = make_dataset(paths, labels, image_size, batch_size, training, augmentation, cache, None, seed)
+    print(f"📊 {split_name}/{subset}: {len(paths)} изображений, классы {class_indices}")
+    return dataset, class_indices
+
+
+def split_or_directory_dataset(split_name, subset, image_size=(224, 224), batch_size=32, training=False,
+                               augmentation=None, cache='memory'):
+    """Разбиение из манифеста, если оно создано, иначе - папка <subset>/ (как раньше)"""
+    if has_split(split_name):
+        return manifest_dataset(split_name, subset, image_size, batch_size, training, augmentation, cache)
+    return directory_dataset(f"{subset}/", image_size, batch_size, training, augmentation, cache)
@@ -4,10 +4,11 @@
 """
 
 import os
-import shutil
 from pathlib import Path
 import json
 
+from dataset_manifest import build_manifest, make_split, materialize_split
+
 def create_training_structure():
     """Создает структуру для обучения модели"""
     print("🔄 Создаем структуру для обучения...")
@@ -31,43 +32,14 @@ def split_dataset():
     """Разделяет датасет на train/val/test"""
     print("🔄 Разделяем датасет на train/val/test...")
     
-    # Копируем существующие изображения
-    source_positive = Path("concrete_cracks/positive")
-    source_negative = Path("concrete_cracks/negative")
-    
-    if source_positive.exists():
-        positive_images = list(source_positive.glob("*.jpg"))
-        negative_images = list(source_negative.glob("*.jpg"))
-        
-        # Разделяем положительные примеры (80% train, 10% val, 10% test)
-        train_pos = positive_images[:int(len(positive_images) * 0.8)]
-        val_pos = positive_images[int(len(positive_images) * 0.8):int(len(positive_images) * 0.9)]
-        test_pos = positive_images[int(len(positive_images) * 0.9):]
-        
-        # Разделяем отрицательные примеры
-        train_neg = negative_images[:int(len(negative_images) * 0.8)]
-        val_neg = negative_images[int(len(negative_images) * 0.8):int(len(negative_images) * 0.9)]
-        test_neg = negative_images[int(len(negative_images) * 0.9):]
-        
-        # Копируем файлы
-        for img in train_pos:
-            shutil.copy2(img, "training_data/train/positive/")
-        for img in val_pos:
-            shutil.copy2(img, "training_data/val/positive/")
-        for img in test_pos:
-            shutil.copy2(img, "training_data/test/positive/")
-            
-        for img in train_neg:
-            shutil.copy2(img, "training_data/train/negative/")
-        for img in val_neg:
-            shutil.copy2(img, "training_data/val/negative/")
-        for img in test_neg:
-            shutil.copy2(img, "training_data/test/negative/")
-        
-        print(f"✅ Разделение завершено:")
-        print(f"   Train: {len(train_pos)} положительных, {len(train_neg)} отрицательных")
-        print(f"   Val: {len(val_pos)} положительных, {len(val_neg)} отрицательных")
-        print(f"   Test: {len(test_pos)} положительных, {len(test_neg)} отрицательных")
+    # Индексируем изображения (хеш считается только для новых и измененных файлов)
+    build_manifest()
+    
+    # Разделяем (80% train, 10% val, 10% test) - индекс manifest/splits/concrete.csv
+    make_split("concrete", sources=("concrete_cracks",), ratios=(0.8, 0.1, 0.1))
+    
+    # Папки train/val/test - жесткие ссылки на исходные изображения, без копирования
+    materialize_split("concrete", "training_data")
 
 def create_dataset_config():
     """Создает конфигурационный файл для датасета"""
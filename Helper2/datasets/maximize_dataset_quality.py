@@ -5,13 +5,18 @@
 
 import os
 import shutil
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import json
 import numpy as np
-from PIL import Image, ImageDraw, ImageFilter, ImageEnhance
-import random
+from PIL import Image, ImageFilter, ImageEnhance
 
-def create_balanced_dataset():
+IMAGE_SIZE = 224
+# Зерно синтетической генерации по умолчанию (одинаковый датасет при повторном запуске)
+SYNTHETIC_SEED = 42
+
+def create_balanced_dataset(scale=1, workers=None, seed=SYNTHETIC_SEED):
     """Создает сбалансированный датасет с большим количеством данных"""
     print("🚀 Создаем максимально улучшенный сбалансированный датасет...")
     
@@ -29,14 +34,14 @@ def create_balanced_dataset():
     
     # Создаем высококачественные синтетические изображения
     print("🎨 Создаем высококачественные синтетические изображения...")
-    create_high_quality_synthetic_images(positive_dir, negative_dir)
+    create_high_quality_synthetic_images(positive_dir, negative_dir, scale, workers, seed)
     
     # Создаем аугментированные версии
     print("🔄 Создаем аугментированные версии...")
     create_augmented_versions(positive_dir, negative_dir)
     
     # Создаем информацию о датасете
-    create_maximized_dataset_info(base_dir)
+    create_maximized_dataset_info(base_dir, scale)
     
     return base_dir
 
@@ -51,244 +56,227 @@ def copy_existing_images(positive_dir, negative_dir):
         for img_file in Path("expanded_dataset/negative").glob("*.jpg"):
             shutil.copy2(img_file, negative_dir / f"original_{img_file.name}")
 
-def create_high_quality_synthetic_images(positive_dir, negative_dir):
-    """Создает высококачественные синтетические изображения"""
+def create_high_quality_synthetic_images(positive_dir, negative_dir, scale=1, workers=None, seed=SYNTHETIC_SEED):
+    """
+    Создает высококачественные синтетические изображения
+    
+    Изображения генерируются в пуле процессов; у каждого изображения свое зерно
+    (seed, тип, номер), поэтому результат не зависит от числа процессов.
+    
+    Args:
+        scale: Множитель количества (1 - 125 изображений, 100 - 12 500)
+        workers: Число процессов (по умолчанию - по числу ядер)
+        seed: Общее зерно генерации
+    """
     try:
         print("🎨 Создаем реалистичные дефекты...")
         
-        # Создаем разнообразные трещины
-        for i in range(30):
-            create_realistic_crack(positive_dir, f"realistic_crack_{i+1}.jpg")
-        
-        # Создаем разнообразные пятна
-        for i in range(25):
-            create_realistic_stain(positive_dir, f"realistic_stain_{i+1}.jpg")
-        
-        # Создаем сколы и повреждения
-        for i in range(20):
-            create_realistic_damage(positive_dir, f"realistic_damage_{i+1}.jpg")
+        output_dirs = {'positive': positive_dir, 'negative': negative_dir}
+        jobs = []
+        for kind, (_, label, prefix, count) in SYNTHETIC_KINDS.items():
+            for i in range(count * scale):
+                jobs.append((kind, i, seed, str(output_dirs[label] / f"{prefix}_{i+1}.jpg")))
         
-        # Создаем высококачественные нормальные поверхности
-        for i in range(50):
-            create_realistic_normal_surface(negative_dir, f"realistic_normal_{i+1}.jpg")
+        if workers == 1 or len(jobs) < 2:
+            for job in jobs:
+                render_synthetic_image(job)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for _ in executor.map(render_synthetic_image, jobs, chunksize=32):
+                    pass
         
-        print("✅ Создано 125 высококачественных синтетических изображений")
+        print(f"✅ Создано {len(jobs)} высококачественных синтетических изображений")
         
     except Exception as e:
         print(f"⚠️ Ошибка создания синтетических изображений: {e}")
 
-def create_realistic_crack(output_dir, filename):
-    """Создает реалистичную трещину"""
+def concrete_base(rng, base_color, points, low, high):
+    """Однотонный фон с точечной текстурой бетона"""
+    img = np.full((IMAGE_SIZE, IMAGE_SIZE, 3), base_color, dtype=np.uint8)
+    ys, xs = rng.integers(0, IMAGE_SIZE, size=(2, points))
+    img[ys, xs] = rng.integers(low, high + 1, size=points, dtype=np.uint8)[:, None]
+    return img
+
+def stamp_disks(img, xs, ys, radii, colors):
+    """Рисует набор кругов одним присваиванием (colors - (n,) оттенки серого или (n, 3))"""
+    xs, ys, radii = (np.asarray(a, dtype=int) for a in (xs, ys, radii))
+    colors = np.asarray(colors, dtype=np.uint8)
+    if colors.ndim == 1:
+        colors = np.repeat(colors[:, None], 3, axis=1)
+    
+    r_max = int(radii.max())
+    oy, ox = np.mgrid[-r_max:r_max + 1, -r_max:r_max + 1]
+    px = xs[:, None, None] + ox
+    py = ys[:, None, None] + oy
+    valid = ((ox ** 2 + oy ** 2)[None] <= (radii ** 2)[:, None, None]) & \
+            (px >= 0) & (px < IMAGE_SIZE) & (py >= 0) & (py < IMAGE_SIZE)
+    img[py[valid], px[valid]] = np.broadcast_to(colors[:, None, None, :], (*valid.shape, 3))[valid]
+
+def draw_polyline(img, points, colors, width=1):
+    """
+    Рисует ломаную: все отрезки дискретизируются одним массивом с шагом <= 1 пикселя
+    
+    Args:
+        points: Вершины (n, 2) в виде (x, y)
+        colors: Цвет каждого отрезка (n-1, 3)
+        width: Толщина линии
+    """
+    points = np.asarray(points, dtype=float)
+    start, end = points[:-1], points[1:]
+    steps = int(np.ceil(np.abs(end - start).max())) + 1
+    t = np.linspace(0.0, 1.0, steps)
+    samples = np.rint(start[:, None, :] + (end - start)[:, None, :] * t[None, :, None]).astype(int)
+    
+    xs = samples[..., 0].ravel()
+    ys = samples[..., 1].ravel()
+    segment_colors = np.repeat(np.asarray(colors, dtype=np.uint8), steps, axis=0)
+    stamp_disks(img, xs, ys, np.full(len(xs), width // 2), segment_colors)
+
+def random_walk(rng, start, steps, continue_prob=0.6):
+    """
+    Извилистая траектория трещины: шаг по осям, чаще всего в прежнем направлении
+    
+    Returns:
+        Вершины (steps, 2)
+    """
+    directions = np.array([(-1, 0), (1, 0), (0, -1), (0, 1)])
+    choice = rng.integers(0, 4, size=steps)
+    # Шаги "продолжить" повторяют последнее выбранное направление
+    keep = rng.random(steps) < continue_prob
+    keep[0] = False
+    last_turn = np.maximum.accumulate(np.where(keep, 0, np.arange(steps)))
+    moves = directions[choice[last_turn]] * rng.integers(2, 6, size=(steps, 1))
+    return np.clip(np.asarray(start) + np.cumsum(moves, axis=0), 5, IMAGE_SIZE - 5)
+
+def render_crack(rng):
+    """Изображение с реалистичной трещиной"""
     # Создаем базовое изображение бетона с текстурой
-    img = Image.new('RGB', (224, 224), color=(125, 125, 125))
-    draw = ImageDraw.Draw(img)
-    
-    # Добавляем текстуру бетона
-    for _ in range(200):
-        x = random.randint(0, 223)
-        y = random.randint(0, 223)
-        color = random.randint(110, 140)
-        draw.point((x, y), fill=(color, color, color))
-    
-    # Создаем реалистичную трещину
-    start_x = random.randint(20, 204)
-    start_y = random.randint(20, 204)
+    img = concrete_base(rng, 125, 200, 110, 140)
     
     # Создаем извилистую трещину
-    points = []
-    current_x, current_y = start_x, start_y
+    points = random_walk(rng, rng.integers(20, IMAGE_SIZE - 20, size=2), 50)
     
-    for step in range(50):
-        # Случайное направление с предпочтением продолжения
-        if step > 0:
-            direction = random.choice(['continue', 'continue', 'continue', 'turn_left', 'turn_right'])
-        else:
-            direction = random.choice(['up', 'down', 'left', 'right'])
-        
-        if direction == 'continue' and step > 0:
-            # Продолжаем в том же направлении
-            dx = points[-1][0] - (points[-2][0] if len(points) > 1 else start_x)
-            dy = points[-1][1] - (points[-2][1] if len(points) > 1 else start_y)
-        elif direction == 'turn_left':
-            dx, dy = random.choice([(-1, 0), (0, -1), (1, 0), (0, 1)])
-        elif direction == 'turn_right':
-            dx, dy = random.choice([(1, 0), (0, 1), (-1, 0), (0, -1)])
-        else:
-            dx, dy = random.choice([(-1, 0), (1, 0), (0, -1), (0, 1)])
-        
-        current_x += dx * random.randint(2, 5)
-        current_y += dy * random.randint(2, 5)
-        
-        # Ограничиваем границы
-        current_x = max(5, min(219, current_x))
-        current_y = max(5, min(219, current_y))
-        
-        points.append((current_x, current_y))
-    
-    # Рисуем трещину
-    for i in range(len(points) - 1):
-        # Создаем неровные края трещины
-        for offset in range(-2, 3):
-            x1 = points[i][0] + offset
-            y1 = points[i][1] + offset
-            x2 = points[i+1][0] + offset
-            y2 = points[i+1][1] + offset
-            
-            if 0 <= x1 < 224 and 0 <= y1 < 224 and 0 <= x2 < 224 and 0 <= y2 < 224:
-                color = (60 + random.randint(-10, 10), 60 + random.randint(-10, 10), 60 + random.randint(-10, 10))
-                draw.line([(x1, y1), (x2, y2)], fill=color, width=random.randint(1, 3))
+    # Рисуем трещину: несколько смещенных линий дают неровные края
+    for offset in range(-2, 3):
+        colors = 60 + rng.integers(-10, 11, size=(len(points) - 1, 3))
+        draw_polyline(img, points + offset, colors, width=int(rng.integers(1, 4)))
     
     # Добавляем тени и блики
-    img = add_realistic_lighting(img)
-    
-    img.save(output_dir / filename)
+    return Image.fromarray(add_realistic_lighting(img))
 
-def create_realistic_stain(output_dir, filename):
-    """Создает реалистичное пятно"""
-    img = Image.new('RGB', (224, 224), color=(130, 130, 130))
-    draw = ImageDraw.Draw(img)
-    
-    # Добавляем текстуру
-    for _ in range(150):
-        x = random.randint(0, 223)
-        y = random.randint(0, 223)
-        color = random.randint(120, 140)
-        draw.point((x, y), fill=(color, color, color))
-    
-    # Создаем пятно неправильной формы
-    center_x = random.randint(50, 174)
-    center_y = random.randint(50, 174)
-    
-    # Создаем несколько концентрических областей
-    for radius in range(15, 35, 3):
-        for angle in range(0, 360, 2):
-            # Добавляем случайность в форму
-            r = radius + random.randint(-3, 3)
-            x = center_x + int(r * np.cos(np.radians(angle)))
-            y = center_y + int(r * np.sin(np.radians(angle)))
-            
-            if 0 <= x < 224 and 0 <= y < 224:
-                # Градиент от центра к краям
-                intensity = max(0, 1 - (radius - 15) / 20)
-                color_value = int(80 + intensity * 40)
-                color = (color_value, color_value, color_value)
-                draw.ellipse([x-1, y-1, x+1, y+1], fill=color)
+def render_ring_stamps(rng, img, center, radii, angle_step, jitter, intensity_fn):
+    """Кольца из кругов радиуса 1 вокруг центра; цвет по функции радиуса"""
+    angles = np.radians(np.arange(0, 360, angle_step))
+    r = np.asarray(radii, dtype=float)[:, None] + rng.integers(-jitter, jitter + 1, size=(len(radii), len(angles)))
+    xs = center[0] + (r * np.cos(angles)).astype(int)
+    ys = center[1] + (r * np.sin(angles)).astype(int)
+    colors = intensity_fn(np.broadcast_to(np.asarray(radii)[:, None], r.shape), r)
+    stamp_disks(img, xs.ravel(), ys.ravel(), np.ones(xs.size, dtype=int), colors.ravel().astype(np.uint8))
+
+def render_stain(rng):
+    """Изображение с реалистичным пятном"""
+    img = concrete_base(rng, 130, 150, 120, 140)
+    
+    # Создаем пятно неправильной формы из нескольких концентрических областей
+    center = rng.integers(50, IMAGE_SIZE - 50, size=2)
+    render_ring_stamps(
+        rng, img, center, np.arange(15, 35, 3), 2, 3,
+        # Градиент от центра к краям
+        lambda radius, r: (80 + np.maximum(0, 1 - (radius - 15) / 20) * 40).astype(int)
+    )
     
     # Добавляем размытие для реалистичности
-    img = img.filter(ImageFilter.GaussianBlur(radius=1))
-    
-    img.save(output_dir / filename)
+    return Image.fromarray(img).filter(ImageFilter.GaussianBlur(radius=1))
 
-def create_realistic_damage(output_dir, filename):
-    """Создает реалистичное повреждение"""
-    img = Image.new('RGB', (224, 224), color=(125, 125, 125))
-    draw = ImageDraw.Draw(img)
-    
-    # Добавляем текстуру
-    for _ in range(180):
-        x = random.randint(0, 223)
-        y = random.randint(0, 223)
-        color = random.randint(115, 135)
-        draw.point((x, y), fill=(color, color, color))
+def render_damage(rng):
+    """Изображение с реалистичным повреждением (скол, вмятина или царапина)"""
+    img = concrete_base(rng, 125, 180, 115, 135)
     
-    # Создаем повреждение (скол или вмятину)
-    damage_type = random.choice(['chip', 'dent', 'scratch'])
+    damage_type = rng.choice(['chip', 'dent', 'scratch'])
     
     if damage_type == 'chip':
-        # Скол
-        center_x = random.randint(30, 194)
-        center_y = random.randint(30, 194)
-        size = random.randint(10, 25)
-        
-        # Создаем неровный скол
-        for angle in range(0, 360, 3):
-            r = size + random.randint(-2, 2)
-            x = center_x + int(r * np.cos(np.radians(angle)))
-            y = center_y + int(r * np.sin(np.radians(angle)))
-            
-            if 0 <= x < 224 and 0 <= y < 224:
-                color = (90, 90, 90)  # Темнее для скола
-                draw.ellipse([x-1, y-1, x+1, y+1], fill=color)
+        # Скол - неровный темный контур
+        center = rng.integers(30, IMAGE_SIZE - 30, size=2)
+        size = int(rng.integers(10, 26))
+        render_ring_stamps(rng, img, center, [size], 3, 2, lambda radius, r: np.full(r.shape, 90))
     
     elif damage_type == 'dent':
-        # Вмятина
-        center_x = random.randint(40, 184)
-        center_y = random.randint(40, 184)
-        size = random.randint(15, 30)
-        
-        for angle in range(0, 360, 2):
-            r = size + random.randint(-3, 3)
-            x = center_x + int(r * np.cos(np.radians(angle)))
-            y = center_y + int(r * np.sin(np.radians(angle)))
-            
-            if 0 <= x < 224 and 0 <= y < 224:
-                # Градиент для вмятины
-                intensity = max(0, 1 - (r - 15) / 15)
-                color_value = int(100 + intensity * 30)
-                color = (color_value, color_value, color_value)
-                draw.ellipse([x-1, y-1, x+1, y+1], fill=color)
-    
-    else:  # scratch
-        # Царапина
-        start_x = random.randint(20, 204)
-        start_y = random.randint(20, 204)
-        length = random.randint(30, 80)
-        
-        for i in range(length):
-            x = start_x + i + random.randint(-1, 1)
-            y = start_y + random.randint(-2, 2)
-            
-            if 0 <= x < 224 and 0 <= y < 224:
-                color = (70, 70, 70)
-                draw.line([(x, y), (x+1, y)], fill=color, width=2)
-    
-    img.save(output_dir / filename)
+        # Вмятина - контур с градиентом
+        center = rng.integers(40, IMAGE_SIZE - 40, size=2)
+        size = int(rng.integers(15, 31))
+        render_ring_stamps(
+            rng, img, center, [size], 2, 3,
+            lambda radius, r: (100 + np.maximum(0, 1 - (r - 15) / 15) * 30).astype(int)
+        )
+    
+    else:
+        # Царапина - почти горизонтальная линия с дрожанием
+        start = rng.integers(20, IMAGE_SIZE - 20, size=2)
+        length = int(rng.integers(30, 81))
+        xs = start[0] + np.arange(length) + rng.integers(-1, 2, size=length)
+        ys = start[1] + rng.integers(-2, 3, size=length)
+        inside = (xs >= 0) & (xs < IMAGE_SIZE - 1) & (ys >= 0) & (ys < IMAGE_SIZE)
+        xs, ys = xs[inside], ys[inside]
+        img[ys, xs] = 70
+        img[ys, xs + 1] = 70
+    
+    return Image.fromarray(img)
 
-def create_realistic_normal_surface(output_dir, filename):
-    """Создает реалистичную нормальную поверхность"""
-    # Создаем базовое изображение
-    base_color = random.randint(120, 140)
-    img = Image.new('RGB', (224, 224), color=(base_color, base_color, base_color))
-    draw = ImageDraw.Draw(img)
+def render_normal_surface(rng):
+    """Изображение реалистичной нормальной поверхности"""
+    base_color = int(rng.integers(120, 141))
     
     # Добавляем разнообразную текстуру
-    for _ in range(300):
-        x = random.randint(0, 223)
-        y = random.randint(0, 223)
-        color_variation = random.randint(-15, 15)
-        color = max(100, min(160, base_color + color_variation))
-        draw.point((x, y), fill=(color, color, color))
+    img = np.full((IMAGE_SIZE, IMAGE_SIZE, 3), base_color, dtype=np.uint8)
+    ys, xs = rng.integers(0, IMAGE_SIZE, size=(2, 300))
+    img[ys, xs] = np.clip(base_color + rng.integers(-15, 16, size=300), 100, 160).astype(np.uint8)[:, None]
     
     # Добавляем мелкие детали (но не дефекты)
-    for _ in range(50):
-        x = random.randint(0, 223)
-        y = random.randint(0, 223)
-        size = random.randint(1, 3)
-        color_variation = random.randint(-10, 10)
-        color = max(110, min(150, base_color + color_variation))
-        draw.ellipse([x-size, y-size, x+size, y+size], fill=(color, color, color))
+    ys, xs = rng.integers(0, IMAGE_SIZE, size=(2, 50))
+    colors = np.clip(base_color + rng.integers(-10, 11, size=50), 110, 150)
+    stamp_disks(img, xs, ys, rng.integers(1, 4, size=50), colors)
     
     # Добавляем легкое размытие для реалистичности
-    img = img.filter(ImageFilter.GaussianBlur(radius=0.5))
-    
-    img.save(output_dir / filename)
+    return Image.fromarray(img).filter(ImageFilter.GaussianBlur(radius=0.5))
 
 def add_realistic_lighting(img):
-    """Добавляет реалистичное освещение"""
-    # Создаем градиент освещения
-    width, height = img.size
-    overlay = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(overlay)
-    
-    # Добавляем легкий градиент
-    for y in range(height):
-        alpha = int(20 * (1 - y / height))
-        draw.line([(0, y), (width, y)], fill=(255, 255, 255, alpha))
-    
-    # Накладываем на исходное изображение
-    img = img.convert('RGBA')
-    img = Image.alpha_composite(img, overlay)
-    return img.convert('RGB')
+    """Добавляет реалистичное освещение (массив uint8 HxWx3)"""
+    # Легкий вертикальный градиент белого: непрозрачность 20/255 сверху, 0 снизу
+    height = img.shape[0]
+    alpha = (20 * (1 - np.arange(height) / height)).astype(int)[:, None, None] / 255.0
+    return np.rint(img * (1 - alpha) + 255 * alpha).astype(np.uint8)
+
+# Тип: (функция, класс, префикс файла, количество при scale=1)
+SYNTHETIC_KINDS = {
+    'crack': (render_crack, 'positive', 'realistic_crack', 30),
+    'stain': (render_stain, 'positive', 'realistic_stain', 25),
+    'damage': (render_damage, 'positive', 'realistic_damage', 20),
+    'normal': (render_normal_surface, 'negative', 'realistic_normal', 50),
+}
+
+def render_synthetic_image(job):
+    """Генерирует и сохраняет одно изображение (выполняется в процессе пула)"""
+    kind, index, seed, output_path = job
+    render, _, _, _ = SYNTHETIC_KINDS[kind]
+    rng = np.random.default_rng([seed, list(SYNTHETIC_KINDS).index(kind), index])
+    render(rng).save(output_path, quality=95)
+    return output_path
+
+def create_realistic_crack(output_dir, filename, rng=None):
+    """Создает реалистичную трещину"""
+    render_crack(rng or np.random.default_rng()).save(output_dir / filename)
+
+def create_realistic_stain(output_dir, filename, rng=None):
+    """Создает реалистичное пятно"""
+    render_stain(rng or np.random.default_rng()).save(output_dir / filename)
+
+def create_realistic_damage(output_dir, filename, rng=None):
+    """Создает реалистичное повреждение"""
+    render_damage(rng or np.random.default_rng()).save(output_dir / filename)
+
+def create_realistic_normal_surface(output_dir, filename, rng=None):
+    """Создает реалистичную нормальную поверхность"""
+    render_normal_surface(rng or np.random.default_rng()).save(output_dir / filename)
 
 def create_augmented_versions(positive_dir, negative_dir):
     """Создает аугментированные версии изображений"""
@@ -331,8 +319,9 @@ def create_augmentations(img_file, output_dir, prefix):
     except Exception as e:
         print(f"⚠️ Ошибка аугментации {img_file}: {e}")
 
-def create_maximized_dataset_info(base_dir):
+def create_maximized_dataset_info(base_dir, scale=1):
     """Создает информацию о максимально улучшенном датасете"""
+    counts = {kind: count * scale for kind, (_, _, _, count) in SYNTHETIC_KINDS.items()}
     positive_count = len(list((base_dir / "positive").glob("*.jpg")))
     negative_count = len(list((base_dir / "negative").glob("*.jpg")))
     
@@ -353,13 +342,13 @@ def create_maximized_dataset_info(base_dir):
 - ✅ Реалистичное освещение и текстуры
 
 ## 🏗️ Типы дефектов:
-- Трещины в бетоне (30 реалистичных)
-- Пятна от протечек (25 реалистичных)
-- Сколы и повреждения (20 реалистичных)
+- Трещины в бетоне ({counts['crack']} реалистичных)
+- Пятна от протечек ({counts['stain']} реалистичных)
+- Сколы и повреждения ({counts['damage']} реалистичных)
 - Аугментированные версии (200+)
 
 ## 🎨 Нормальные поверхности:
-- Разнообразные бетонные поверхности (50 реалистичных)
+- Разнообразные бетонные поверхности ({counts['normal']} реалистичных)
 - Аугментированные версии (150+)
 
 ## 📈 Ожидаемые улучшения:
@@ -382,11 +371,18 @@ def create_maximized_dataset_info(base_dir):
 
 def main():
     """Основная функция"""
+    parser = argparse.ArgumentParser(description="Максимальное улучшение датасета дефектов бетона")
+    parser.add_argument('--scale', type=int, default=1,
+                        help="Множитель количества синтетических изображений (100 - 12 500 изображений)")
+    parser.add_argument('--workers', type=int, default=None, help="Число процессов генерации")
+    parser.add_argument('--seed', type=int, default=SYNTHETIC_SEED, help="Зерно генерации")
+    args = parser.parse_args()
+    
     print("🚀 Максимальное улучшение датасета дефектов бетона")
     print("=" * 70)
     
     # Создаем максимально улучшенный датасет
-    dataset_dir = create_balanced_dataset()
+    dataset_dir = create_balanced_dataset(args.scale, args.workers, args.seed)
     
     print(f"\n✅ Максимально улучшенный датасет создан!")
     print(f"📁 Расположение: {dataset_dir}")
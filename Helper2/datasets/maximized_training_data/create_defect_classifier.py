@@ -7,14 +7,20 @@
 import tensorflow as tf
 from tensorflow import keras
 from tensorflow.keras import layers
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
 from tensorflow.keras.callbacks import ReduceLROnPlateau, EarlyStopping, ModelCheckpoint
 import numpy as np
 import json
 from pathlib import Path
 import os
+import sys
 import shutil
 
+from export_inference_model import export_inference_model
+
+# Общий конвейер данных лежит в datasets/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from image_pipeline import directory_dataset
+
 # Классы дефектов
 DEFECT_CLASSES = {
     0: 'normal',           # Норма
@@ -142,44 +148,42 @@ def train_classifier():
     # Создаем датасет
     dataset_dir = create_classifier_dataset()
     
-    # Создаем генераторы данных
-    train_datagen = ImageDataGenerator(
-        rescale=1./255,
-        rotation_range=20,
-        width_shift_range=0.2,
-        height_shift_range=0.2,
-        horizontal_flip=True,
-        zoom_range=0.2,
-        shear_range=0.2,
-        brightness_range=[0.8, 1.2],
-        fill_mode='nearest',
-        validation_split=0.2
-    )
+    # Создаем конвейеры данных (JPEG декодируются один раз, аугментация слоями Keras)
+    augmentation = {
+        'rotation': 20,
+        'width_shift_range': 0.2,
+        'height_shift_range': 0.2,
+        'horizontal_flip': True,
+        'zoom_range': 0.2,
+        'brightness': 0.2
+    }
     
-    # Генератор для обучения
-    train_generator = train_datagen.flow_from_directory(
+    # Обучающая часть
+    train_ds, class_indices = directory_dataset(
         dataset_dir,
-        target_size=(224, 224),
-        batch_size=16,
-        class_mode='categorical',
-        subset='training',
-        shuffle=True
+        (224, 224),
+        16,
+        training=True,
+        augmentation=augmentation,
+        label_mode='categorical',
+        validation_split=0.2,
+        subset='training'
     )
     
-    # Генератор для валидации
-    val_generator = train_datagen.flow_from_directory(
+    # Валидационная часть
+    val_ds, _ = directory_dataset(
         dataset_dir,
-        target_size=(224, 224),
-        batch_size=16,
-        class_mode='categorical',
-        subset='validation',
-        shuffle=False
+        (224, 224),
+        16,
+        label_mode='categorical',
+        validation_split=0.2,
+        subset='validation'
     )
     
-    print(f"📊 Классы: {train_generator.class_indices}")
+    print(f"📊 Классы: {class_indices}")
     
     # Создаем модель
-    model = create_classifier_model(len(train_generator.class_indices))
+    model = create_classifier_model(len(class_indices))
     
     # Callbacks
     callbacks = [
@@ -190,9 +194,9 @@ def train_classifier():
     
     # Обучаем модель
     history = model.fit(
-        train_generator,
+        train_ds,
         epochs=20,
-        validation_data=val_generator,
+        validation_data=val_ds,
         callbacks=callbacks,
         verbose=1
     )
@@ -202,19 +206,30 @@ def train_classifier():
     
     # Сохраняем информацию о классах
     class_info = {
-        'class_indices': train_generator.class_indices,
+        'class_indices': class_indices,
         'class_names': CLASS_NAMES,
-        'num_classes': len(train_generator.class_indices)
+        'num_classes': len(class_indices)
     }
     
     with open('defect_classifier_info.json', 'w', encoding='utf-8') as f:
         json.dump(class_info, f, ensure_ascii=False, indent=2)
     
+    # Экспортируем квантованную модель для API (отдельной тестовой выборки нет -
+    # точность сверяется на всем датасете классификатора)
+    export_inference_model(
+        model,
+        'final_defect_classifier.tflite',
+        eval_dir=dataset_dir,
+        class_indices=class_indices,
+        calibration_dir=dataset_dir
+    )
+    
     print("✅ Классификатор обучен и сохранен!")
     print(f"📁 Модель: final_defect_classifier.h5")
+    print(f"📁 Облегченная модель: final_defect_classifier.tflite")
     print(f"📁 Информация: defect_classifier_info.json")
     
-    return model, train_generator.class_indices
+    return model, class_indices
 
 def test_classifier():
     """Тестирует классификатор"""
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Экспорт обученной модели в TFLite для инференса на CPU
+Квантованная модель загружается без TensorFlow (tflite-runtime) за доли секунды
+и занимает в памяти в несколько раз меньше, чем Keras .h5.
+После экспорта точность проверяется на тестовой выборке против исходной модели.
+
+Использование:
+    python export_inference_model.py best_maximized_model.h5 [--quantization int8|float16|dynamic|none]
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+from PIL import Image
+
+QUANTIZATION_MODES = ('int8', 'float16', 'dynamic', 'none')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+# Сколько изображений обучающей выборки использовать для калибровки int8
+REPRESENTATIVE_SAMPLES = 200
+# Допустимая потеря точности после квантования (доля)
+MAX_ACCURACY_DROP = 0.01
+
+
+def load_image_array(image_path, image_size=(224, 224)):
+    """Загружает изображение так же, как API (RGB, resize, /255)"""
+    image = Image.open(image_path)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    image = image.resize(tuple(image_size))
+    return np.asarray(image, dtype=np.float32) / 255.0
+
+
+def list_images(directory):
+    """Изображения директории в стабильном порядке"""
+    return sorted(p for p in Path(directory).iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+
+
+def load_labelled_images(data_dir, class_indices, image_size=(224, 224), limit=None):
+    """
+    Загружает изображения из поддиректорий классов
+
+    Args:
+        data_dir: Директория вида data_dir/<класс>/*.jpg
+        class_indices: {имя класса: индекс} (как у flow_from_directory)
+        limit: Максимум изображений на класс
+
+    Returns:
+        (изображения [N, H, W, 3], метки [N])
+    """
+    images, labels = [], []
+    for class_name, index in class_indices.items():
+        class_dir = Path(data_dir) / class_name
+        if not class_dir.exists():
+            continue
+        for image_path in list_images(class_dir)[:limit]:
+            images.append(load_image_array(image_path, image_size))
+            labels.append(index)
+
+    if not images:
+        return np.zeros((0, *image_size, 3), dtype=np.float32), np.zeros((0,), dtype=np.int64)
+    return np.stack(images), np.array(labels)
+
+
+def representative_images(data_dir, image_size=(224, 224), limit=REPRESENTATIVE_SAMPLES):
+    """Изображения для калибровки int8 (равномерно по поддиректориям)"""
+    paths = []
+    for class_dir in sorted(p for p in Path(data_dir).iterdir() if p.is_dir()):
+        paths.extend(list_images(class_dir))
+    step = max(1, len(paths) // limit) if paths else 1
+    return [load_image_array(path, image_size) for path in paths[::step][:limit]]
+
+
+def convert_to_tflite(model, quantization='int8', calibration_images=None):
+    """
+    Конвертирует Keras-модель в TFLite
+
+    Args:
+        model: Keras-модель
+        quantization: int8 (веса и активации, нужны calibration_images),
+            float16 (веса), dynamic (веса int8) или none
+        calibration_images: Изображения для калибровки int8
+
+    Returns:
+        Байты модели TFLite
+    """
+    if quantization not in QUANTIZATION_MODES:
+        raise ValueError(f"Неизвестный режим квантования: {quantization}")
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantization != 'none':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    if quantization == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == 'int8':
+        if not calibration_images:
+            raise ValueError("Для int8 нужны изображения для калибровки")
+
+        def representative_dataset():
+            for image in calibration_images:
+                yield [image[np.newaxis].astype(np.float32)]
+
+        # Целочисленные операции внутри, вход и выход остаются float32
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+
+    return converter.convert()
+
+
+def predict_tflite(model_path, images, batch_size=32):
+    """Предсказания модели TFLite на массиве изображений"""
+    interpreter = tf.lite.Interpreter(model_path=str(model_path))
+    input_details = interpreter.get_input_details()[0]
+    output_details = interpreter.get_output_details()[0]
+
+    outputs = []
+    current_size = None
+    for start in range(0, len(images), batch_size):
+        batch = images[start:start + batch_size].astype(np.float32)
+        if batch.shape[0] != current_size:
+            interpreter.resize_tensor_input(input_details['index'], batch.shape)
+            interpreter.allocate_tensors()
+            current_size = batch.shape[0]
+        interpreter.set_tensor(input_details['index'], batch)
+        interpreter.invoke()
+        outputs.append(interpreter.get_tensor(output_details['index']).copy())
+    return np.concatenate(outputs, axis=0)
+
+
+def to_labels(predictions, threshold=0.5):
+    """Метки классов: порог для бинарной модели, argmax для многоклассовой"""
+    if predictions.shape[-1] == 1:
+        return (predictions[:, 0] > threshold).astype(np.int64)
+    return np.argmax(predictions, axis=-1)
+
+
+def check_accuracy(model, tflite_path, images, labels, batch_size=32):
+    """
+    Сравнивает точность Keras и TFLite на одной выборке
+
+    Returns:
+        Отчет: точности, потеря точности, доля совпадающих ответов, макс. расхождение вероятностей
+    """
+    if len(images) == 0:
+        return {'samples': 0}
+
+    keras_predictions = np.concatenate([
+        model(images[start:start + batch_size], training=False).numpy()
+        for start in range(0, len(images), batch_size)
+    ], axis=0)
+    tflite_predictions = predict_tflite(tflite_path, images, batch_size)
+
+    keras_labels = to_labels(keras_predictions)
+    tflite_labels = to_labels(tflite_predictions)
+    keras_accuracy = float(np.mean(keras_labels == labels))
+    tflite_accuracy = float(np.mean(tflite_labels == labels))
+
+    return {
+        'samples': int(len(images)),
+        'keras_accuracy': keras_accuracy,
+        'tflite_accuracy': tflite_accuracy,
+        'accuracy_drop': keras_accuracy - tflite_accuracy,
+        'agreement': float(np.mean(keras_labels == tflite_labels)),
+        'max_abs_diff': float(np.max(np.abs(keras_predictions - tflite_predictions)))
+    }
+
+
+def export_inference_model(model, output_path, eval_dir, class_indices, quantization='int8',
+                           calibration_dir=None, image_size=(224, 224)):
+    """
+    Экспортирует модель в TFLite и проверяет точность
+
+    Рядом с моделью сохраняется <имя>.json с режимом квантования, классами и отчетом проверки.
+    Если int8/dynamic теряет больше MAX_ACCURACY_DROP точности, модель экспортируется
+    в float16; если и она не проходит проверку, файл .tflite не сохраняется.
+
+    Args:
+        model: Обученная Keras-модель
+        output_path: Путь к файлу .tflite
+        eval_dir: Выборка для проверки точности (data_dir/<класс>/*.jpg)
+        class_indices: {имя класса: индекс}
+        quantization: Режим квантования (см. convert_to_tflite)
+        calibration_dir: Выборка для калибровки int8 (обычно обучающая)
+
+    Returns:
+        Отчет проверки точности
+    """
+    output_path = Path(output_path)
+    candidate_path = output_path.with_name(f"{output_path.stem}.candidate.tflite")
+    images, labels = load_labelled_images(eval_dir, class_indices, image_size)
+    if not len(labels):
+        print(f"⚠️ Нет изображений для проверки точности в {eval_dir}")
+
+    # Если квантование теряет точность, пробуем float16 (веса float16, вычисления float32)
+    modes = [quantization] + (['float16'] if quantization in ('int8', 'dynamic') else [])
+    for mode in modes:
+        print(f"📦 Экспортируем модель в TFLite ({mode})...")
+        calibration_images = None
+        if mode == 'int8':
+            calibration_images = representative_images(calibration_dir or eval_dir, image_size)
+
+        tflite_model = convert_to_tflite(model, mode, calibration_images)
+        candidate_path.write_bytes(tflite_model)
+        report = check_accuracy(model, candidate_path, images, labels)
+        report['quantization'] = mode
+
+        if report['samples']:
+            print(f"📊 Точность Keras: {report['keras_accuracy']:.2%}, TFLite: {report['tflite_accuracy']:.2%} "
+                  f"(совпадение ответов {report['agreement']:.2%}, {report['samples']} изображений)")
+        report['exported'] = not report['samples'] or report['accuracy_drop'] <= MAX_ACCURACY_DROP
+        if report['exported']:
+            break
+        print(f"⚠️ Потеря точности после квантования {mode}: {report['accuracy_drop']:.2%}")
+
+    if report['exported']:
+        candidate_path.replace(output_path)
+        quantization = report['quantization']
+        print(f"✅ Модель сохранена: {output_path} ({len(tflite_model) / 1024 / 1024:.1f} МБ, {quantization})")
+    else:
+        # Ни один режим не прошел проверку: API не должен подхватить такую модель
+        candidate_path.unlink()
+        output_path.unlink(missing_ok=True)
+        quantization = None
+        print(f"❌ Модель TFLite не сохранена: потеря точности больше {MAX_ACCURACY_DROP:.0%}, "
+              f"API будет использовать Keras-модель")
+
+    with open(output_path.with_suffix('.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'quantization': quantization,
+            'image_size': list(image_size),
+            'class_indices': class_indices,
+            'accuracy_check': report
+        }, f, ensure_ascii=False, indent=2)
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Экспорт модели дефектов в TFLite")
+    parser.add_argument('model', help="Путь к модели Keras (.h5)")
+    parser.add_argument('--output', help="Путь к .tflite (по умолчанию рядом с моделью)")
+    parser.add_argument('--quantization', choices=QUANTIZATION_MODES, default='int8')
+    parser.add_argument('--eval-dir', default='test', help="Выборка для проверки точности")
+    parser.add_argument('--calibration-dir', default='train', help="Выборка для калибровки int8")
+    args = parser.parse_args()
+
+    model = keras.models.load_model(args.model)
+    image_size = tuple(model.input_shape[1:3])
+    class_indices = {name: index for index, name in
+                     enumerate(sorted(p.name for p in Path(args.eval_dir).iterdir() if p.is_dir()))}
+
+    export_inference_model(model, args.output or Path(args.model).with_suffix('.tflite'),
+                           args.eval_dir, class_indices, args.quantization,
+                           args.calibration_dir, image_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,76 +3,23 @@
 Скрипт для поиска оптимального баланса между точностью на дефектах и норме
 """
 
-import tensorflow as tf
-from tensorflow import keras
 import numpy as np
-from PIL import Image
-import os
 
-def load_improved_model():
-    """Загружает улучшенную модель"""
-    try:
-        model = keras.models.load_model("improved_model.h5")
-        return model
-    except:
-        try:
-            model = keras.models.load_model("final_improved_model.h5")
-            return model
-        except:
-            return None
-
-def preprocess_image(image_path, target_size=(224, 224)):
-    """Предобрабатывает изображение для модели"""
-    try:
-        img = Image.open(image_path)
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
-        img = img.resize(target_size)
-        img_array = np.array(img) / 255.0
-        img_array = np.expand_dims(img_array, axis=0)
-        return img_array
-    except:
-        return None
+from model_evaluation import find_model, score_model, threshold_curve
 
 def find_optimal_balance():
     """Находит оптимальный баланс между точностью на дефектах и норме"""
     print("🎯 Ищем оптимальный баланс между точностью на дефектах и норме...")
     
-    model = load_improved_model()
-    if model is None:
+    model_path = find_model(("improved_model.h5", "final_improved_model.h5"))
+    if model_path is None:
         print("❌ Не удалось загрузить модель")
         return
     
-    # Собираем данные
-    test_data = []
-    test_labels = []
-    
-    # Дефекты
-    test_positive_dir = "test/positive"
-    if os.path.exists(test_positive_dir):
-        for img_file in os.listdir(test_positive_dir):
-            if img_file.lower().endswith(('.jpg', '.jpeg', '.png')):
-                img_path = os.path.join(test_positive_dir, img_file)
-                img_array = preprocess_image(img_path)
-                if img_array is not None:
-                    pred = model.predict(img_array, verbose=0)[0][0]
-                    test_data.append(pred)
-                    test_labels.append(1)
-    
-    # Норма
-    test_negative_dir = "test/negative"
-    if os.path.exists(test_negative_dir):
-        for img_file in os.listdir(test_negative_dir):
-            if img_file.lower().endswith(('.jpg', '.jpeg', '.png')):
-                img_path = os.path.join(test_negative_dir, img_file)
-                img_array = preprocess_image(img_path)
-                if img_array is not None:
-                    pred = model.predict(img_array, verbose=0)[0][0]
-                    test_data.append(pred)
-                    test_labels.append(0)
-    
-    test_data = np.array(test_data)
-    test_labels = np.array(test_labels)
+    # Вероятности для всей тестовой выборки - один проход модели батчами
+    scores = score_model(model_path, "test")
+    test_data = scores['probabilities']
+    test_labels = scores['labels']
     
     print(f"📊 Проанализировано {len(test_data)} изображений:")
     print(f"   Дефекты: {np.sum(test_labels == 1)}")
@@ -94,21 +41,14 @@ def find_optimal_balance():
     best_practical = None
     best_practical_score = 0
     
-    for threshold in thresholds:
-        predicted_labels = (test_data > threshold).astype(int)
-        
-        tp = np.sum((predicted_labels == 1) & (test_labels == 1))
-        fp = np.sum((predicted_labels == 1) & (test_labels == 0))
-        fn = np.sum((predicted_labels == 0) & (test_labels == 1))
-        tn = np.sum((predicted_labels == 0) & (test_labels == 0))
-        
-        accuracy = (tp + tn) / len(test_labels)
-        defect_accuracy = tp / (tp + fn) if (tp + fn) > 0 else 0
-        normal_accuracy = tn / (tn + fp) if (tn + fp) > 0 else 0
-        
-        precision = tp / (tp + fp) if (tp + fp) > 0 else 0
-        recall = tp / (tp + fn) if (tp + fn) > 0 else 0
-        f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
+    # Метрики для всех порогов сразу
+    curve = threshold_curve(test_data, test_labels, thresholds)
+    
+    for index, threshold in enumerate(thresholds):
+        accuracy = curve['accuracy'][index]
+        defect_accuracy = curve['recall'][index]
+        normal_accuracy = curve['specificity'][index]
+        f1 = curve['f1'][index]
         
         # Определяем цель
         if defect_accuracy >= 0.8 and normal_accuracy >= 0.7:
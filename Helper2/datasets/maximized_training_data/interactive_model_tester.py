@@ -11,6 +11,8 @@ import os
 import random
 from pathlib import Path
 
+from model_evaluation import load_images, predict_probabilities
+
 def load_best_model():
     """Загружает лучшую модель"""
     models_to_try = [
@@ -51,8 +53,8 @@ def predict_defect(model, image_path, threshold=0.3):
     if img_array is None:
         return None
     
-    prediction = model.predict(img_array, verbose=0)
-    confidence = float(prediction[0][0])
+    # Прямой вызов модели: для одного изображения быстрее, чем model.predict
+    confidence = float(predict_probabilities(model, img_array)[0])
     has_defect = confidence > threshold
     
     return {
@@ -94,26 +96,29 @@ def test_random_images(model, num_tests=10):
     correct_predictions = 0
     total_predictions = 0
     
-    for true_type, image_path in random_images:
-        result = predict_defect(model, image_path, threshold=0.3)
-        if result:
-            filename = Path(image_path).name
-            predicted_type = "ДЕФЕКТ" if result['has_defect'] else "НОРМА"
-            confidence = f"{result['defect_probability']:.1f}%"
-            
-            # Проверяем правильность
-            is_correct = (true_type == "DEFECT" and result['has_defect']) or \
-                        (true_type == "NORMAL" and not result['has_defect'])
-            
-            if is_correct:
-                correct_predictions += 1
-                correct_symbol = "✅"
-            else:
-                correct_symbol = "❌"
-            
-            total_predictions += 1
-            
-            print(f"{true_type:<8} {filename:<40} {predicted_type:<12} {confidence:<12} {correct_symbol:<10}")
+    # Все выбранные изображения - одним батчем
+    images = load_images([image_path for _, image_path in random_images])
+    probabilities = predict_probabilities(model, images)
+    
+    for (true_type, image_path), probability in zip(random_images, probabilities):
+        has_defect = float(probability) > 0.3
+        filename = Path(image_path).name
+        predicted_type = "ДЕФЕКТ" if has_defect else "НОРМА"
+        confidence = f"{probability * 100:.1f}%"
+        
+        # Проверяем правильность
+        is_correct = (true_type == "DEFECT" and has_defect) or \
+                    (true_type == "NORMAL" and not has_defect)
+        
+        if is_correct:
+            correct_predictions += 1
+            correct_symbol = "✅"
+        else:
+            correct_symbol = "❌"
+        
+        total_predictions += 1
+        
+        print(f"{true_type:<8} {filename:<40} {predicted_type:<12} {confidence:<12} {correct_symbol:<10}")
     
     accuracy = (correct_predictions / total_predictions) * 100 if total_predictions > 0 else 0
     print(f"\n📈 Точность на случайных изображениях: {accuracy:.1f}% ({correct_predictions}/{total_predictions})")
@@ -208,11 +213,12 @@ def interactive_test():
                 print(f"{'Порог':<8} {'Результат':<12} {'Уверенность':<12}")
                 print("-" * 35)
                 
-                for threshold in [0.1, 0.3, 0.5, 0.7, 0.9]:
-                    result = predict_defect(model, image_path, threshold)
-                    if result:
-                        predicted = "ДЕФЕКТ" if result['has_defect'] else "НОРМА"
-                        confidence = f"{result['defect_probability']:.1f}%"
+                # Модель вызывается один раз, пороги применяются к одной вероятности
+                result = predict_defect(model, image_path)
+                if result:
+                    confidence = f"{result['defect_probability']:.1f}%"
+                    for threshold in [0.1, 0.3, 0.5, 0.7, 0.9]:
+                        predicted = "ДЕФЕКТ" if result['confidence'] > threshold else "НОРМА"
                         print(f"{threshold:<8.1f} {predicted:<12} {confidence:<12}")
             else:
                 print("❌ Файл не найден")
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Оценка модели дефектов на тестовой выборке
+Тестовая выборка прогоняется через модель один раз батчами, вероятности
+сохраняются (повторный запуск без изменений модели и выборки не вызывает модель),
+затем метрики (precision/recall/F1/матрица ошибок) считаются сразу для тысяч
+порогов векторно в NumPy. Результат - воспроизводимый JSON-отчет.
+
+Использование:
+    python model_evaluation.py improved_model.h5 best_maximized_model.h5 --report evaluation_report.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from tensorflow import keras
+
+from export_inference_model import list_images, load_image_array
+
+LABELS = ('negative', 'positive')
+# Пороги, для которых метрики выводятся отдельно
+REPORT_THRESHOLDS = (0.3, 0.4, 0.5, 0.6, 0.7)
+# Сколько порогов в кривой по умолчанию (шаг 0.0001)
+DEFAULT_THRESHOLD_COUNT = 10001
+PREDICTIONS_DIR = Path(".predictions")
+
+
+def find_model(candidates):
+    """Первая существующая модель из списка"""
+    for model_path in candidates:
+        if os.path.exists(model_path):
+            return model_path
+    return None
+
+
+def list_test_split(data_dir="test"):
+    """
+    Файлы тестовой выборки
+
+    Returns:
+        (пути, метки: 1 - дефект, 0 - норма)
+    """
+    paths, labels = [], []
+    for index, label in enumerate(LABELS):
+        label_dir = Path(data_dir) / label
+        if label_dir.exists():
+            files = list_images(label_dir)
+            paths.extend(str(p) for p in files)
+            labels.extend([index] * len(files))
+    return paths, np.array(labels, dtype=np.int64)
+
+
+def load_images(paths, image_size=(224, 224), workers=8):
+    """Загружает и предобрабатывает изображения параллельно"""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        images = list(executor.map(lambda path: load_image_array(path, image_size), paths))
+    if not images:
+        return np.zeros((0, *image_size, 3), dtype=np.float32)
+    return np.stack(images)
+
+
+def predict_probabilities(model, images, batch_size=64):
+    """Вероятности дефекта для массива изображений (прямой вызов модели батчами)"""
+    if len(images) == 0:
+        return np.zeros((0,), dtype=np.float32)
+    outputs = [np.asarray(model(images[start:start + batch_size], training=False))
+               for start in range(0, len(images), batch_size)]
+    return np.concatenate(outputs, axis=0)[:, 0].astype(np.float32)
+
+
+def _cache_path(model_path, paths):
+    """Файл кэша вероятностей: зависит от файла модели (размер, время изменения) и состава выборки"""
+    stat = os.stat(model_path)
+    digest = hashlib.sha256()
+    digest.update(f"{os.path.abspath(model_path)}:{stat.st_size}:{int(stat.st_mtime)}".encode('utf-8'))
+    for path in paths:
+        path_stat = os.stat(path)
+        digest.update(f"\n{path}:{path_stat.st_size}:{int(path_stat.st_mtime)}".encode('utf-8'))
+    return PREDICTIONS_DIR / f"{Path(model_path).stem}_{digest.hexdigest()[:16]}.npz"
+
+
+def score_model(model_path, data_dir="test", images=None, batch_size=64, use_cache=True):
+    """
+    Вероятности модели на тестовой выборке (с кэшем в .predictions/)
+
+    Args:
+        model_path: Путь к модели Keras (.h5)
+        data_dir: Тестовая выборка (data_dir/positive, data_dir/negative)
+        images: Уже загруженные изображения выборки (при сравнении нескольких моделей)
+
+    Returns:
+        {'paths', 'labels', 'probabilities'}
+    """
+    paths, labels = list_test_split(data_dir)
+    cache_path = _cache_path(model_path, paths)
+
+    if use_cache and cache_path.exists():
+        cached = np.load(cache_path)
+        return {'paths': paths, 'labels': labels, 'probabilities': cached['probabilities']}
+
+    model = keras.models.load_model(model_path)
+    if images is None:
+        images = load_images(paths, tuple(model.input_shape[1:3]))
+    probabilities = predict_probabilities(model, images, batch_size)
+
+    if use_cache:
+        PREDICTIONS_DIR.mkdir(exist_ok=True)
+        np.savez(cache_path, probabilities=probabilities, labels=labels)
+    return {'paths': paths, 'labels': labels, 'probabilities': probabilities}
+
+
+def _safe_divide(numerator, denominator):
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+
+def threshold_curve(probabilities, labels, thresholds=None):
+    """
+    Метрики для всех порогов сразу (дефект, если вероятность > порога)
+
+    Для каждого порога число вероятностей выше него находится бинарным поиском
+    по отсортированным вероятностям каждого класса - без цикла по порогам.
+
+    Returns:
+        Словарь массивов: threshold, tp, fp, fn, tn, accuracy, precision, recall
+        (точность на дефектах), specificity (точность на норме), f1, balanced_accuracy
+    """
+    if thresholds is None:
+        thresholds = np.linspace(0.0, 1.0, DEFAULT_THRESHOLD_COUNT)
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    labels = np.asarray(labels)
+
+    positive = np.sort(probabilities[labels == 1])
+    negative = np.sort(probabilities[labels == 0])
+
+    tp = len(positive) - np.searchsorted(positive, thresholds, side='right')
+    fp = len(negative) - np.searchsorted(negative, thresholds, side='right')
+    fn = len(positive) - tp
+    tn = len(negative) - fp
+
+    precision = _safe_divide(tp, tp + fp)
+    recall = _safe_divide(tp, tp + fn)
+    specificity = _safe_divide(tn, tn + fp)
+
+    return {
+        'threshold': thresholds,
+        'tp': tp,
+        'fp': fp,
+        'fn': fn,
+        'tn': tn,
+        'accuracy': _safe_divide(tp + tn, len(labels)),
+        'precision': precision,
+        'recall': recall,
+        'specificity': specificity,
+        'f1': _safe_divide(2 * precision * recall, precision + recall),
+        'balanced_accuracy': (recall + specificity) / 2
+    }
+
+
+def metrics_at(curve, index):
+    """Метрики одной точки кривой"""
+    return {
+        key: (int(values[index]) if key in ('tp', 'fp', 'fn', 'tn') else round(float(values[index]), 6))
+        for key, values in curve.items()
+    }
+
+
+def metrics_for_threshold(probabilities, labels, threshold):
+    """Метрики для одного порога"""
+    return metrics_at(threshold_curve(probabilities, labels, [threshold]), 0)
+
+
+def roc_auc(probabilities, labels):
+    """Площадь под ROC-кривой (через ранги, с учетом одинаковых вероятностей)"""
+    labels = np.asarray(labels)
+    n_positive = int(np.sum(labels == 1))
+    n_negative = len(labels) - n_positive
+    if n_positive == 0 or n_negative == 0:
+        return None
+    order = np.argsort(probabilities, kind='mergesort')
+    sorted_probabilities = np.asarray(probabilities)[order]
+    ranks = np.empty(len(labels), dtype=np.float64)
+    # Средний ранг для одинаковых значений
+    _, first, counts = np.unique(sorted_probabilities, return_index=True, return_counts=True)
+    average_ranks = first + (counts + 1) / 2.0
+    ranks[order] = np.repeat(average_ranks, counts)
+    return float((ranks[labels == 1].sum() - n_positive * (n_positive + 1) / 2) / (n_positive * n_negative))
+
+
+def best_thresholds(curve):
+    """
+    Рекомендуемые пороги (правила как в find_optimal_balance.py)
+
+    Returns:
+        {'best_f1', 'best_balanced_accuracy', 'balanced', 'defect_focused', 'practical'} -
+        метрики выбранной точки или None
+    """
+    recall, specificity, f1 = curve['recall'], curve['specificity'], curve['f1']
+    balanced = (recall >= 0.8) & (specificity >= 0.7)
+    defect_focused = ~balanced & (recall >= 0.9)
+    practical = ~balanced & ~defect_focused & (specificity >= 0.8) & (recall >= 0.5)
+
+    def pick(mask, score):
+        if not mask.any():
+            return None
+        return metrics_at(curve, int(np.argmax(np.where(mask, score, -np.inf))))
+
+    everything = np.ones_like(balanced)
+    return {
+        'best_f1': pick(everything, f1),
+        'best_balanced_accuracy': pick(everything, curve['balanced_accuracy']),
+        'balanced': pick(balanced, f1),
+        'defect_focused': pick(defect_focused, recall),
+        'practical': pick(practical, curve['balanced_accuracy'])
+    }
+
+
+def evaluation_report(model_path, scores, thresholds=None):
+    """Отчет по модели (без времени запуска - одинаковые входы дают одинаковый отчет)"""
+    probabilities, labels = scores['probabilities'], scores['labels']
+    curve = threshold_curve(probabilities, labels, thresholds)
+    auc = roc_auc(probabilities, labels)
+
+    return {
+        'model': Path(model_path).name,
+        'samples': int(len(labels)),
+        'positive': int(np.sum(labels == 1)),
+        'negative': int(np.sum(labels == 0)),
+        'roc_auc': round(auc, 6) if auc is not None else None,
+        'threshold_count': int(len(curve['threshold'])),
+        'at_thresholds': {
+            f"{threshold:.2f}": metrics_for_threshold(probabilities, labels, threshold)
+            for threshold in REPORT_THRESHOLDS
+        },
+        'recommended': best_thresholds(curve)
+    }
+
+
+def evaluate_models(model_paths, data_dir="test", threshold_count=DEFAULT_THRESHOLD_COUNT, use_cache=True):
+    """
+    Оценивает и сравнивает модели (изображения загружаются один раз на все модели)
+
+    Returns:
+        Отчет {'data_dir', 'models': [...]}
+    """
+    paths, _ = list_test_split(data_dir)
+    images = None
+    thresholds = np.linspace(0.0, 1.0, threshold_count)
+
+    reports = []
+    for model_path in model_paths:
+        if not Path(model_path).exists():
+            print(f"⚠️ Модель не найдена: {model_path}")
+            continue
+        if images is None and not (use_cache and _cache_path(model_path, paths).exists()):
+            images = load_images(paths)
+        scores = score_model(model_path, data_dir, images, use_cache=use_cache)
+        reports.append(evaluation_report(model_path, scores, thresholds))
+
+    return {'data_dir': str(data_dir), 'models': reports}
+
+
+def print_report(report):
+    for model in report['models']:
+        print(f"\n📊 {model['model']}: {model['samples']} изображений "
+              f"({model['positive']} дефектов, {model['negative']} норма), ROC AUC: {model['roc_auc']}")
+        print(f"{'Порог':<6} {'Общая':<8} {'Дефекты':<10} {'Норма':<8} {'F1':<6}")
+        for threshold, metrics in model['at_thresholds'].items():
+            print(f"{threshold:<6} {metrics['accuracy']:<8.1%} {metrics['recall']:<10.1%} "
+                  f"{metrics['specificity']:<8.1%} {metrics['f1']:<6.3f}")
+        for name, metrics in model['recommended'].items():
+            if metrics:
+                print(f"   {name}: порог {metrics['threshold']:.4f} (F1 {metrics['f1']:.3f}, "
+                      f"дефекты {metrics['recall']:.1%}, норма {metrics['specificity']:.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Оценка моделей дефектов на тестовой выборке")
+    parser.add_argument('models', nargs='+', help="Пути к моделям Keras (.h5)")
+    parser.add_argument('--data-dir', default='test')
+    parser.add_argument('--thresholds', type=int, default=DEFAULT_THRESHOLD_COUNT, help="Число порогов в кривой")
+    parser.add_argument('--report', default='evaluation_report.json')
+    parser.add_argument('--no-cache', action='store_true', help="Не использовать сохраненные вероятности")
+    args = parser.parse_args()
+
+    report = evaluate_models(args.models, args.data_dir, args.thresholds, not args.no_cache)
+    print_report(report)
+
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+    print(f"\n✅ Отчет сохранен: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,160 +3,66 @@
 Скрипт для тестирования улучшенной модели
 """
 
-import tensorflow as tf
-from tensorflow import keras
-import numpy as np
-from PIL import Image
 import os
 
-def load_improved_model():
-    """Загружает улучшенную модель"""
-    try:
-        model = keras.models.load_model("improved_model.h5")
-        print("✅ Улучшенная модель загружена успешно")
-        return model
-    except Exception as e:
-        print(f"❌ Ошибка загрузки улучшенной модели: {e}")
-        try:
-            model = keras.models.load_model("final_improved_model.h5")
-            print("✅ Финальная улучшенная модель загружена успешно")
-            return model
-        except Exception as e2:
-            print(f"❌ Ошибка загрузки финальной модели: {e2}")
-            return None
+import numpy as np
 
-def preprocess_image(image_path, target_size=(224, 224)):
-    """Предобрабатывает изображение для модели"""
-    try:
-        img = Image.open(image_path)
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
-        img = img.resize(target_size)
-        img_array = np.array(img) / 255.0
-        img_array = np.expand_dims(img_array, axis=0)
-        return img_array
-    except Exception as e:
-        print(f"❌ Ошибка обработки изображения {image_path}: {e}")
-        return None
-
-def predict_defect(model, image_path, threshold=0.5):
-    """Предсказывает наличие дефекта на изображении"""
-    img_array = preprocess_image(image_path)
-    if img_array is None:
-        return None
-    
-    prediction = model.predict(img_array, verbose=0)
-    confidence = float(prediction[0][0])
-    has_defect = confidence > threshold
-    
-    return {
-        'has_defect': has_defect,
-        'confidence': confidence,
-        'defect_probability': confidence * 100,
-        'normal_probability': (1 - confidence) * 100
-    }
+from model_evaluation import find_model, metrics_for_threshold, score_model
 
 def test_improved_model():
-    """Тестирует улучшенную модель"""
+    """
+    Тестирует улучшенную модель
+
+    Returns:
+        Вероятности модели на тестовой выборке (см. score_model) или None
+    """
     print("🧪 Тестируем улучшенную модель...")
     
-    model = load_improved_model()
-    if model is None:
-        return
+    model_path = find_model(("improved_model.h5", "final_improved_model.h5"))
+    if model_path is None:
+        print("❌ Улучшенная модель не найдена")
+        return None
+    
+    # Вероятности для всей тестовой выборки - один проход модели батчами
+    scores = score_model(model_path, "test")
     
-    # Тестируем с разными порогами
+    # Тестируем с разными порогами (без повторного прогона модели)
     thresholds = [0.3, 0.4, 0.5, 0.6, 0.7]
     
     for threshold in thresholds:
         print(f"\n📊 Тестирование с порогом {threshold}:")
         
-        # Собираем данные
-        test_data = []
-        test_labels = []
-        
-        # Дефекты
-        test_positive_dir = "test/positive"
-        if os.path.exists(test_positive_dir):
-            for img_file in os.listdir(test_positive_dir):
-                if img_file.lower().endswith(('.jpg', '.jpeg', '.png')):
-                    img_path = os.path.join(test_positive_dir, img_file)
-                    img_array = preprocess_image(img_path)
-                    if img_array is not None:
-                        pred = model.predict(img_array, verbose=0)[0][0]
-                        test_data.append(pred)
-                        test_labels.append(1)
-        
-        # Норма
-        test_negative_dir = "test/negative"
-        if os.path.exists(test_negative_dir):
-            for img_file in os.listdir(test_negative_dir):
-                if img_file.lower().endswith(('.jpg', '.jpeg', '.png')):
-                    img_path = os.path.join(test_negative_dir, img_file)
-                    img_array = preprocess_image(img_path)
-                    if img_array is not None:
-                        pred = model.predict(img_array, verbose=0)[0][0]
-                        test_data.append(pred)
-                        test_labels.append(0)
-        
-        test_data = np.array(test_data)
-        test_labels = np.array(test_labels)
-        
         # Вычисляем метрики
-        predicted_labels = (test_data > threshold).astype(int)
-        
-        tp = np.sum((predicted_labels == 1) & (test_labels == 1))
-        fp = np.sum((predicted_labels == 1) & (test_labels == 0))
-        fn = np.sum((predicted_labels == 0) & (test_labels == 1))
-        tn = np.sum((predicted_labels == 0) & (test_labels == 0))
-        
-        accuracy = (tp + tn) / len(test_labels)
-        defect_accuracy = tp / (tp + fn) if (tp + fn) > 0 else 0
-        normal_accuracy = tn / (tn + fp) if (tn + fp) > 0 else 0
-        
-        precision = tp / (tp + fp) if (tp + fp) > 0 else 0
-        recall = tp / (tp + fn) if (tp + fn) > 0 else 0
-        f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
+        metrics = metrics_for_threshold(scores['probabilities'], scores['labels'], threshold)
+        tp, fp, fn, tn = metrics['tp'], metrics['fp'], metrics['fn'], metrics['tn']
+        accuracy = metrics['accuracy']
+        defect_accuracy = metrics['recall']
+        normal_accuracy = metrics['specificity']
+        f1 = metrics['f1']
         
         print(f"   Точность: {accuracy:.1%}")
         print(f"   Дефекты: {defect_accuracy:.1%} ({tp}/{tp + fn})")
         print(f"   Норма: {normal_accuracy:.1%} ({tn}/{tn + fp})")
         print(f"   F1 Score: {f1:.3f}")
+    
+    return scores
 
-def test_individual_predictions():
-    """Тестирует индивидуальные предсказания"""
+def test_individual_predictions(scores):
+    """Тестирует индивидуальные предсказания (по уже полученным вероятностям)"""
     print("\n🔍 Тестируем индивидуальные предсказания...")
     
-    model = load_improved_model()
-    if model is None:
+    if scores is None:
         return
     
     # Тестируем несколько примеров
-    test_positive_dir = "test/positive"
-    test_negative_dir = "test/negative"
-    
-    print("\n📊 Примеры дефектов:")
-    if os.path.exists(test_positive_dir):
-        count = 0
-        for img_file in os.listdir(test_positive_dir):
-            if img_file.lower().endswith(('.jpg', '.jpeg', '.png')) and count < 5:
-                img_path = os.path.join(test_positive_dir, img_file)
-                result = predict_defect(model, img_path, threshold=0.5)
-                if result:
-                    status = "✅ ДЕФЕКТ" if result['has_defect'] else "❌ НОРМА"
-                    print(f"  {status} {img_file}: {result['defect_probability']:.1f}%")
-                    count += 1
-    
-    print("\n📊 Примеры нормальных изображений:")
-    if os.path.exists(test_negative_dir):
-        count = 0
-        for img_file in os.listdir(test_negative_dir):
-            if img_file.lower().endswith(('.jpg', '.jpeg', '.png')) and count < 5:
-                img_path = os.path.join(test_negative_dir, img_file)
-                result = predict_defect(model, img_path, threshold=0.5)
-                if result:
-                    status = "✅ НОРМА" if not result['has_defect'] else "❌ ДЕФЕКТ"
-                    print(f"  {status} {img_file}: {result['defect_probability']:.1f}%")
-                    count += 1
+    for label, title, expected in ((1, "\n📊 Примеры дефектов:", "ДЕФЕКТ"),
+                                   (0, "\n📊 Примеры нормальных изображений:", "НОРМА")):
+        print(title)
+        for index in np.flatnonzero(scores['labels'] == label)[:5]:
+            confidence = float(scores['probabilities'][index])
+            predicted = "ДЕФЕКТ" if confidence > 0.5 else "НОРМА"
+            status = f"✅ {predicted}" if predicted == expected else f"❌ {predicted}"
+            print(f"  {status} {os.path.basename(scores['paths'][index])}: {confidence * 100:.1f}%")
 
 def compare_models():
     """Сравнивает разные модели"""
@@ -171,8 +77,8 @@ def main():
     print("🚀 Тестирование улучшенной модели")
     print("=" * 70)
     
-    test_improved_model()
-    test_individual_predictions()
+    scores = test_improved_model()
+    test_individual_predictions(scores)
     compare_models()
     
     print("\n✅ Тестирование завершено!")
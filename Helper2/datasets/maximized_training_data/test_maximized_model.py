@@ -3,66 +3,23 @@
 Скрипт для тестирования максимально улучшенной модели
 """
 
-import tensorflow as tf
-from tensorflow import keras
 import numpy as np
-from PIL import Image
 import os
-import json
 
-def load_maximized_model():
-    """Загружает максимально улучшенную модель"""
-    try:
-        model = keras.models.load_model("best_maximized_model.h5")
-        print("✅ Максимально улучшенная модель загружена успешно")
-        return model
-    except Exception as e:
-        print(f"❌ Ошибка загрузки модели: {e}")
-        return None
-
-def preprocess_image(image_path, target_size=(224, 224)):
-    """Предобрабатывает изображение для модели"""
-    try:
-        img = Image.open(image_path)
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
-        img = img.resize(target_size)
-        img_array = np.array(img) / 255.0
-        img_array = np.expand_dims(img_array, axis=0)
-        return img_array
-    except Exception as e:
-        print(f"❌ Ошибка обработки изображения {image_path}: {e}")
-        return None
-
-def predict_defect(model, image_path):
-    """Предсказывает наличие дефекта на изображении"""
-    img_array = preprocess_image(image_path)
-    if img_array is None:
-        return None
-    
-    prediction = model.predict(img_array, verbose=0)
-    confidence = float(prediction[0][0])
-    has_defect = confidence > 0.5
-    
-    return {
-        'has_defect': has_defect,
-        'confidence': confidence,
-        'defect_probability': confidence * 100,
-        'normal_probability': (1 - confidence) * 100
-    }
+from model_evaluation import score_model
 
 def test_maximized_model():
     """Тестирует максимально улучшенную модель"""
     print("🧪 Тестируем максимально улучшенную модель...")
     
-    model = load_maximized_model()
-    if model is None:
+    model_path = "best_maximized_model.h5"
+    if not os.path.exists(model_path):
+        print(f"❌ Модель не найдена: {model_path}")
         return
     
-    # Тестируем на test данных
+    # Тестируем на test данных: вероятности для всей выборки одним проходом модели батчами
     print("\n📊 Результаты на тестовых данных:")
-    test_positive_dir = "test/positive"
-    test_negative_dir = "test/negative"
+    scores = score_model(model_path, "test")
     
     correct_predictions = 0
     total_predictions = 0
@@ -71,37 +28,26 @@ def test_maximized_model():
     negative_correct = 0
     negative_total = 0
     
-    if os.path.exists(test_positive_dir):
-        print("🔍 Тестируем дефекты:")
-        for img_file in os.listdir(test_positive_dir):
-            if img_file.lower().endswith(('.jpg', '.jpeg', '.png')):
-                img_path = os.path.join(test_positive_dir, img_file)
-                result = predict_defect(model, img_path)
-                if result:
-                    is_correct = result['has_defect']  # Должно быть True
-                    correct_predictions += is_correct
-                    positive_correct += is_correct
-                    total_predictions += 1
-                    positive_total += 1
-                    status = "✅" if is_correct else "❌"
-                    print(f"  {status} {img_file}: {'ДЕФЕКТ' if result['has_defect'] else 'НОРМА'} "
-                          f"(уверенность: {result['defect_probability']:.1f}%)")
-    
-    if os.path.exists(test_negative_dir):
-        print("\n🔍 Тестируем нормальные изображения:")
-        for img_file in os.listdir(test_negative_dir):
-            if img_file.lower().endswith(('.jpg', '.jpeg', '.png')):
-                img_path = os.path.join(test_negative_dir, img_file)
-                result = predict_defect(model, img_path)
-                if result:
-                    is_correct = not result['has_defect']  # Должно быть False
-                    correct_predictions += is_correct
-                    negative_correct += is_correct
-                    total_predictions += 1
-                    negative_total += 1
-                    status = "✅" if is_correct else "❌"
-                    print(f"  {status} {img_file}: {'ДЕФЕКТ' if result['has_defect'] else 'НОРМА'} "
-                          f"(уверенность: {result['defect_probability']:.1f}%)")
+    for label, title in ((1, "🔍 Тестируем дефекты:"), (0, "\n🔍 Тестируем нормальные изображения:")):
+        indices = np.flatnonzero(scores['labels'] == label)
+        if len(indices) == 0:
+            continue
+        print(title)
+        for index in indices:
+            confidence = float(scores['probabilities'][index])
+            has_defect = confidence > 0.5
+            is_correct = has_defect == bool(label)
+            correct_predictions += is_correct
+            total_predictions += 1
+            if label:
+                positive_correct += is_correct
+                positive_total += 1
+            else:
+                negative_correct += is_correct
+                negative_total += 1
+            status = "✅" if is_correct else "❌"
+            print(f"  {status} {os.path.basename(scores['paths'][index])}: {'ДЕФЕКТ' if has_defect else 'НОРМА'} "
+                  f"(уверенность: {confidence * 100:.1f}%)")
     
     # Выводим детальную статистику
     if total_predictions > 0:
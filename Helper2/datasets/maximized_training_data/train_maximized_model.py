@@ -7,49 +7,42 @@ import tensorflow as tf
 from tensorflow import keras
 from tensorflow.keras import layers
 import json
+import sys
 from pathlib import Path
 import numpy as np
 import matplotlib.pyplot as plt
 
+from export_inference_model import export_inference_model
+
+# Общий конвейер данных лежит в datasets/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from image_pipeline import split_or_directory_dataset
+
 def load_dataset_config():
     """Загружает конфигурацию датасета"""
     with open("maximized_dataset_config.json", "r", encoding="utf-8") as f:
         return json.load(f)
 
-def create_advanced_data_generators(config):
-    """Создает продвинутые генераторы данных"""
-    train_datagen = keras.preprocessing.image.ImageDataGenerator(
-        rescale=1./255,
-        rotation_range=config["augmentation"]["rotation"],
-        brightness_range=[1-config["augmentation"]["brightness"], 
-                         1+config["augmentation"]["brightness"]],
-        horizontal_flip=config["augmentation"]["horizontal_flip"],
-        vertical_flip=config["augmentation"]["vertical_flip"],
-        zoom_range=config["augmentation"]["zoom_range"],
-        shear_range=config["augmentation"]["shear_range"],
-        width_shift_range=config["augmentation"]["width_shift_range"],
-        height_shift_range=config["augmentation"]["height_shift_range"],
-        fill_mode='nearest'
-    )
-    
-    train_generator = train_datagen.flow_from_directory(
-        "train/",
-        target_size=tuple(config["image_size"]),
-        batch_size=config["training"]["batch_size"],
-        class_mode="binary",
-        shuffle=True
+def create_advanced_datasets(config):
+    """
+    Создает конвейеры данных tf.data (JPEG декодируются один раз, аугментация слоями Keras)
+    
+    Выборки берутся из разбиения манифеста (dataset_manifest.py), если оно создано, иначе из папок train/ и val/.
+    """
+    image_size = tuple(config["image_size"])
+    batch_size = config["training"]["batch_size"]
+    
+    train_ds, class_indices = split_or_directory_dataset(
+        "maximized",
+        "train",
+        image_size,
+        batch_size,
+        training=True,
+        augmentation=config["augmentation"]
     )
+    val_ds, _ = split_or_directory_dataset("maximized", "val", image_size, batch_size)
     
-    val_datagen = keras.preprocessing.image.ImageDataGenerator(rescale=1./255)
-    val_generator = val_datagen.flow_from_directory(
-        "val/",
-        target_size=tuple(config["image_size"]),
-        batch_size=config["training"]["batch_size"],
-        class_mode="binary",
-        shuffle=False
-    )
-    
-    return train_generator, val_generator
+    return train_ds, val_ds, class_indices
 
 def create_maximized_model(config):
     """Создает максимально точную модель"""
@@ -118,8 +111,8 @@ def train_maximized_model():
     # Загружаем конфигурацию
     config = load_dataset_config()
     
-    # Создаем генераторы данных
-    train_gen, val_gen = create_advanced_data_generators(config)
+    # Создаем конвейеры данных
+    train_ds, val_ds, class_indices = create_advanced_datasets(config)
     
     # Создаем модель
     model = create_maximized_model(config)
@@ -153,18 +146,28 @@ def train_maximized_model():
     
     # Обучаем модель
     history = model.fit(
-        train_gen,
+        train_ds,
         epochs=config["training"]["epochs"],
-        validation_data=val_gen,
+        validation_data=val_ds,
         callbacks=callbacks,
         verbose=1,
-        class_weight=config["training"]["class_weight"]
+        class_weight={int(k): v for k, v in config["training"]["class_weight"].items()}
     )
     
     # Сохраняем финальную модель
     model.save("maximized_concrete_defect_model.h5")
     print("✅ Максимально точная модель сохранена: maximized_concrete_defect_model.h5")
     
+    # Экспортируем квантованную модель для API и проверяем ее точность на тестовой выборке
+    export_inference_model(
+        model,
+        "maximized_concrete_defect_model.tflite",
+        eval_dir="test/",
+        class_indices=class_indices,
+        calibration_dir="train/",
+        image_size=tuple(config["image_size"])
+    )
+    
     # Сохраняем историю обучения
     with open("maximized_training_history.json", "w") as f:
         json.dump({
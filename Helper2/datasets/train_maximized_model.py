@@ -4,66 +4,24 @@
 """
 
 import os
-import shutil
 from pathlib import Path
 import json
 
+from dataset_manifest import build_manifest, make_split, materialize_split
+
 def prepare_maximized_dataset():
     """Подготавливает максимально улучшенный датасет для обучения"""
     print("🔄 Подготавливаем максимально улучшенный датасет...")
     
-    # Создаем структуру для обучения
-    train_dir = Path("maximized_training_data")
-    train_dir.mkdir(exist_ok=True)
-    
-    # Создаем поддиректории
-    (train_dir / "train" / "positive").mkdir(parents=True, exist_ok=True)
-    (train_dir / "train" / "negative").mkdir(parents=True, exist_ok=True)
-    (train_dir / "val" / "positive").mkdir(parents=True, exist_ok=True)
-    (train_dir / "val" / "negative").mkdir(parents=True, exist_ok=True)
-    (train_dir / "test" / "positive").mkdir(parents=True, exist_ok=True)
-    (train_dir / "test" / "negative").mkdir(parents=True, exist_ok=True)
+    # Индексируем изображения (хеш считается только для новых и измененных файлов)
+    build_manifest()
     
-    # Копируем изображения из maximized_dataset
-    source_positive = Path("maximized_dataset/positive")
-    source_negative = Path("maximized_dataset/negative")
+    # Разделяем на train/val/test (70%/15%/15%) - индекс manifest/splits/maximized.csv
+    make_split("maximized", sources=("maximized_dataset",), ratios=(0.7, 0.15, 0.15))
     
-    if source_positive.exists():
-        positive_images = list(source_positive.glob("*.jpg"))
-        negative_images = list(source_negative.glob("*.jpg"))
-        
-        print(f"📊 Найдено изображений:")
-        print(f"   Дефекты: {len(positive_images)}")
-        print(f"   Норма: {len(negative_images)}")
-        
-        # Разделяем на train/val/test (70%/15%/15%)
-        train_pos = positive_images[:int(len(positive_images) * 0.7)]
-        val_pos = positive_images[int(len(positive_images) * 0.7):int(len(positive_images) * 0.85)]
-        test_pos = positive_images[int(len(positive_images) * 0.85):]
-        
-        train_neg = negative_images[:int(len(negative_images) * 0.7)]
-        val_neg = negative_images[int(len(negative_images) * 0.7):int(len(negative_images) * 0.85)]
-        test_neg = negative_images[int(len(negative_images) * 0.85):]
-        
-        # Копируем файлы
-        for img in train_pos:
-            shutil.copy2(img, train_dir / "train" / "positive" / img.name)
-        for img in val_pos:
-            shutil.copy2(img, train_dir / "val" / "positive" / img.name)
-        for img in test_pos:
-            shutil.copy2(img, train_dir / "test" / "positive" / img.name)
-            
-        for img in train_neg:
-            shutil.copy2(img, train_dir / "train" / "negative" / img.name)
-        for img in val_neg:
-            shutil.copy2(img, train_dir / "val" / "negative" / img.name)
-        for img in test_neg:
-            shutil.copy2(img, train_dir / "test" / "negative" / img.name)
-        
-        print(f"✅ Разделение завершено:")
-        print(f"   Train: {len(train_pos)} дефектов, {len(train_neg)} норма")
-        print(f"   Val: {len(val_pos)} дефектов, {len(val_neg)} норма")
-        print(f"   Test: {len(test_pos)} дефектов, {len(test_neg)} норма")
+    # Папки train/val/test - жесткие ссылки на исходные изображения, без копирования
+    train_dir = Path("maximized_training_data")
+    materialize_split("maximized", train_dir)
     
     return train_dir
 
@@ -118,51 +76,42 @@ import tensorflow as tf
 from tensorflow import keras
 from tensorflow.keras import layers
 import json
+import sys
 from pathlib import Path
 import numpy as np
 import matplotlib.pyplot as plt
 
+from export_inference_model import export_inference_model
+
+# Общий конвейер данных лежит в datasets/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from image_pipeline import split_or_directory_dataset
+
 def load_dataset_config():
     """Загружает конфигурацию датасета"""
     with open("maximized_dataset_config.json", "r", encoding="utf-8") as f:
         return json.load(f)
 
-def create_advanced_data_generators(config):
-    """Создает продвинутые генераторы данных"""
-    train_datagen = keras.preprocessing.image.ImageDataGenerator(
-        rescale=1./255,
-        rotation_range=config["augmentation"]["rotation"],
-        brightness_range=[1-config["augmentation"]["brightness"], 
-                         1+config["augmentation"]["brightness"]],
-        contrast_range=[1-config["augmentation"]["contrast"], 
-                       1+config["augmentation"]["contrast"]],
-        horizontal_flip=config["augmentation"]["horizontal_flip"],
-        vertical_flip=config["augmentation"]["vertical_flip"],
-        zoom_range=config["augmentation"]["zoom_range"],
-        shear_range=config["augmentation"]["shear_range"],
-        width_shift_range=config["augmentation"]["width_shift_range"],
-        height_shift_range=config["augmentation"]["height_shift_range"],
-        fill_mode='nearest'
-    )
+def create_advanced_datasets(config):
+    """
+    Создает конвейеры данных tf.data (JPEG декодируются один раз, аугментация слоями Keras)
     
-    train_generator = train_datagen.flow_from_directory(
-        "train/",
-        target_size=tuple(config["image_size"]),
-        batch_size=config["training"]["batch_size"],
-        class_mode="binary",
-        shuffle=True
-    )
+    Выборки берутся из разбиения манифеста (dataset_manifest.py), если оно создано, иначе из папок train/ и val/.
+    """
+    image_size = tuple(config["image_size"])
+    batch_size = config["training"]["batch_size"]
     
-    val_datagen = keras.preprocessing.image.ImageDataGenerator(rescale=1./255)
-    val_generator = val_datagen.flow_from_directory(
-        "val/",
-        target_size=tuple(config["image_size"]),
-        batch_size=config["training"]["batch_size"],
-        class_mode="binary",
-        shuffle=False
+    train_ds, class_indices = split_or_directory_dataset(
+        "maximized",
+        "train",
+        image_size,
+        batch_size,
+        training=True,
+        augmentation=config["augmentation"]
     )
+    val_ds, _ = split_or_directory_dataset("maximized", "val", image_size, batch_size)
     
-    return train_generator, val_generator
+    return train_ds, val_ds, class_indices
 
 def create_maximized_model(config):
     """Создает максимально точную модель"""
@@ -231,8 +180,8 @@ def train_maximized_model():
     # Загружаем конфигурацию
     config = load_dataset_config()
     
-    # Создаем генераторы данных
-    train_gen, val_gen = create_advanced_data_generators(config)
+    # Создаем конвейеры данных
+    train_ds, val_ds, class_indices = create_advanced_datasets(config)
     
     # Создаем модель
     model = create_maximized_model(config)
@@ -266,18 +215,28 @@ def train_maximized_model():
     
     # Обучаем модель
     history = model.fit(
-        train_gen,
+        train_ds,
         epochs=config["training"]["epochs"],
-        validation_data=val_gen,
+        validation_data=val_ds,
         callbacks=callbacks,
         verbose=1,
-        class_weight=config["training"]["class_weight"]
+        class_weight={int(k): v for k, v in config["training"]["class_weight"].items()}
     )
     
     # Сохраняем финальную модель
     model.save("maximized_concrete_defect_model.h5")
     print("✅ Максимально точная модель сохранена: maximized_concrete_defect_model.h5")
     
+    # Экспортируем квантованную модель для API и проверяем ее точность на тестовой выборке
+    export_inference_model(
+        model,
+        "maximized_concrete_defect_model.tflite",
+        eval_dir="test/",
+        class_indices=class_indices,
+        calibration_dir="train/",
+        image_size=tuple(config["image_size"])
+    )
+    
     # Сохраняем историю обучения
     with open("maximized_training_history.json", "w") as f:
         json.dump({
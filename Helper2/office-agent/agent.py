@@ -9,7 +9,9 @@ import time
 import json
 import logging
 import asyncio
-from datetime import datetime, timezone
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timezone, timedelta
 from typing import Dict, Any, Optional, List
 import traceback
 
@@ -40,6 +42,9 @@ except ImportError:
 import subprocess
 import platform
 
+from command_listener import CommandListener
+from write_buffer import WriteBehindBuffer
+
 # Настройка логирования
 logging.basicConfig(
     level=logging.INFO,
@@ -51,15 +56,42 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Параллельная обработка команд (можно переопределить в .env)
+AGENT_WORKERS = max(1, int(os.getenv("AGENT_WORKERS", "4")))
+# Ограничения по этапам: генерация docx нагружает CPU, загрузка - сеть
+AGENT_GENERATE_WORKERS = max(1, int(os.getenv("AGENT_GENERATE_WORKERS", str(min(AGENT_WORKERS, os.cpu_count() or 1)))))
+AGENT_UPLOAD_WORKERS = max(1, int(os.getenv("AGENT_UPLOAD_WORKERS", str(AGENT_WORKERS))))
+# Через сколько секунд без продления захваченная команда возвращается в очередь
+AGENT_LEASE_TIMEOUT = int(os.getenv("AGENT_LEASE_TIMEOUT", "600"))
+# Сколько раз повторять запись итогового статуса команды при ошибке сети/базы
+AGENT_STATUS_WRITE_RETRIES = max(1, int(os.getenv("AGENT_STATUS_WRITE_RETRIES", "3")))
+
 class OfficeAgent:
     """Офисный агент для обработки команд"""
     
     def __init__(self):
         self.supabase: Optional[Client] = None
         self.running = False
-        self.poll_interval = 5  # секунд
+        self.poll_interval = 5  # секунд (если уведомления backend недоступны)
+        self.batch_size = 10
         self.max_retries = 3
         self.printer_name = os.getenv("PRINTER_NAME", "")
+        # Адрес backend для подписки на уведомления о новых командах
+        self.notify_url = os.getenv("AGENT_NOTIFY_URL", "")
+        self.agent_id = os.getenv("AGENT_ID") or f"{platform.node()}-{os.getpid()}"
+        
+        # Пул обработки команд и ограничения по этапам
+        self.lease_timeout = AGENT_LEASE_TIMEOUT
+        self._executor = ThreadPoolExecutor(max_workers=AGENT_WORKERS, thread_name_prefix="agent")
+        self._generate_slots = threading.BoundedSemaphore(AGENT_GENERATE_WORKERS)
+        self._upload_slots = threading.BoundedSemaphore(AGENT_UPLOAD_WORKERS)
+        self._printer_locks: Dict[str, threading.Lock] = {}
+        self._printer_locks_guard = threading.Lock()
+        self._last_requeue = 0.0
+        
+        # Отложенная пакетная запись логов и записей о документах (итоговые статусы пишутся сразу)
+        self._log_buffer = WriteBehindBuffer("agent_logs", self._flush_agent_logs)
+        self._documents_buffer = WriteBehindBuffer("documents", self._flush_documents)
         
         # Инициализация Supabase
         self._init_supabase()
@@ -109,20 +141,56 @@ class OfficeAgent:
             logger.error(f"Error checking printer: {e}")
     
     def _log_agent_action(self, command_id: str, level: str, message: str, details: Dict = None):
-        """Логирование действий агента"""
-        try:
-            log_data = {
-                "command_id": command_id,
-                "level": level,
-                "message": message,
-                "details": details or {}
-            }
-            
-            result = self.supabase.table("agent_logs").insert(log_data).execute()
-            logger.info(f"Logged action: {level} - {message}")
-            
-        except Exception as e:
-            logger.error(f"Failed to log agent action: {e}")
+        """Логирование действий агента (запись в agent_logs пакетами)"""
+        log_data = {
+            "command_id": command_id,
+            "level": level,
+            "message": message,
+            "details": details or {}
+        }
+        
+        self._log_buffer.add(log_data)
+        logger.info(f"Logged action: {level} - {message}")
+    
+    def _flush_agent_logs(self, rows: List[Dict]):
+        """Пакетная вставка логов агента"""
+        self.supabase.table("agent_logs").insert(rows).execute()
+    
+    def _flush_documents(self, rows: List[Dict]):
+        """Пакетная вставка записей о загруженных документах"""
+        self.supabase.table("documents").insert(rows).execute()
+    
+    def _finish_command(self, command_id: str, status: str, result_url: str = None, error_message: str = None) -> bool:
+        """
+        Запись итогового статуса (done/failed) захваченной команды
+        
+        Пишется сразу, а не через буфер: иначе при сбое записи команда осталась бы
+        в processing и после истечения аренды была бы выполнена повторно.
+        Условие status = processing не дает перезаписать команду, которую
+        после истечения аренды захватил другой агент, и не создает удаленную.
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        update_data = {
+            "status": status,
+            "updated_at": now,
+            "processed_at": now,
+            "result_url": result_url,
+            "error_message": error_message
+        }
+        
+        for attempt in range(1, AGENT_STATUS_WRITE_RETRIES + 1):
+            try:
+                result = self.supabase.table("commands").update(update_data).eq("id", command_id).eq("status", "processing").execute()
+                if result.data:
+                    logger.info(f"Command {command_id} status updated to {status}")
+                    return True
+                logger.warning(f"Command {command_id} is no longer processing (lease lost or deleted), status {status} not saved")
+                return False
+            except Exception as e:
+                logger.error(f"Error updating command {command_id} status (attempt {attempt}): {e}")
+                if attempt < AGENT_STATUS_WRITE_RETRIES:
+                    time.sleep(attempt)
+        return False
     
     def _update_command_status(self, command_id: str, status: str, result_url: str = None, error_message: str = None):
         """Обновление статуса команды"""
@@ -164,18 +232,85 @@ class OfficeAgent:
             logger.error(f"Error fetching pending commands: {e}")
             return []
     
-    def _increment_attempt_count(self, command_id: str):
-        """Увеличение счетчика попыток"""
+    def _claim_command(self, command: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Атомарный захват команды: pending -> processing одним условным update
+        
+        Условие по attempt_count делает update compare-and-set: если команду
+        уже захватил другой агент, update не затронет ни одной строки.
+        
+        Returns:
+            Захваченная команда или None, если ее забрал другой агент
+        """
+        attempt_count = command.get('attempt_count') or 0
         try:
-            result = self.supabase.table("commands").select("attempt_count").eq("id", command_id).execute()
+            result = self.supabase.table("commands").update({
+                "status": "processing",
+                "attempt_count": attempt_count + 1,
+                "updated_at": datetime.now(timezone.utc).isoformat()
+            }).eq("id", command['id']).eq("status", "pending").eq("attempt_count", attempt_count).execute()
+            
             if result.data:
-                current_count = result.data[0].get("attempt_count", 0)
-                self.supabase.table("commands").update({
-                    "attempt_count": current_count + 1
-                }).eq("id", command_id).execute()
+                return result.data[0]
+            logger.info(f"Command {command['id']} already claimed by another agent")
+            return None
+            
+        except Exception as e:
+            logger.error(f"Error claiming command {command['id']}: {e}")
+            return None
+    
+    def _extend_leases(self, command_ids: List[str]):
+        """Продление аренды выполняющихся команд (одним запросом)"""
+        if not command_ids:
+            return
+        try:
+            self.supabase.table("commands").update({
+                "updated_at": datetime.now(timezone.utc).isoformat()
+            }).in_("id", command_ids).eq("status", "processing").execute()
+        except Exception as e:
+            logger.error(f"Error extending command leases: {e}")
+    
+    def _requeue_expired_commands(self):
+        """Возврат в очередь команд, аренда которых истекла (агент упал во время обработки)"""
+        now = time.monotonic()
+        if now - self._last_requeue < min(60, self.lease_timeout / 2):
+            return
+        self._last_requeue = now
+        
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.lease_timeout)
+        try:
+            result = self.supabase.table("commands").update({
+                "status": "pending",
+                "updated_at": datetime.now(timezone.utc).isoformat()
+            }).eq("status", "processing").lt("updated_at", cutoff.isoformat()).execute()
+            
+            for command in result.data or []:
+                logger.warning(f"Command {command['id']} lease expired, returned to queue")
                 
         except Exception as e:
-            logger.error(f"Error incrementing attempt count: {e}")
+            logger.error(f"Error re-queueing expired commands: {e}")
+    
+    def _printer_lock(self, printer_name: str) -> threading.Lock:
+        """Блокировка принтера: на один принтер документы отправляются по очереди"""
+        with self._printer_locks_guard:
+            if printer_name not in self._printer_locks:
+                self._printer_locks[printer_name] = threading.Lock()
+            return self._printer_locks[printer_name]
+    
+    def _generate_document(self, create_func, payload: Dict[str, Any]) -> str:
+        """Этап генерации документа (ограничен AGENT_GENERATE_WORKERS)"""
+        with self._generate_slots:
+            return create_func(payload)
+    
+    def _upload_document(self, filepath: str, apartment_id: str, doc_type: str) -> str:
+        """Этап загрузки документа (ограничен AGENT_UPLOAD_WORKERS)"""
+        with self._upload_slots:
+            return self._upload_document_to_storage(filepath, apartment_id, doc_type)
+    
+    def _print_document_serialized(self, filepath: str) -> bool:
+        """Этап печати (последовательно для каждого принтера)"""
+        with self._printer_lock(self.printer_name or "default"):
+            return self._print_document(filepath)
     
     def _create_handover_act(self, payload: Dict[str, Any]) -> str:
         """Создание акта приёмки"""
@@ -316,7 +451,7 @@ class OfficeAgent:
                     "mime_type": "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
                 }
                 
-                self.supabase.table("documents").insert(doc_data).execute()
+                self._documents_buffer.add(doc_data)
                 
                 logger.info(f"Document uploaded to storage: {public_url}")
                 return public_url
@@ -369,44 +504,42 @@ class OfficeAgent:
             logger.info(f"Processing command {command_id} of type {command_type}")
             self._log_agent_action(command_id, "info", f"Started processing command {command_type}")
             
-            # Обновляем статус на "processing"
-            self._update_command_status(command_id, "processing")
-            
+            # Статус "processing" уже выставлен при захвате команды
             result_url = None
             
             if command_type == "create_act":
                 # Создание акта приёмки
-                filepath = self._create_handover_act(payload)
-                result_url = self._upload_document_to_storage(filepath, payload['apartment_id'], "handover_act")
+                filepath = self._generate_document(self._create_handover_act, payload)
+                result_url = self._upload_document(filepath, payload['apartment_id'], "handover_act")
                 
             elif command_type == "print_act":
                 # Печать акта
                 # Сначала создаем акт, если его нет
-                filepath = self._create_handover_act(payload)
-                result_url = self._upload_document_to_storage(filepath, payload['apartment_id'], "handover_act")
+                filepath = self._generate_document(self._create_handover_act, payload)
+                result_url = self._upload_document(filepath, payload['apartment_id'], "handover_act")
                 
                 # Печатаем документ
-                print_success = self._print_document(filepath)
+                print_success = self._print_document_serialized(filepath)
                 if not print_success:
                     raise Exception("Failed to print document")
                     
             elif command_type == "create_defect":
                 # Создание отчёта о дефектах
-                filepath = self._create_defect_report(payload)
-                result_url = self._upload_document_to_storage(filepath, payload['apartment_id'], "defect_report")
+                filepath = self._generate_document(self._create_defect_report, payload)
+                result_url = self._upload_document(filepath, payload['apartment_id'], "defect_report")
                 
             elif command_type == "print_defect_report":
                 # Печать отчёта о дефектах
-                filepath = self._create_defect_report(payload)
-                result_url = self._upload_document_to_storage(filepath, payload['apartment_id'], "defect_report")
+                filepath = self._generate_document(self._create_defect_report, payload)
+                result_url = self._upload_document(filepath, payload['apartment_id'], "defect_report")
                 
                 # Печатаем документ
-                print_success = self._print_document(filepath)
+                print_success = self._print_document_serialized(filepath)
                 if not print_success:
                     raise Exception("Failed to print document")
             
             # Обновляем статус на "done"
-            self._update_command_status(command_id, "done", result_url)
+            self._finish_command(command_id, "done", result_url)
             self._log_agent_action(command_id, "info", f"Command {command_type} completed successfully", {
                 "result_url": result_url
             })
@@ -420,7 +553,7 @@ class OfficeAgent:
             logger.error(traceback.format_exc())
             
             # Обновляем статус на "failed"
-            self._update_command_status(command_id, "failed", error_message=error_msg)
+            self._finish_command(command_id, "failed", error_message=error_msg)
             self._log_agent_action(command_id, "error", f"Command {command_type} failed", {
                 "error": error_msg,
                 "traceback": traceback.format_exc()
@@ -434,16 +567,18 @@ class OfficeAgent:
         return attempt_count < self.max_retries
     
     def run_once(self):
-        """Однократный запуск обработки команд"""
+        """Однократный запуск обработки команд (возвращает число полученных команд)"""
         try:
-            pending_commands = self._get_pending_commands()
+            self._requeue_expired_commands()
+            pending_commands = self._get_pending_commands(self.batch_size)
             
             if not pending_commands:
                 logger.debug("No pending commands found")
-                return
+                return 0
             
             logger.info(f"Found {len(pending_commands)} pending commands")
             
+            futures = {}
             for command in pending_commands:
                 command_id = command['id']
                 attempt_count = command.get('attempt_count', 0)
@@ -454,30 +589,50 @@ class OfficeAgent:
                     self._update_command_status(command_id, "failed", error_message="Max retries exceeded")
                     continue
                 
-                # Увеличиваем счетчик попыток
-                self._increment_attempt_count(command_id)
-                
-                # Обрабатываем команду
-                success = self._process_command(command)
+                # Захватываем команду (другой агент мог успеть раньше)
+                claimed = self._claim_command(command)
+                if not claimed:
+                    continue
                 
-                if success:
-                    logger.info(f"Command {command_id} processed successfully")
-                else:
-                    logger.error(f"Command {command_id} processing failed")
+                futures[self._executor.submit(self._process_command, claimed)] = command_id
+            
+            # Ждем завершения, продлевая аренду выполняющихся команд
+            pending_futures = set(futures)
+            lease_renew_interval = self.lease_timeout / 3
+            last_renewed = time.monotonic()
+            while pending_futures:
+                done, pending_futures = wait(pending_futures, timeout=lease_renew_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    command_id = futures[future]
+                    if future.result():
+                        logger.info(f"Command {command_id} processed successfully")
+                    else:
+                        logger.error(f"Command {command_id} processing failed")
+                if pending_futures and time.monotonic() - last_renewed >= lease_renew_interval:
+                    self._extend_leases([futures[future] for future in pending_futures])
+                    last_renewed = time.monotonic()
+            
+            return len(pending_commands)
                     
         except Exception as e:
             logger.error(f"Error in run_once: {e}")
             logger.error(traceback.format_exc())
+            return 0
     
     def start(self):
-        """Запуск агента в режиме polling"""
+        """Запуск агента: ожидание уведомлений backend, polling - запасной вариант"""
         logger.info("Starting office agent...")
         self.running = True
         
         try:
-            while self.running:
-                self.run_once()
-                time.sleep(self.poll_interval)
+            if self.notify_url:
+                listener = CommandListener(self.notify_url)
+                listener.run(self.run_once, lambda: self.running, self.poll_interval, self.batch_size)
+            else:
+                logger.info("AGENT_NOTIFY_URL is not set, using polling mode")
+                while self.running:
+                    self.run_once()
+                    time.sleep(self.poll_interval)
                 
         except KeyboardInterrupt:
             logger.info("Agent stopped by user")
@@ -486,6 +641,9 @@ class OfficeAgent:
             logger.error(traceback.format_exc())
         finally:
             self.running = False
+            self._executor.shutdown(wait=True)
+            for buffer in (self._documents_buffer, self._log_buffer):
+                buffer.close()
             logger.info("Agent stopped")
     
     def stop(self):
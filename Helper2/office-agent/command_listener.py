@@ -0,0 +1,109 @@
+"""
+Подписка агента на уведомления backend о новых командах
+Агент держит long-poll запрос к /api/commands/wait и запускает обработку сразу
+после появления команды. Если backend недоступен, агент возвращается к опросу
+очереди с интервалом poll_interval.
+"""
+
+import os
+import time
+import logging
+from typing import Callable, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Сколько сервер удерживает long-poll запрос (секунды)
+COMMAND_WAIT_TIMEOUT = float(os.getenv('AGENT_WAIT_TIMEOUT', '25'))
+# Контрольный опрос очереди при работающих уведомлениях (команды, созданные
+# напрямую в базе, минуя API, уведомлений не порождают)
+AGENT_FALLBACK_POLL_INTERVAL = float(os.getenv('AGENT_FALLBACK_POLL_INTERVAL', '60'))
+
+
+class CommandListener:
+    """Long-poll подписка на /api/commands/wait"""
+
+    def __init__(self, api_base_url: str, wait_timeout: float = COMMAND_WAIT_TIMEOUT,
+                 fallback_interval: float = AGENT_FALLBACK_POLL_INTERVAL):
+        """
+        Args:
+            api_base_url: Адрес backend (например, http://localhost:8000)
+            wait_timeout: Сколько сервер удерживает запрос без новых команд
+            fallback_interval: Период контрольного опроса очереди
+        """
+        self.api_base_url = api_base_url.rstrip('/')
+        self.wait_timeout = wait_timeout
+        self.fallback_interval = fallback_interval
+        self.session = requests.Session()
+        self.since: Optional[int] = None
+        self.epoch: Optional[str] = None
+        self.connected = False
+
+    def wait(self) -> bool:
+        """
+        Дождаться уведомления
+
+        Returns:
+            True - есть новые команды (или нужно перечитать очередь), False - таймаут
+
+        Raises:
+            requests.RequestException: backend недоступен
+        """
+        params = {'timeout': self.wait_timeout}
+        if self.since is not None:
+            params['since'] = self.since
+            params['epoch'] = self.epoch
+
+        response = self.session.get(
+            f"{self.api_base_url}/api/commands/wait",
+            params=params,
+            timeout=self.wait_timeout + 10
+        )
+        response.raise_for_status()
+        data = response.json()
+
+        self.since = data['seq']
+        self.epoch = data['epoch']
+        if data['commands']:
+            logger.info(f"Notified about {len(data['commands'])} new commands")
+        return bool(data['commands']) or data.get('reset', False)
+
+    def run(self, run_once: Callable[[], int], is_running: Callable[[], bool],
+            poll_interval: float, batch_size: int):
+        """
+        Основной цикл агента
+
+        Args:
+            run_once: Обработка очереди, возвращает число полученных команд
+            is_running: Проверка, что агент не остановлен
+            poll_interval: Интервал опроса, если уведомления недоступны
+            batch_size: Размер выборки pending команд (полная выборка - очередь
+                могла не закончиться, ждать уведомления не нужно)
+        """
+        last_poll = 0.0
+        backlog = False
+
+        while is_running():
+            if not backlog:
+                try:
+                    notified = self.wait()
+                    if not self.connected:
+                        logger.info(f"Subscribed to command notifications at {self.api_base_url}")
+                        self.connected = True
+                except (requests.RequestException, ValueError, KeyError) as e:
+                    if self.connected or last_poll == 0.0:
+                        logger.warning(f"Command notifications unavailable, falling back to polling: {e}")
+                    self.connected = False
+                    self.since = None
+                    run_once()
+                    last_poll = time.monotonic()
+                    time.sleep(poll_interval)
+                    continue
+
+                if not notified and time.monotonic() - last_poll < self.fallback_interval:
+                    continue
+
+            processed = run_once()
+            last_poll = time.monotonic()
+            backlog = processed >= batch_size
@@ -5,7 +5,6 @@
 
 import os
 import sys
-import time
 import json
 import logging
 import requests
@@ -19,6 +18,9 @@ from docx.shared import Inches, Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.table import WD_TABLE_ALIGNMENT
 
+from command_listener import CommandListener
+from write_buffer import WriteBehindBuffer
+
 # Настройка логирования
 logging.basicConfig(
     level=logging.INFO,
@@ -30,18 +32,26 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Итоговые статусы команды - их можно отправлять пакетом
+TERMINAL_STATUSES = {"done", "failed"}
+
 class SimpleOfficeAgent:
     """Упрощенный офисный агент для демонстрации"""
     
     def __init__(self):
         self.api_base_url = "http://localhost:8000"
         self.running = False
-        self.poll_interval = 5  # секунд
+        self.poll_interval = 5  # секунд (если уведомления backend недоступны)
+        self.batch_size = 10
         self.max_retries = 3
         
         # Создаем папку для документов
         os.makedirs("generated_docs", exist_ok=True)
         
+        # Статусы отправляются пакетами через PATCH /api/commands
+        self.session = requests.Session()
+        self._status_buffer = WriteBehindBuffer("command_status", self._flush_status_updates, key="id")
+        
         logger.info("Simple Office Agent initialized")
     
     def _log_agent_action(self, command_id: str, level: str, message: str, details: Dict = None):
@@ -50,10 +60,10 @@ class SimpleOfficeAgent:
         if details:
             logger.info(f"Details: {details}")
     
-    def _get_pending_commands(self) -> List[Dict]:
+    def _get_pending_commands(self, limit: int = 10) -> List[Dict]:
         """Получение pending команд из API"""
         try:
-            response = requests.get(f"{self.api_base_url}/api/commands/pending")
+            response = requests.get(f"{self.api_base_url}/api/commands/pending", params={"limit": limit})
             
             if response.status_code == 200:
                 commands = response.json()
@@ -68,32 +78,42 @@ class SimpleOfficeAgent:
             return []
     
     def _update_command_status(self, command_id: str, status: str, result_url: str = None, error_message: str = None):
-        """Обновление статуса команды через API"""
-        try:
-            update_data = {"status": status}
-            
-            if result_url:
-                update_data["result_url"] = result_url
-                
-            if error_message:
-                update_data["error_message"] = error_message
-            
-            response = requests.patch(
-                f"{self.api_base_url}/api/commands/{command_id}",
-                json=update_data
-            )
+        """
+        Обновление статуса команды
+        
+        Итоговые статусы ("done"/"failed") отправляются пакетом в конце run_once,
+        остальные ("processing") - сразу, до начала работы над командой.
+        """
+        update_data = {"id": command_id, "status": status}
+        
+        if result_url:
+            update_data["result_url"] = result_url
             
-            if response.status_code == 200:
-                logger.info(f"Command {command_id} status updated to {status}")
-                return True
-            else:
-                logger.error(f"Failed to update command {command_id} status: {response.status_code}")
-                return False
-                
+        if error_message:
+            update_data["error_message"] = error_message
+        
+        if status in TERMINAL_STATUSES:
+            self._status_buffer.add(update_data)
+            return True
+        
+        try:
+            self._flush_status_updates([update_data])
+            return True
         except Exception as e:
             logger.error(f"Error updating command status: {e}")
             return False
     
+    def _flush_status_updates(self, rows: List[Dict]):
+        """Пакетная отправка статусов команд"""
+        response = self.session.patch(f"{self.api_base_url}/api/commands", json=rows)
+        response.raise_for_status()
+        
+        result = response.json()
+        for command_id in result.get("updated", []):
+            logger.info(f"Command {command_id} status updated")
+        for command_id in result.get("not_found", []):
+            logger.error(f"Failed to update command {command_id} status: not found")
+    
     def _create_handover_act(self, payload: Dict[str, Any]) -> str:
         """Создание акта приёмки"""
         try:
@@ -314,13 +334,21 @@ class SimpleOfficeAgent:
             return False
     
     def run_once(self):
-        """Однократный запуск обработки команд"""
+        """Однократный запуск обработки команд (возвращает число полученных команд)"""
         try:
-            pending_commands = self._get_pending_commands()
+            # Пока итоговые статусы прошлого пакета не доставлены, backend вернет
+            # те же команды как pending - новые не выбираем
+            if len(self._status_buffer):
+                self._status_buffer.flush()
+            if len(self._status_buffer):
+                logger.warning(f"{len(self._status_buffer)} command statuses not delivered yet, skipping fetch")
+                return 0
+            
+            pending_commands = self._get_pending_commands(self.batch_size)
             
             if not pending_commands:
                 logger.debug("No pending commands found")
-                return
+                return 0
             
             logger.info(f"Found {len(pending_commands)} pending commands")
             
@@ -341,20 +369,24 @@ class SimpleOfficeAgent:
                     logger.info(f"Command {command_id} processed successfully")
                 else:
                     logger.error(f"Command {command_id} processing failed")
+            
+            # Статусы пакета должны дойти до backend до следующей выборки pending
+            self._status_buffer.flush()
+            return len(pending_commands)
                     
         except Exception as e:
             logger.error(f"Error in run_once: {e}")
             logger.error(traceback.format_exc())
+            return 0
     
     def start(self):
-        """Запуск агента в режиме polling"""
+        """Запуск агента: ожидание уведомлений backend, polling - запасной вариант"""
         logger.info("Starting simple office agent...")
         self.running = True
         
         try:
-            while self.running:
-                self.run_once()
-                time.sleep(self.poll_interval)
+            listener = CommandListener(self.api_base_url)
+            listener.run(self.run_once, lambda: self.running, self.poll_interval, self.batch_size)
                 
         except KeyboardInterrupt:
             logger.info("Agent stopped by user")
@@ -363,6 +395,7 @@ class SimpleOfficeAgent:
             logger.error(traceback.format_exc())
         finally:
             self.running = False
+            self._status_buffer.close()
             logger.info("Agent stopped")
     
     def stop(self):
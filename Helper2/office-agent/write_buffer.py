@@ -0,0 +1,139 @@
+"""
+Отложенная пакетная запись (write-behind) для агента
+Статусы команд и логи копятся в памяти и отправляются одним запросом:
+при накоплении batch_size записей, по таймеру и при остановке агента.
+"""
+
+import os
+import atexit
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Размер пакета и период сброса (можно переопределить в .env)
+AGENT_WRITE_BATCH_SIZE = max(1, int(os.getenv("AGENT_WRITE_BATCH_SIZE", "50")))
+AGENT_WRITE_FLUSH_INTERVAL = float(os.getenv("AGENT_WRITE_FLUSH_INTERVAL", "1.0"))
+# Сколько записей держать при недоступной базе, прежде чем отбрасывать старые
+AGENT_WRITE_MAX_PENDING = int(os.getenv("AGENT_WRITE_MAX_PENDING", "5000"))
+
+
+class WriteBehindBuffer:
+    """
+    Буфер записей с пакетным сбросом в фоновом потоке
+
+    Если задан key, записи с одинаковым значением ключа объединяются
+    (более поздние поля перекрывают ранние) - например, статусы одной команды.
+    """
+
+    def __init__(self, name: str, flush_func: Callable[[List[Dict[str, Any]]], Any],
+                 key: Optional[str] = None, batch_size: int = AGENT_WRITE_BATCH_SIZE,
+                 flush_interval: float = AGENT_WRITE_FLUSH_INTERVAL,
+                 max_pending: int = AGENT_WRITE_MAX_PENDING):
+        """
+        Args:
+            name: Имя буфера для логов
+            flush_func: Запись пакета (одним запросом)
+            key: Поле для объединения записей (None - записи не объединяются)
+            batch_size: Сбрасывать сразу при накоплении стольких записей
+            flush_interval: Период сброса по таймеру (секунды)
+            max_pending: Предел записей при ошибках сброса
+        """
+        self.name = name
+        self.flush_func = flush_func
+        self.key = key
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._items: "OrderedDict[Any, Dict[str, Any]]" = OrderedDict()
+        self._counter = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, name=f"write-behind-{name}", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def add(self, item: Dict[str, Any]):
+        """Добавить запись в буфер"""
+        with self._lock:
+            if self.key is not None and item.get(self.key) in self._items:
+                self._items[item[self.key]].update(item)
+            else:
+                if self.key is not None:
+                    item_key = item.get(self.key)
+                else:
+                    self._counter += 1
+                    item_key = self._counter
+                self._items[item_key] = dict(item)
+            size = len(self._items)
+
+        if size >= self.batch_size:
+            self._wakeup.set()
+
+    def __len__(self) -> int:
+        """Число записей, ожидающих отправки"""
+        with self._lock:
+            return len(self._items)
+
+    def _take(self) -> List[Any]:
+        with self._lock:
+            items = list(self._items.items())
+            self._items.clear()
+        return items
+
+    def _restore(self, items: List[Any]):
+        """Вернуть неотправленные записи в начало буфера (поверх них - более новые)"""
+        with self._lock:
+            newer = self._items
+            self._items = OrderedDict(items)
+            for item_key, item in newer.items():
+                if item_key in self._items:
+                    self._items[item_key].update(item)
+                else:
+                    self._items[item_key] = item
+            while len(self._items) > self.max_pending:
+                self._items.popitem(last=False)
+
+    def flush(self) -> int:
+        """
+        Отправить накопленные записи
+
+        Returns:
+            Количество отправленных записей
+        """
+        with self._flush_lock:
+            items = self._take()
+            sent = 0
+            for start in range(0, len(items), self.batch_size):
+                chunk = items[start:start + self.batch_size]
+                try:
+                    self.flush_func([item for _, item in chunk])
+                    sent += len(chunk)
+                except Exception as e:
+                    logger.error(f"Failed to flush {self.name} buffer ({len(chunk)} rows): {e}")
+                    self._restore(items[start:])
+                    break
+            if sent:
+                logger.debug(f"Flushed {sent} rows from {self.name} buffer")
+            return sent
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def close(self):
+        """Остановить фоновый поток и отправить оставшиеся записи"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        self.flush()